@@ -0,0 +1,194 @@
+"""Broadcaster - In-process fan-out of server-sent events
+
+Subscribers register for a set of topics (a zone's alerts, a user's
+changes) and get a bounded buffer. publish() encodes an event once and
+hands the same bytes to every subscriber of the topic without waiting,
+so a slow client can never hold up the others: a subscriber whose queue
+is full is evicted and its stream ends (the client reconnects and
+refetches).
+"""
+import asyncio
+import itertools
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.serialization import dumps
+
+Topic = Hashable
+
+
+class SubscriptionClosed(Exception):
+    """The subscription was evicted as a slow consumer, or the broadcaster closed"""
+
+
+class Subscription:
+    """
+    One connected client: its topics and a bounded buffer of encoded events.
+
+    An idle subscriber holds just a pending future and a timer, which is
+    what lets one worker keep tens of thousands of streams open.
+    """
+
+    __slots__ = ("topics", "maxsize", "evicted", "_events", "_waiter")
+
+    def __init__(self, topics: Iterable[Topic], maxsize: int):
+        self.topics = frozenset(topics)
+        self.maxsize = maxsize
+        self.evicted = False
+        self._events: Deque[bytes] = deque()
+        self._waiter: Optional["asyncio.Future[None]"] = None
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def push(self, event: bytes) -> bool:
+        """Queue an event; False if the buffer is full"""
+        if len(self._events) >= self.maxsize:
+            return False
+        self._events.append(event)
+        self._wake()
+        return True
+
+    def close(self) -> None:
+        self.evicted = True
+        self._wake()
+
+    async def next(self, timeout: float) -> Optional[bytes]:
+        """
+        The next encoded event, or None after `timeout` seconds with none.
+
+        Raises:
+            SubscriptionClosed: If the subscription was evicted or closed
+        """
+        if not self._events and not self.evicted:
+            loop = asyncio.get_running_loop()
+            self._waiter = loop.create_future()
+            timer = loop.call_later(timeout, self._wake)
+            try:
+                await self._waiter
+            finally:
+                timer.cancel()
+                self._waiter = None
+        if self.evicted:
+            raise SubscriptionClosed()
+        return self._events.popleft() if self._events else None
+
+
+def encode_event(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """An SSE message with a JSON data line"""
+    lines = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{lines}event: {event}\ndata: ".encode() + dumps(data) + b"\n\n"
+
+
+class Broadcaster:
+    """
+    Topic-based fan-out to bounded subscriber buffers.
+
+    Usage:
+        subscription = broadcaster.subscribe([("zone", "North"), ("user", user_id)])
+        try:
+            event = await subscription.next(timeout=15.0)
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+        broadcaster.publish([("zone", "North")], "alert", alert)
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._topics: Dict[Topic, Set[Subscription]] = {}
+        self._subscriptions: Set[Subscription] = set()
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.delivered = 0
+        self.evicted = 0
+
+    def subscribe(self, topics: Iterable[Topic]) -> Subscription:
+        subscription = Subscription(topics, self.queue_size)
+        self._subscriptions.add(subscription)
+        for topic in subscription.topics:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+        for topic in subscription.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[topic]
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def publish(self, topics: Iterable[Topic], event: str, data: Any) -> int:
+        """
+        Send an event to every subscriber of any of `topics` (once each).
+
+        Returns:
+            The number of subscribers it was queued for
+        """
+        subscribers: Set[Subscription] = set()
+        for topic in topics:
+            subscribers.update(self._topics.get(topic, ()))
+        if not subscribers:
+            return 0
+
+        message = encode_event(event, data, next(self._ids))
+        self.published += 1
+        delivered = 0
+        for subscription in subscribers:
+            if subscription.push(message):
+                delivered += 1
+            else:
+                # Too far behind: drop it rather than buffer without bound
+                subscription.close()
+                self.unsubscribe(subscription)
+                self.evicted += 1
+        self.delivered += delivered
+        return delivered
+
+    def close(self) -> None:
+        """End every subscriber's stream (at shutdown)"""
+        subscriptions, self._subscriptions = self._subscriptions, set()
+        self._topics.clear()
+        for subscription in subscriptions:
+            subscription.close()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": self.subscriber_count,
+            "topics": len(self._topics),
+            "published": self.published,
+            "delivered": self.delivered,
+            "evicted": self.evicted
+        }
+
+
+# Alerts go to the topics of their target zones (or ALL_ZONES when they
+# have none) and always to ANY_ZONE, for subscribers that want every alert
+ALL_ZONES: Topic = ("zone", None)
+ANY_ZONE: Topic = ("zone", "*")
+
+
+def user_topic(user_id: str) -> Topic:
+    return ("user", user_id)
+
+
+def zone_topics(zone: Optional[str]) -> List[Topic]:
+    """Topics to subscribe to for one zone's alerts (every alert if zone is None)"""
+    return [("zone", zone), ALL_ZONES] if zone else [ANY_ZONE]
+
+
+def alert_topics(target_zones: Optional[Iterable[str]]) -> List[Topic]:
+    """Topics an alert is published to"""
+    topics = [("zone", zone) for zone in target_zones or ()] or [ALL_ZONES]
+    return topics + [ANY_ZONE]
+
+
+broadcaster = Broadcaster(queue_size=settings.EVENTS_SUBSCRIBER_QUEUE_SIZE)
@@ -0,0 +1,275 @@
+"""Compression - Negotiated gzip/brotli response compression
+
+CompressionMiddleware compresses JSON and text responses of at least
+COMPRESSION_MINIMUM_SIZE bytes with the best encoding the client
+accepts: brotli when the optional `brotli` package is installed, else
+gzip. Streamed responses are compressed chunk by chunk and flushed after
+each chunk, so they still stream; event streams are left alone.
+
+Compressed bodies are cached by a digest of the uncompressed body, so a
+payload that has not changed since the last request (a kiosk re-polling
+a bill history, the dashboard between writes) is compressed only once.
+Responses that are already encoded - the ResponseCache's precompressed
+city data - pass through untouched.
+"""
+import gzip
+import hashlib
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# brotli is optional: without it only gzip is offered
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+# In order of preference when the client accepts several equally
+ENCODINGS: Tuple[str, ...] = ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+_COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "image/svg+xml", "text/"
+)
+_UNCOMPRESSED_TYPES = ("text/event-stream",)  # flushed per event; compression would buffer it
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The encoding to use for an Accept-Encoding header ("br", "gzip"), or None"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(_COMPRESSIBLE_TYPES) and not content_type.startswith(_UNCOMPRESSED_TYPES)
+
+
+class _StreamCompressor:
+    """Incremental compressor whose output can be sent after every chunk"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._brotli = None
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(chunk) + self._brotli.flush()
+        return self._gzip.compress(chunk) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._gzip.flush()
+
+
+class ResponseCompressor:
+    """
+    Compression settings plus a cache of compressed bodies.
+
+    Usage:
+        encoding = negotiate(request.headers.get("accept-encoding"))
+        body = response_compressor.compress(body, encoding)
+    """
+
+    def __init__(
+        self,
+        minimum_size: int,
+        gzip_level: int,
+        brotli_quality: int,
+        cache_max_entries: int,
+        cache_ttl: float,
+        cache_max_body_size: int
+    ):
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_max_body_size = cache_max_body_size
+        self._cache = TTLCache(maxsize=cache_max_entries, ttl=cache_ttl)
+        self.compressed = 0
+        self.streamed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        """`body` compressed with `encoding`, from the cache when it was compressed before"""
+        self.compressed += 1
+        self.bytes_in += len(body)
+        if len(body) > self.cache_max_body_size:
+            compressed = self._compress(body, encoding)
+        else:
+            key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+            compressed = self._cache.get(key)
+            if compressed is None:
+                compressed = self._compress(body, encoding)
+                self._cache.set(key, compressed)
+        self.bytes_out += len(compressed)
+        return compressed
+
+    def precompress(self, body: bytes) -> Dict[str, bytes]:
+        """`body` in every available encoding, for responses cached already compressed"""
+        if len(body) < self.minimum_size:
+            return {}
+        return {encoding: self._compress(body, encoding) for encoding in ENCODINGS}
+
+    def stream(self, encoding: str) -> _StreamCompressor:
+        self.streamed += 1
+        return _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "encodings": list(ENCODINGS),
+            "compressed": self.compressed,
+            "streamed": self.streamed,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            "cache": self._cache.stats
+        }
+
+
+Message = Dict[str, Any]
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _without(headers: List[Tuple[bytes, bytes]], *names: bytes) -> List[Tuple[bytes, bytes]]:
+    return [(key, value) for key, value in headers if key.lower() not in names]
+
+
+def _vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    vary = _header(headers, b"vary")
+    if vary is None:
+        return headers + [(b"vary", b"Accept-Encoding")]
+    if b"accept-encoding" in vary.lower():
+        return headers
+    return _without(headers, b"vary") + [(b"vary", vary + b", Accept-Encoding")]
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with the negotiated encoding.
+
+    Responses are compressed when their type is compressible, they carry
+    no Content-Encoding yet, and (when not streamed) their body is at
+    least the compressor's minimum size. A strong ETag becomes weak, as
+    the compressed bytes differ from the ones it was computed over.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]], compressor: Optional[ResponseCompressor] = None):
+        self.app = app
+        self.compressor = compressor or response_compressor
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+
+        compressor = self.compressor
+        encoding = negotiate(accept_encoding)
+        start: Optional[Message] = None
+        stream: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, stream, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if stream is not None:
+                chunk = stream.compress(body) if body else b""
+                if not more_body:
+                    chunk += stream.finish()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            # First body message: decide how to send this response
+            headers = list(start.get("headers", []))
+            content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+            compressible = (
+                is_compressible(content_type)
+                and start["status"] not in (204, 206, 304)
+                and _header(headers, b"content-encoding") is None
+            )
+            if compressible:
+                headers = _vary(headers)
+            if not compressible or encoding is None or (not more_body and len(body) < compressor.minimum_size):
+                passthrough = True
+                await send({**start, "headers": headers})
+                await send(message)
+                return
+
+            headers = _without(headers, b"content-length") + [(b"content-encoding", encoding.encode())]
+            etag = _header(headers, b"etag")
+            if etag is not None and not etag.startswith(b"W/"):
+                headers = _without(headers, b"etag") + [(b"etag", b"W/" + etag)]
+
+            if not more_body:
+                body = compressor.compress(body, encoding)
+                headers.append((b"content-length", str(len(body)).encode()))
+                await send({**start, "headers": headers})
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            stream = compressor.stream(encoding)
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": stream.compress(body), "more_body": True})
+
+        await self.app(scope, receive, send_compressed)
+
+
+response_compressor = ResponseCompressor(
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    cache_max_entries=settings.COMPRESSION_CACHE_MAX_ENTRIES,
+    cache_ttl=settings.COMPRESSION_CACHE_TTL_SECONDS,
+    cache_max_body_size=settings.COMPRESSION_CACHE_MAX_BODY_BYTES
+)
@@ -24,12 +24,120 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str = ""
     SUPABASE_SERVICE_KEY: str = ""
 
+    # Supabase client pool
+    SUPABASE_POOL_MAX_SIZE: int = 16
+    SUPABASE_POOL_IDLE_TIMEOUT_SECONDS: float = 300.0
+    SUPABASE_POOL_ACQUIRE_TIMEOUT_SECONDS: float = 10.0
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = 20
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    SUPABASE_HTTP_TIMEOUT_SECONDS: float = 10.0
+
+    # Database executor (blocking PostgREST calls run off the event loop)
+    DB_EXECUTOR_WORKERS: int = 16
+    DB_TABLE_CONCURRENCY: int = 8
+
+    # Per-user read-through cache (bills, grievances, transactions)
+    USER_DATA_CACHE_MAX_ENTRIES: int = 20000
+    USER_DATA_CACHE_TTL_SECONDS: float = 30.0
+
+    # Per-user version counters (ETags of listings, 304 on If-None-Match)
+    USER_VERSION_MAX_ENTRIES: int = 60000
+    USER_VERSION_TTL_SECONDS: float = 5.0  # versions read from Postgres are reused this long
+
+    # Per-user billing aggregates (total due, service breakdown, due dates)
+    BILLING_DUE_SOON_DAYS: int = 7
+    BILLING_AGGREGATE_MAX_USERS: int = 20000
+    BILLING_AGGREGATE_TTL_SECONDS: float = 300.0
+
+    # List endpoints (keyset pagination and streamed responses)
+    LIST_PAGE_MAX_LIMIT: int = 200
+    LIST_STREAM_BATCH_SIZE: int = 500
+
+    # Timestamp decoding of database rows
+    TIMESTAMP_PARSE_CACHE_SIZE: int = 65536  # memoized ISO strings
+
+    # Idempotency-Key replay for POST /payments/create-order
+    IDEMPOTENCY_MAX_KEYS: int = 10000
+    IDEMPOTENCY_TTL_SECONDS: float = 86400.0
+
+    # Grievance priority keywords (JSON file; empty uses the built-in table)
+    PRIORITY_KEYWORDS_FILE: str = ""
+    PRIORITY_KEYWORDS_RELOAD_SECONDS: float = 30.0  # how often the file's mtime is checked; 0 disables
+
+    # Batch grievance triage
+    TRIAGE_WORKERS: int = 4
+    TRIAGE_CHUNK_SIZE: int = 500
+    TRIAGE_INLINE_MAX: int = 200  # batches up to this size skip the process pool
+    TRIAGE_MAX_BATCH: int = 10000
+    TRIAGE_MAX_LINE_BYTES: int = 65536
+
+    # Background grievance enrichment
+    ENRICHMENT_QUEUE_SIZE: int = 1000
+    ENRICHMENT_WORKERS: int = 2
+    ENRICHMENT_ENQUEUE_TIMEOUT_SECONDS: float = 0.5  # then the grievance is enriched inline
+    ENRICHMENT_DRAIN_TIMEOUT_SECONDS: float = 5.0
+    ENRICHMENT_MAX_ATTEMPTS: int = 5
+    ENRICHMENT_RETRY_DELAY_SECONDS: float = 1.0  # doubled after each failed attempt
+    ENRICHMENT_SWEEP_LIMIT: int = 1000  # unenriched grievances queued again on startup
+
+    # Incident clustering of near-duplicate grievances (MinHash/LSH)
+    INCIDENT_LSH_BANDS: int = 16
+    INCIDENT_LSH_ROWS: int = 2  # bands * rows MinHash values per description
+    INCIDENT_SIMILARITY_THRESHOLD: float = 0.3  # estimated Jaccard of word shingles
+    INCIDENT_WINDOW_SECONDS: float = 21600.0  # incidents idle this long are closed
+    INCIDENT_MAX_CLUSTERS: int = 50000
+
+    # Grievance full-text search
+    GRIEVANCE_SEARCH_REBUILD_ON_STARTUP: bool = True
+    GRIEVANCE_SEARCH_REBUILD_BATCH_SIZE: int = 1000
+
+    # City data response cache
+    CITY_DATA_CACHE_TTL_SECONDS: float = 60.0
+    CITY_DATA_STALE_SECONDS: float = 300.0  # served while a refresh runs in the background
+
+    # Response compression (gzip, or brotli when installed)
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # smaller bodies are sent as they are
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    COMPRESSION_CACHE_MAX_ENTRIES: int = 512  # compressed bodies by digest of the uncompressed one
+    COMPRESSION_CACHE_TTL_SECONDS: float = 300.0
+    COMPRESSION_CACHE_MAX_BODY_BYTES: int = 512 * 1024  # larger bodies are compressed every time
+
+    # Server-sent events
+    EVENTS_SUBSCRIBER_QUEUE_SIZE: int = 64  # a subscriber this far behind is disconnected
+    EVENTS_KEEPALIVE_SECONDS: float = 15.0
+    EVENTS_RETRY_MILLISECONDS: int = 5000
+    EVENTS_ALERT_POLL_SECONDS: float = 10.0
+    EVENTS_MAX_STREAM_SECONDS: float = 300.0  # then the client reconnects
+
+    # Dashboard
+    DASHBOARD_SECTION_TIMEOUT_SECONDS: float = 2.0
+
     # JWT
     JWT_SECRET: str = "your-secret-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_ALGORITHM_FALLBACK: str = "ES256"
     JWT_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
 
+    # Local JWT verification (JWKS)
+    JWT_LOCAL_VERIFICATION: bool = True
+    JWT_AUDIENCE: str = "authenticated"
+    JWT_ISSUER: str = ""  # Defaults to {SUPABASE_URL}/auth/v1
+    JWT_LEEWAY_SECONDS: int = 30
+    JWKS_URL: str = ""  # Defaults to {SUPABASE_URL}/auth/v1/.well-known/jwks.json
+    JWKS_REFRESH_SECONDS: int = 600
+    JWKS_MIN_FETCH_INTERVAL_SECONDS: float = 30.0
+    JWKS_FETCH_TIMEOUT_SECONDS: float = 5.0
+
+    # Verified token cache
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL_SECONDS: float = 300.0
+    AUTH_NEGATIVE_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_NEGATIVE_CACHE_TTL_SECONDS: float = 30.0
+
+    # /metrics (sent as "Authorization: Bearer <token>"; empty disables the endpoint)
+    METRICS_TOKEN: str = ""
+
     # Mock Mode
     MOCK_MODE: bool = True
 
@@ -1,6 +1,16 @@
 """Database Connection - Supabase Client"""
-from typing import Optional, Any, TYPE_CHECKING
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import (
+    Optional, Any, Callable, Deque, Dict, Iterator, List, Tuple, TypeVar, TYPE_CHECKING
+)
 from app.core.config import settings
+from app.core.indexed_table import IndexedTable
+from app.core.timestamps import decode_rows
 
 # Try to import Supabase, fail gracefully if not available
 if TYPE_CHECKING:
@@ -11,7 +21,9 @@ if TYPE_CHECKING:
         SupabaseClient = Any
 else:
     try:
-        from supabase import Client, create_client
+        import httpx
+        from postgrest.utils import SyncClient as PostgrestSession
+        from supabase import Client, ClientOptions, create_client
         SUPABASE_AVAILABLE = True
         SupabaseClient = Client
     except ImportError:
@@ -20,61 +32,423 @@ else:
         def create_client(*args, **kwargs):  # type: ignore
             return None
 
-# Global Supabase client
-_supabase_client: Optional["SupabaseClient"] = None
 
-
-def get_supabase() -> Optional["SupabaseClient"]:
+class SupabaseClientPool:
     """
-    Get Supabase client (singleton pattern)
-    Creates client once and reuses it
-    Returns None in mock mode or if Supabase is not configured
+    Pool of long-lived Supabase clients for one API key.
+
+    Each client owns an HTTP/2 keep-alive session, so reusing clients
+    reuses connections and TLS sessions. Clients are either borrowed
+    exclusively with lease() (for worker threads) or shared with get()
+    (for callers that never hand them back). The shared client is pinned:
+    it counts as in use and is only closed with the pool. Leased clients
+    idle for longer than idle_timeout are closed, keeping at least one
+    warm client.
     """
-    global _supabase_client
 
-    if not SUPABASE_AVAILABLE or settings.MOCK_MODE:
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_size: int = 8,
+        idle_timeout: float = 300.0,
+        acquire_timeout: float = 10.0,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 60.0,
+        http_timeout: float = 10.0,
+    ):
+        self.url = url
+        self.key = key
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.http_timeout = http_timeout
+
+        self._idle: Deque[Tuple["SupabaseClient", float]] = deque()
+        self._shared: Optional["SupabaseClient"] = None
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.waits = 0
+        self.timeouts = 0
+
+    def _create(self) -> "SupabaseClient":
+        options = ClientOptions(
+            auto_refresh_token=False,
+            persist_session=False,
+            postgrest_client_timeout=self.http_timeout,
+        )
+        client = create_client(self.url, self.key, options=options)  # type: ignore
+
+        # Replace the default PostgREST session with one tuned for keep-alive
+        default_session = client.postgrest.session
+        client.postgrest.session = PostgrestSession(
+            base_url=default_session.base_url,
+            headers=default_session.headers,
+            timeout=self.http_timeout,
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        )
+        default_session.close()
+        return client
+
+    @staticmethod
+    def _close_client(client: "SupabaseClient") -> None:
+        try:
+            client.postgrest.aclose()
+            client.auth.close()
+        except Exception:
+            pass
+
+    def _evict_idle_locked(self) -> List["SupabaseClient"]:
+        """Pop clients idle past idle_timeout (oldest first), keeping one"""
+        evicted = []
+        cutoff = time.monotonic() - self.idle_timeout
+        while len(self._idle) > 1 and self._idle[0][1] < cutoff:
+            client, _ = self._idle.popleft()
+            self._size -= 1
+            self.evictions += 1
+            evicted.append(client)
+        return evicted
+
+    def acquire(self) -> "SupabaseClient":
+        """
+        Check out a client, creating one if the pool is below max_size.
+
+        Blocks (up to acquire_timeout) when every client is checked out, so
+        call it from a worker thread, not the event loop.
+
+        Raises:
+            TimeoutError: If no client became available in time
+            RuntimeError: If the pool has been closed
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Supabase client pool is closed")
+                if self._idle:
+                    # Most recently used first: its connections are warmest
+                    client, _ = self._idle.pop()
+                    self.hits += 1
+                    return client
+                if self._size < self.max_size:
+                    self._size += 1
+                    self.misses += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise TimeoutError("Timed out waiting for a Supabase client")
+                self.waits += 1
+                self._cond.wait(remaining)
+
+        try:
+            return self._create()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, client: "SupabaseClient") -> None:
+        """Return a checked-out client to the pool"""
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                evicted = [client]
+            else:
+                self._idle.append((client, time.monotonic()))
+                evicted = self._evict_idle_locked()
+                self._cond.notify()
+
+        for stale in evicted:
+            self._close_client(stale)
+
+    @contextmanager
+    def lease(self) -> Iterator["SupabaseClient"]:
+        """Check out a client for the duration of a with-block"""
+        client = self.acquire()
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def get(self) -> "SupabaseClient":
+        """
+        Get the shared client, checking one out for good on first use.
+
+        The underlying HTTP sessions are thread-safe, so the shared client
+        can serve concurrent callers. Callers never hand it back, so it is
+        kept out of the idle set and never evicted while the pool is open.
+        """
+        with self._cond:
+            if self._shared is not None:
+                self.hits += 1
+                return self._shared
+
+        client = self.acquire()
+        with self._cond:
+            if self._shared is None and not self._closed:
+                self._shared = client
+                return client
+            shared = self._shared
+        # Another caller pinned a client first (or the pool closed meanwhile)
+        self.release(client)
+        return shared if shared is not None else client
+
+    def close(self) -> None:
+        """Close all idle clients and the shared one; checked-out clients are closed on release"""
+        with self._cond:
+            self._closed = True
+            idle = [client for client, _ in self._idle]
+            self._idle.clear()
+            if self._shared is not None:
+                idle.append(self._shared)
+                self._shared = None
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for client in idle:
+            self._close_client(client)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "shared": int(self._shared is not None),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+            }
+
+
+# Global client pools, keyed by "anon" / "service"
+_pools: Dict[str, SupabaseClientPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(kind: str) -> str:
+    return settings.SUPABASE_SERVICE_KEY if kind == "service" else settings.SUPABASE_KEY
+
+
+def get_supabase_pool(admin: bool = False) -> Optional[SupabaseClientPool]:
+    """
+    Get the client pool for the anon key, or the service key if admin=True.
+    Returns None if Supabase is not available or not configured.
+    """
+    if not SUPABASE_AVAILABLE:
         return None
 
-    if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+    kind = "service" if admin else "anon"
+    pool = _pools.get(kind)
+    if pool is not None:
+        return pool
+
+    key = _pool_key(kind)
+    if not settings.SUPABASE_URL or not key:
         return None
 
-    if _supabase_client is None:
-        try:
-            _supabase_client = create_client(  # type: ignore
+    with _pools_lock:
+        pool = _pools.get(kind)
+        if pool is None:
+            pool = SupabaseClientPool(
                 settings.SUPABASE_URL,
-                settings.SUPABASE_KEY
+                key,
+                max_size=settings.SUPABASE_POOL_MAX_SIZE,
+                idle_timeout=settings.SUPABASE_POOL_IDLE_TIMEOUT_SECONDS,
+                acquire_timeout=settings.SUPABASE_POOL_ACQUIRE_TIMEOUT_SECONDS,
+                max_keepalive=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.SUPABASE_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+                http_timeout=settings.SUPABASE_HTTP_TIMEOUT_SECONDS,
             )
-        except Exception:
-            return None
+            _pools[kind] = pool
+    return pool
 
-    return _supabase_client
 
+def init_supabase_pools() -> None:
+    """Create the client pools and warm one client each (called on startup)"""
+    pools = [get_supabase_pool(admin=False)] if not settings.MOCK_MODE else []
+    pools.append(get_supabase_pool(admin=True))
 
-def get_supabase_admin() -> Optional["SupabaseClient"]:
+    for pool in pools:
+        if pool is None:
+            continue
+        try:
+            pool.get()
+        except Exception as e:
+            print(f"Supabase client pool warm-up failed: {str(e)}")
+
+
+def close_supabase_pools() -> None:
+    """Close all client pools (called on shutdown)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.close()
+
+
+def get_supabase_pool_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss and size counters for each client pool"""
+    return {kind: pool.stats for kind, pool in _pools.items()}
+
+
+def get_supabase() -> Optional["SupabaseClient"]:
     """
-    Get Supabase client with service role key (bypasses RLS)
-    Use only for admin operations
+    Get a pooled Supabase client for the anon key
     Returns None in mock mode or if Supabase is not configured
     """
-    if not SUPABASE_AVAILABLE:
+    if settings.MOCK_MODE:
         return None
 
-    if not settings.SUPABASE_URL or not settings.SUPABASE_SERVICE_KEY:
+    pool = get_supabase_pool(admin=False)
+    if pool is None:
         return None
 
     try:
-        return create_client(  # type: ignore
-            settings.SUPABASE_URL,
-            settings.SUPABASE_SERVICE_KEY
-        )
+        return pool.get()
+    except Exception:
+        return None
+
+
+def get_supabase_admin() -> Optional["SupabaseClient"]:
+    """
+    Get a pooled Supabase client with service role key (bypasses RLS)
+    Use only for admin operations
+    Returns None if Supabase is not configured
+    """
+    pool = get_supabase_pool(admin=True)
+    if pool is None:
+        return None
+
+    try:
+        return pool.get()
     except Exception:
         return None
 
 
-# Mock data storage (in-memory for development)
+T = TypeVar("T")
+
+# Blocking supabase-py calls run on a dedicated executor, with a cap on
+# in-flight queries per table so one slow table cannot take every worker
+_db_executor: Optional[ThreadPoolExecutor] = None
+_db_executor_lock = threading.Lock()
+_table_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor
+    if _db_executor is None:
+        with _db_executor_lock:
+            if _db_executor is None:
+                _db_executor = ThreadPoolExecutor(
+                    max_workers=settings.DB_EXECUTOR_WORKERS,
+                    thread_name_prefix="supabase-db"
+                )
+    return _db_executor
+
+
+def _get_table_semaphore(name: str) -> asyncio.Semaphore:
+    semaphore = _table_semaphores.get(name)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.DB_TABLE_CONCURRENCY)
+        _table_semaphores[name] = semaphore
+    return semaphore
+
+
+def shutdown_db_executor() -> None:
+    """Stop the database executor (called on shutdown)"""
+    global _db_executor
+    with _db_executor_lock:
+        executor, _db_executor = _db_executor, None
+    _table_semaphores.clear()
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def _call_with_client(pool: SupabaseClientPool, func: Callable[["SupabaseClient"], T]) -> T:
+    with pool.lease() as client:
+        return func(client)
+
+
+async def run_with_client(
+    func: Callable[["SupabaseClient"], T],
+    admin: bool = False,
+    limit_key: Optional[str] = None
+) -> T:
+    """
+    Run a blocking call against a pooled Supabase client without blocking
+    the event loop.
+
+    Args:
+        func: Called with a leased client on a database executor thread
+        admin: Use the service-key pool instead of the anon-key pool
+        limit_key: Concurrency bucket (usually the table name)
+
+    Raises:
+        RuntimeError: If Supabase is not available or not configured
+    """
+    pool = get_supabase_pool(admin=admin)
+    if pool is None:
+        raise RuntimeError("Supabase is not configured")
+
+    loop = asyncio.get_running_loop()
+    async with _get_table_semaphore(limit_key or "default"):
+        return await loop.run_in_executor(_get_db_executor(), _call_with_client, pool, func)
+
+
+async def run_query(table: str, build: Callable[[Any], Any], admin: bool = False) -> Any:
+    """
+    Build and execute a PostgREST query on a database executor thread.
+
+    Usage:
+        response = await run_query("bills", lambda q: q.select("*").eq("user_id", user_id))
+
+    Args:
+        table: Table name; also the concurrency bucket
+        build: Receives client.table(table) and returns the query to execute
+        admin: Use the service-key pool (bypasses RLS)
+
+    The rows in response.data have their timestamp columns decoded to
+    aware UTC datetimes (see app.core.timestamps).
+    """
+    def execute(client: "SupabaseClient") -> Any:
+        response = build(client.table(table)).execute()
+        # Rows enter the data layer here: decode timestamps once, off the event loop
+        decode_rows(response.data, table)
+        return response
+
+    return await run_with_client(execute, admin=admin, limit_key=table)
+
+
+# Mock data storage (in-memory for development), indexed so lookups stay
+# O(1) with load-rehearsal volumes of seeded rows
 mock_db = {
-    "users": {},
-    "bills": [],
-    "grievances": [],
-    "transactions": [],
+    "users": IndexedTable(indexes=["email", "phone"]),
+    "bills": IndexedTable(
+        indexes=["user_id", ("user_id", "status")],
+        range_indexes=[(("user_id", "status"), "due_date")]
+    ),
+    "grievances": IndexedTable(indexes=["user_id", "ticket_id", ("user_id", "status")]),
+    "transactions": IndexedTable(indexes=["user_id", "order_id", ("user_id", "status")]),
+    "meter_readings": IndexedTable(indexes=["user_id", ("user_id", "service_type")]),
 }
@@ -0,0 +1,98 @@
+"""Idempotency - Replay and coalesce retried requests by Idempotency-Key
+
+A client that retries a request with the same Idempotency-Key gets the
+result of the first attempt instead of running it again. Completed
+results are kept in a bounded LRU+TTL cache; a retry that arrives while
+the first attempt is still running waits on it instead of starting a
+second one. Failed attempts are not remembered, so they can be retried.
+"""
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class IdempotencyKeyConflict(Exception):
+    """The key was already used for a request with a different payload"""
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable digest of a request payload, to detect a key reused for a different request"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Completed results by key (bounded, TTL-evicted) plus in-flight attempts.
+
+    Usage:
+        result, replayed = await store.run((user_id, key), fingerprint, create)
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._results = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._in_flight: Dict[Hashable, Tuple[str, "asyncio.Future[Any]"]] = {}
+        self.coalesced = 0
+
+    async def run(
+        self,
+        key: Hashable,
+        fingerprint: str,
+        func: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Run `func` once per key.
+
+        Returns:
+            (result, True if it came from an earlier or concurrent attempt)
+
+        Raises:
+            IdempotencyKeyConflict: If the key was used with a different fingerprint
+        """
+        stored = self._results.get(key)
+        if stored is not None:
+            stored_fingerprint, result = stored
+            if stored_fingerprint != fingerprint:
+                raise IdempotencyKeyConflict()
+            return result, True
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            in_flight_fingerprint, future = in_flight
+            if in_flight_fingerprint != fingerprint:
+                raise IdempotencyKeyConflict()
+            self.coalesced += 1
+            # shield: a cancelled waiter must not cancel the shared attempt
+            return await asyncio.shield(future), True
+
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        # Consume the exception so a failure nobody waited on is not reported as unretrieved
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight[key] = (fingerprint, future)
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._in_flight[key]
+
+        self._results.set(key, (fingerprint, result))
+        future.set_result(result)
+        return result, False
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {**self._results.stats, "in_flight": len(self._in_flight), "coalesced": self.coalesced}
+
+
+payment_idempotency = IdempotencyStore(
+    maxsize=settings.IDEMPOTENCY_MAX_KEYS,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS
+)
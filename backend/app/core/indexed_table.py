@@ -0,0 +1,238 @@
+"""Indexed Table - In-memory row store with hash indexes
+
+Backs the mock database. Rows are plain dicts keyed by primary key, and
+every declared index maps a column value (or a tuple of values for a
+composite index) to the rows holding it, so lookups are O(1) instead of a
+scan over the whole table. Range indexes additionally keep each bucket of
+a hash index sorted by one column, for ordered range queries. Writes must
+go through insert/update/delete to keep the indexes consistent.
+"""
+import bisect
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+IndexKey = Union[str, Tuple[str, ...]]
+RangeIndexKey = Tuple[IndexKey, str]
+
+
+def _columns(index: IndexKey) -> Tuple[str, ...]:
+    return index if isinstance(index, tuple) else (index,)
+
+
+def _sort_value(entry: Tuple[Any, Hashable]) -> Any:
+    return entry[0]
+
+
+class IndexedTable:
+    """
+    Dict-of-rows table with single-column and composite hash indexes.
+
+    Usage:
+        bills = IndexedTable(
+            indexes=["user_id", ("user_id", "status")],
+            range_indexes=[(("user_id", "status"), "due_date")]
+        )
+        bills.insert({"id": "b1", "user_id": "u1", "status": "PENDING", "due_date": "2024-01-31"})
+        bills.find(("user_id", "status"), ("u1", "PENDING"))
+        bills.find_range(("user_id", "status"), ("u1", "PENDING"), "due_date", upper="2024-02-07")
+    """
+
+    def __init__(
+        self,
+        primary_key: str = "id",
+        indexes: Sequence[IndexKey] = (),
+        range_indexes: Sequence[RangeIndexKey] = ()
+    ):
+        self.primary_key = primary_key
+        self._rows: Dict[Hashable, Dict[str, Any]] = {}
+        # index -> indexed value -> {primary key: row}; inner dicts keep insertion order
+        self._indexes: Dict[IndexKey, Dict[Hashable, Dict[Hashable, Dict[str, Any]]]] = {
+            index: {} for index in indexes
+        }
+        # (index, column) -> indexed value -> sorted [(column value, primary key)];
+        # rows with no value in the column are left out
+        self._range_indexes: Dict[RangeIndexKey, Dict[Hashable, List[Tuple[Any, Hashable]]]] = {
+            key: {} for key in range_indexes
+        }
+
+    @staticmethod
+    def _index_value(index: IndexKey, row: Dict[str, Any]) -> Hashable:
+        if isinstance(index, tuple):
+            return tuple(row.get(column) for column in index)
+        return row.get(index)
+
+    def _add_to_indexes(self, pk: Hashable, row: Dict[str, Any]) -> None:
+        for index, buckets in self._indexes.items():
+            buckets.setdefault(self._index_value(index, row), {})[pk] = row
+
+    def _remove_from_indexes(self, pk: Hashable, row: Dict[str, Any]) -> None:
+        for index, buckets in self._indexes.items():
+            value = self._index_value(index, row)
+            bucket = buckets.get(value)
+            if bucket is not None:
+                bucket.pop(pk, None)
+                if not bucket:
+                    del buckets[value]
+
+    def _add_to_range_index(self, key: RangeIndexKey, pk: Hashable, row: Dict[str, Any]) -> None:
+        index, column = key
+        if row.get(column) is not None:
+            entries = self._range_indexes[key].setdefault(self._index_value(index, row), [])
+            bisect.insort(entries, (row[column], pk))
+
+    def _remove_from_range_index(self, key: RangeIndexKey, pk: Hashable, row: Dict[str, Any]) -> None:
+        index, column = key
+        if row.get(column) is None:
+            return
+        value = self._index_value(index, row)
+        entries = self._range_indexes[key].get(value)
+        if entries:
+            position = bisect.bisect_left(entries, (row[column], pk))
+            if position < len(entries) and entries[position] == (row[column], pk):
+                del entries[position]
+            if not entries:
+                del self._range_indexes[key][value]
+
+    def insert(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert a row (stored as-is, not copied) and return it.
+
+        Raises:
+            ValueError: If the primary key is missing or already present
+        """
+        pk = row.get(self.primary_key)
+        if pk is None:
+            raise ValueError(f"Row is missing primary key '{self.primary_key}'")
+        if pk in self._rows:
+            raise ValueError(f"Duplicate primary key: {pk}")
+
+        self._rows[pk] = row
+        self._add_to_indexes(pk, row)
+        for key in self._range_indexes:
+            self._add_to_range_index(key, pk, row)
+        return row
+
+    def get(self, pk: Hashable) -> Optional[Dict[str, Any]]:
+        """Get a row by primary key"""
+        return self._rows.get(pk)
+
+    def find(self, index: IndexKey, value: Hashable) -> List[Dict[str, Any]]:
+        """
+        Get all rows whose indexed column(s) equal `value`, in insertion order.
+        For a composite index pass a tuple of values.
+
+        Raises:
+            KeyError: If `index` was not declared
+        """
+        bucket = self._indexes[index].get(value)
+        return list(bucket.values()) if bucket else []
+
+    def find_one(self, index: IndexKey, value: Hashable) -> Optional[Dict[str, Any]]:
+        """Get the first row matching an index value, or None"""
+        bucket = self._indexes[index].get(value)
+        return next(iter(bucket.values())) if bucket else None
+
+    def find_range(
+        self,
+        index: IndexKey,
+        value: Hashable,
+        column: str,
+        lower: Any = None,
+        upper: Any = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the rows matching an index value whose `column` lies within
+        [lower, upper] (either bound optional), ordered by `column`.
+
+        Raises:
+            KeyError: If (index, column) was not declared as a range index
+        """
+        entries = self._range_indexes[(index, column)].get(value)
+        if not entries:
+            return []
+        start = 0 if lower is None else bisect.bisect_left(entries, lower, key=_sort_value)
+        end = len(entries) if upper is None else bisect.bisect_right(entries, upper, lo=start, key=_sort_value)
+        return [self._rows[pk] for _, pk in entries[start:end]]
+
+    def count(self, index: IndexKey, value: Hashable) -> int:
+        """Number of rows matching an index value"""
+        bucket = self._indexes[index].get(value)
+        return len(bucket) if bucket else 0
+
+    def update(self, pk: Hashable, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Apply `changes` to a row in place, re-indexing only the affected indexes.
+        Returns the updated row, or None if no row has that primary key.
+        """
+        row = self._rows.get(pk)
+        if row is None:
+            return None
+        if self.primary_key in changes and changes[self.primary_key] != pk:
+            raise ValueError("Primary key cannot be updated")
+
+        affected = [
+            index for index in self._indexes
+            if any(column in changes for column in _columns(index))
+        ]
+        old_values = [(index, self._index_value(index, row)) for index in affected]
+        affected_ranges = [
+            key for key in self._range_indexes
+            if key[1] in changes or any(column in changes for column in _columns(key[0]))
+        ]
+        for key in affected_ranges:
+            self._remove_from_range_index(key, pk, row)
+
+        row.update(changes)
+
+        for key in affected_ranges:
+            self._add_to_range_index(key, pk, row)
+
+        for index, old_value in old_values:
+            buckets = self._indexes[index]
+            new_value = self._index_value(index, row)
+            if new_value == old_value:
+                continue
+            bucket = buckets.get(old_value)
+            if bucket is not None:
+                bucket.pop(pk, None)
+                if not bucket:
+                    del buckets[old_value]
+            buckets.setdefault(new_value, {})[pk] = row
+
+        return row
+
+    def update_many(self, pks: Iterable[Hashable], changes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Apply the same `changes` to every row in `pks` (duplicates and
+        missing keys are skipped) and return the updated rows.
+        """
+        updated = []
+        for pk in dict.fromkeys(pks):
+            row = self.update(pk, changes)
+            if row is not None:
+                updated.append(row)
+        return updated
+
+    def delete(self, pk: Hashable) -> Optional[Dict[str, Any]]:
+        """Remove a row by primary key and return it"""
+        row = self._rows.pop(pk, None)
+        if row is not None:
+            self._remove_from_indexes(pk, row)
+            for key in self._range_indexes:
+                self._remove_from_range_index(key, pk, row)
+        return row
+
+    def clear(self) -> None:
+        self._rows.clear()
+        for buckets in self._indexes.values():
+            buckets.clear()
+        for sorted_buckets in self._range_indexes.values():
+            sorted_buckets.clear()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self._rows.values()))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, pk: Hashable) -> bool:
+        return pk in self._rows
@@ -0,0 +1,301 @@
+"""Local JWT Verification - Supabase tokens checked against a cached JWKS
+
+Supabase signs access tokens either with the project's shared JWT secret
+(HS256) or with an asymmetric signing key published at the project's JWKS
+endpoint (ES256). Verifying locally removes the auth.get_user() round trip
+from every authenticated request; the network is only touched by the
+background refresh and when a token carries a kid we have not seen yet.
+
+Local verification needs an expected issuer, and HS256 tokens are only
+accepted with a real JWT secret - never the placeholder from the default
+settings, which anyone could sign with. Without an issuer, or without
+any usable algorithm, tokens are verified remotely instead.
+"""
+import asyncio
+import time
+from typing import Optional, Dict, Any, List
+
+import httpx
+from jose import jwt
+from jose.exceptions import JWTError
+
+from app.core.config import settings
+
+
+# JWT_SECRET values that must never verify a token: unset, the default
+# in config.py and the placeholders from .env.example and the README
+INSECURE_JWT_SECRETS = frozenset({
+    "",
+    "your-secret-key-change-in-production",
+    "your_jwt_secret_key_here_change_in_production",
+    "your_jwt_secret",
+})
+
+
+class TokenVerificationError(Exception):
+    """Raised when a token fails local verification"""
+
+
+class TokenVerificationUnavailable(Exception):
+    """Raised when a token cannot be verified right now (signing keys unreachable),
+    which says nothing about whether the token is valid"""
+
+
+def _auth_url() -> str:
+    return f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1"
+
+
+def get_jwks_url() -> str:
+    """JWKS endpoint, derived from SUPABASE_URL unless configured explicitly"""
+    if settings.JWKS_URL:
+        return settings.JWKS_URL
+    if not settings.SUPABASE_URL:
+        return ""
+    return f"{_auth_url()}/.well-known/jwks.json"
+
+
+def get_expected_issuer() -> Optional[str]:
+    """Expected `iss` claim, derived from SUPABASE_URL unless configured explicitly"""
+    if settings.JWT_ISSUER:
+        return settings.JWT_ISSUER
+    if not settings.SUPABASE_URL:
+        return None
+    return _auth_url()
+
+
+class JWKSCache:
+    """
+    In-memory copy of the JWKS signing keys, indexed by kid.
+
+    Keys are refreshed periodically by a background task. A lookup for an
+    unknown kid triggers an on-demand fetch, rate limited so that tokens
+    with random kids cannot turn into a flood of JWKS requests.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float = 600.0,
+        min_fetch_interval: float = 30.0,
+        timeout: float = 5.0,
+    ):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_fetch_interval = min_fetch_interval
+        self.timeout = timeout
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._last_fetch_attempt: Optional[float] = None
+        self._last_fetch_ok = True
+        self._lock = asyncio.Lock()
+        self._http: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self.fetch_count = 0
+
+    @property
+    def kids(self) -> List[str]:
+        return list(self._keys)
+
+    def set_keys(self, keys: List[Dict[str, Any]]) -> None:
+        """Replace the key set (keys without a kid are ignored)"""
+        self._keys = {key["kid"]: key for key in keys if key.get("kid")}
+
+    async def get_key(self, kid: str) -> Optional[Dict[str, Any]]:
+        """
+        Get signing key by kid, fetching the JWKS if the kid is unknown
+
+        Returns:
+            The key, or None if a JWKS fetched just now has no such kid
+
+        Raises:
+            TokenVerificationUnavailable: If the kid is unknown and the JWKS
+                could not be fetched, or was fetched too recently to fetch
+                again (right after a key rotation the kid may be newer than
+                our copy, so that is no verdict on the token)
+        """
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+
+        async with self._lock:
+            # Another request may have fetched the key while we waited
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+            if not self._fetch_allowed():
+                raise TokenVerificationUnavailable(f"Key {kid} not in the current JWKS, which was fetched too recently to refetch")
+            await self._fetch()
+            if not self._last_fetch_ok:
+                raise TokenVerificationUnavailable(f"JWKS unavailable, cannot look up key {kid}")
+
+        return self._keys.get(kid)
+
+    async def refresh(self) -> bool:
+        """Fetch the JWKS unconditionally"""
+        async with self._lock:
+            return await self._fetch()
+
+    def _fetch_allowed(self) -> bool:
+        if self._last_fetch_attempt is None:
+            return True
+        return time.monotonic() - self._last_fetch_attempt >= self.min_fetch_interval
+
+    async def _fetch(self) -> bool:
+        if not self.url:
+            return False
+
+        self._last_fetch_attempt = time.monotonic()
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=self.timeout)
+
+        try:
+            headers = {"apikey": settings.SUPABASE_KEY} if settings.SUPABASE_KEY else None
+            response = await self._http.get(self.url, headers=headers)
+            response.raise_for_status()
+            keys = response.json().get("keys", [])
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"JWKS fetch error: {str(e)}")
+            self._last_fetch_ok = False
+            return False
+
+        self._last_fetch_ok = True
+        self.fetch_count += 1
+        self.set_keys(keys)
+        return True
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self) -> None:
+        """Start the background refresh task (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Stop the background refresh task and close the HTTP client"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+class LocalTokenVerifier:
+    """Verifies signature, exp, aud and iss of Supabase access tokens locally"""
+
+    def __init__(
+        self,
+        jwks: JWKSCache,
+        secret: str,
+        algorithms: List[str],
+        audience: Optional[str],
+        issuer: Optional[str],
+        leeway: int = 0,
+    ):
+        self.jwks = jwks
+        self.secret = secret
+        # Shared-secret algorithms only with a secret that is actually secret
+        self.algorithms = [
+            alg for alg in algorithms
+            if alg and not (alg.startswith("HS") and secret in INSECURE_JWT_SECRETS)
+        ]
+        self.audience = audience or None
+        self.issuer = issuer or None
+        self.leeway = leeway
+
+    @property
+    def unavailable_reason(self) -> Optional[str]:
+        """Why tokens cannot be verified locally, or None if they can"""
+        if self.issuer is None:
+            return "no expected issuer (set SUPABASE_URL or JWT_ISSUER)"
+        if not self.algorithms:
+            return "no usable algorithm (HS256 needs JWT_SECRET set to the project's secret)"
+        return None
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Verify a token and return its claims.
+
+        Raises:
+            TokenVerificationError: If the token is malformed, signed with an
+                unexpected algorithm or unknown key, expired, or issued for a
+                different audience/issuer, or if local verification is
+                unavailable (see unavailable_reason).
+            TokenVerificationUnavailable: If the signing key could not be
+                fetched.
+        """
+        reason = self.unavailable_reason
+        if reason is not None:
+            raise TokenVerificationError(f"Local verification unavailable: {reason}")
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as e:
+            raise TokenVerificationError(f"Malformed token: {str(e)}")
+
+        algorithm = header.get("alg")
+        if algorithm not in self.algorithms:
+            raise TokenVerificationError(f"Unexpected signing algorithm: {algorithm}")
+
+        if algorithm.startswith("HS"):
+            key: Any = self.secret
+        else:
+            kid = header.get("kid")
+            key = await self.jwks.get_key(kid) if kid else None
+            if key is None:
+                raise TokenVerificationError(f"Unknown signing key: {kid}")
+
+        try:
+            return jwt.decode(
+                token,
+                key,
+                algorithms=[algorithm],
+                audience=self.audience,
+                issuer=self.issuer,
+                options={
+                    "require_exp": True,
+                    "require_sub": True,
+                    "require_aud": self.audience is not None,
+                    "leeway": self.leeway,
+                },
+            )
+        except JWTError as e:
+            raise TokenVerificationError(str(e))
+
+
+def claims_to_user(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Map verified token claims to the user dict returned by verify_supabase_token"""
+    user_metadata = claims.get("user_metadata") or {}
+    return {
+        "id": claims["sub"],
+        "email": claims.get("email"),
+        "full_name": user_metadata.get("full_name"),
+        "role": claims.get("role"),
+        "sub": claims["sub"],
+        "exp": claims.get("exp"),
+    }
+
+
+# Global JWKS cache and verifier
+jwks_cache = JWKSCache(
+    url=get_jwks_url(),
+    refresh_interval=settings.JWKS_REFRESH_SECONDS,
+    min_fetch_interval=settings.JWKS_MIN_FETCH_INTERVAL_SECONDS,
+    timeout=settings.JWKS_FETCH_TIMEOUT_SECONDS,
+)
+
+token_verifier = LocalTokenVerifier(
+    jwks=jwks_cache,
+    secret=settings.JWT_SECRET,
+    algorithms=[settings.JWT_ALGORITHM, settings.JWT_ALGORITHM_FALLBACK],
+    audience=settings.JWT_AUDIENCE,
+    issuer=get_expected_issuer(),
+    leeway=settings.JWT_LEEWAY_SECONDS,
+)
@@ -0,0 +1,63 @@
+"""Pagination - Keyset cursors and streamed JSON arrays for list endpoints
+
+Listings are ordered newest first on (created_at, id). A cursor is the
+(created_at, id) of the last row of a page, so the next page is "rows
+strictly before this key" - an index range scan in the database instead
+of an ever-growing OFFSET.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Tuple
+
+Cursor = Tuple[str, str]
+
+
+def cursor_key(row: Dict[str, Any]) -> Cursor:
+    """Sort key of a row in listing order"""
+    created_at = row.get("created_at")
+    if isinstance(created_at, datetime):
+        # Stored timestamps are UTC, so fixed-width ISO strings sort in time order
+        created_at = created_at.isoformat(timespec="microseconds")
+    return (str(created_at or ""), str(row.get("id") or ""))
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just past `row`"""
+    return base64.urlsafe_b64encode(json.dumps(cursor_key(row)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Both values end up in a PostgREST filter, so they are parsed - the
+    timestamp as ISO 8601, the id as a UUID - and returned in canonical
+    form rather than passed through.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        timestamp = datetime.fromisoformat(created_at)
+        row_id = str(uuid.UUID(row_id))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    timestamp = timestamp.replace(tzinfo=timezone.utc) if timestamp.tzinfo is None else timestamp.astimezone(timezone.utc)
+    return (timestamp.isoformat(timespec="microseconds"), row_id)
+
+
+async def stream_json_array(
+    rows: AsyncIterator[Dict[str, Any]],
+    encode: Callable[[Dict[str, Any]], str]
+) -> AsyncIterator[bytes]:
+    """Encode rows into a JSON array one element at a time, as they arrive"""
+    yield b"["
+    first = True
+    async for row in rows:
+        yield (encode(row) if first else "," + encode(row)).encode()
+        first = False
+    yield b"]"
+
@@ -0,0 +1,155 @@
+"""Response Cache - Pre-encoded JSON responses with ETags
+
+For endpoints whose content is the same for every caller and changes
+rarely (city data polled by kiosks), the response body is encoded once
+and kept as bytes alongside a strong ETag, together with its gzip (and
+brotli) compressed variants. A cache hit sends the bytes in the encoding
+the client accepts, or a 304 when its If-None-Match already has them.
+
+Entries are fresh for `ttl` seconds. For a further `stale_ttl` seconds a
+stale entry is still served while one background task rebuilds it
+(stale-while-revalidate); past that, the request waits for the rebuild.
+"""
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Set
+
+from fastapi import Request, Response
+
+from app.core.compression import negotiate, response_compressor
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    built_at: float
+    encoded: Dict[str, bytes]  # compressed variants by content coding
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for a response body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers `etag` (weak comparison, per RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+class ResponseCache:
+    """
+    Encoded responses by key, refreshed with stale-while-revalidate.
+
+    Usage:
+        entry = await cache.get("weather", build_weather_bytes)
+        return cache.respond(request, entry)
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[Hashable, CachedResponse] = {}
+        self._building: Dict[Hashable, "asyncio.Future[CachedResponse]"] = {}
+        self._refreshes: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.compressed_hits = 0
+        self.refresh_errors = 0
+
+    async def _build(self, key: Hashable, build: Callable[[], Awaitable[bytes]]) -> CachedResponse:
+        """Run `build` once for concurrent callers and store the result"""
+        future = self._building.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._building[key] = future
+        try:
+            body = await build()
+            entry = CachedResponse(body, make_etag(body), time.monotonic(), response_compressor.precompress(body))
+            self._entries[key] = entry
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here, so an unawaited failure is not logged
+            raise
+        finally:
+            del self._building[key]
+
+    async def _refresh(self, key: Hashable, build: Callable[[], Awaitable[bytes]]) -> None:
+        try:
+            await self._build(key, build)
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"Response cache refresh error for {key}: {str(e)}")
+
+    async def get(self, key: Hashable, build: Callable[[], Awaitable[bytes]]) -> CachedResponse:
+        """The cached response for `key`, building or refreshing it as needed"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.built_at
+            if age < self.ttl:
+                self.hits += 1
+                return entry
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                if key not in self._building:
+                    task = asyncio.create_task(self._refresh(key, build))
+                    self._refreshes.add(task)
+                    task.add_done_callback(self._refreshes.discard)
+                return entry
+
+        self.misses += 1
+        return await self._build(key, build)
+
+    def respond(self, request: Request, entry: CachedResponse) -> Response:
+        """The cached body in the negotiated encoding, or 304 if the client already has this version"""
+        encoding = negotiate(request.headers.get("accept-encoding"))
+        body = entry.encoded.get(encoding)
+        # Each encoding is a different representation, so it gets its own strong ETag
+        etag = entry.etag if body is None else entry.etag[:-1] + "-" + encoding + '"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={int(self.ttl)}, stale-while-revalidate={int(self.stale_ttl)}",
+            "Vary": "Accept-Encoding"
+        }
+        if_none_match = request.headers.get("if-none-match")
+        if etag_matches(if_none_match, etag) or etag_matches(if_none_match, entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        if body is None:
+            return Response(content=entry.body, media_type="application/json", headers=headers)
+        self.compressed_hits += 1
+        headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or all of them"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "compressed_hits": self.compressed_hits,
+            "refresh_errors": self.refresh_errors
+        }
@@ -1,30 +1,72 @@
 """Security - JWT Token Verification using Supabase"""
+import hashlib
+import time
 from typing import Optional, Dict, Any
+from fastapi import Header, HTTPException, status
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.database import get_supabase_admin
+from app.core.database import get_supabase_pool, run_with_client
+from app.core.jwks import token_verifier, claims_to_user, TokenVerificationError, TokenVerificationUnavailable
+
+# auth.get_user() statuses that reject the token itself; other failures
+# (timeouts, 5xx, no client) say nothing about the token
+_REJECTED_TOKEN_STATUSES = (400, 401, 403, 404)
 
 
 async def verify_supabase_token(token: str) -> Optional[Dict[str, Any]]:
     """
-    Verify a Supabase JWT token using Supabase's built-in verification.
+    Verify a Supabase JWT token.
 
-    This uses Supabase's auth.get_user() method which properly validates
-    the token signature and expiration using Supabase's JWKS.
+    With JWT_LOCAL_VERIFICATION enabled (the default) the signature, exp,
+    aud and iss are checked locally against the JWT secret (HS256) or the
+    cached JWKS (ES256). Otherwise, when local verification is not
+    configured safely (no issuer, placeholder secret), or when the
+    signing key cannot be looked up right now, the token is sent to
+    Supabase's auth.get_user() endpoint.
 
     Args:
         token: The JWT access token from Supabase
 
     Returns:
-        The user object if valid, None otherwise
+        The user object if valid, None if the token was rejected
+
+    Raises:
+        TokenVerificationUnavailable: If the token could not be checked
+            (signing keys or Supabase unreachable)
     """
-    try:
-        supabase = get_supabase_admin()
-        if not supabase:
-            print("Supabase client not available")
+    if settings.JWT_LOCAL_VERIFICATION and token_verifier.unavailable_reason is None:
+        try:
+            claims = await token_verifier.verify(token)
+        except TokenVerificationError as e:
+            # Token is invalid or expired
+            print(f"Token verification error: {str(e)}")
             return None
+        except TokenVerificationUnavailable as e:
+            # e.g. a kid from a key rotation we have not fetched yet: let Supabase decide
+            print(f"Local token verification unavailable, asking Supabase: {str(e)}")
+            return await _verify_supabase_token_remote(token)
+        return claims_to_user(claims)
+
+    return await _verify_supabase_token_remote(token)
+
+
+async def _verify_supabase_token_remote(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Verify a Supabase JWT token using Supabase's built-in verification.
+
+    This uses Supabase's auth.get_user() method, which costs a network
+    round trip per call.
+    """
+    if get_supabase_pool(admin=True) is None:
+        raise TokenVerificationUnavailable("Supabase client not available")
 
+    try:
         # Use Supabase's built-in token verification
-        response = supabase.auth.get_user(token)
+        response = await run_with_client(
+            lambda supabase: supabase.auth.get_user(token),
+            admin=True,
+            limit_key="auth"
+        )
 
         if response.user:
             return {
@@ -38,11 +80,104 @@ async def verify_supabase_token(token: str) -> Optional[Dict[str, Any]]:
         return None
 
     except Exception as e:
+        if getattr(e, "status", None) not in _REJECTED_TOKEN_STATUSES:
+            raise TokenVerificationUnavailable(str(e))
         # Token is invalid or expired
         print(f"Token verification error: {str(e)}")
         return None
 
 
+# Verified users keyed by token digest, plus a short-lived record of tokens
+# that failed verification so a bad token cannot hammer the verifier
+_token_cache = TTLCache(
+    maxsize=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS
+)
+_failed_token_cache = TTLCache(
+    maxsize=settings.AUTH_NEGATIVE_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_NEGATIVE_CACHE_TTL_SECONDS
+)
+
+
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+async def authenticate_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Verify a token through the token cache.
+
+    Successful verifications are cached until the cache TTL or the token's
+    own expiry, whichever comes first. Rejected tokens are cached for
+    AUTH_NEGATIVE_CACHE_TTL_SECONDS; a verifier that could not reach its
+    keys or Supabase is not, so an outage does not outlast itself.
+
+    Args:
+        token: The JWT access token from Supabase
+
+    Returns:
+        The user object if valid, None otherwise
+    """
+    digest = _token_digest(token)
+
+    user_data = _token_cache.get(digest)
+    if user_data is not None:
+        return user_data
+
+    if digest in _failed_token_cache:
+        return None
+
+    try:
+        user_data = await verify_supabase_token(token)
+    except TokenVerificationUnavailable as e:
+        print(f"Token verification unavailable: {str(e)}")
+        return None
+    if not user_data:
+        _failed_token_cache.set(digest, True)
+        return None
+
+    ttl = settings.AUTH_CACHE_TTL_SECONDS
+    if user_data.get("exp"):
+        ttl = min(ttl, user_data["exp"] - time.time())
+    if ttl > 0:
+        _token_cache.set(digest, user_data, ttl=ttl)
+
+    return user_data
+
+
+def get_token_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters for the verified and failed token caches"""
+    return {
+        "verified": _token_cache.stats,
+        "failed": _failed_token_cache.stats,
+    }
+
+
+async def get_current_user_id(authorization: Optional[str] = Header(None)) -> str:
+    """
+    FastAPI dependency - authenticated user ID from the Authorization header.
+
+    The token is passed as: Bearer <token>
+
+    Raises:
+        HTTPException: 401 if the header is missing or the token is invalid
+    """
+    if not authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+
+    token = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else authorization
+    user_id = await get_user_id_from_token(token)
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+    return user_id
+
+
 async def get_user_id_from_token(token: str) -> Optional[str]:
     """
     Extract user ID from Supabase JWT token.
@@ -53,7 +188,7 @@ async def get_user_id_from_token(token: str) -> Optional[str]:
     Returns:
         The user ID if valid, None otherwise
     """
-    user_data = await verify_supabase_token(token)
+    user_data = await authenticate_token(token)
     if not user_data:
         return None
 
@@ -70,7 +205,7 @@ async def get_email_from_token(token: str) -> Optional[str]:
     Returns:
         The email if present, None otherwise
     """
-    user_data = await verify_supabase_token(token)
+    user_data = await authenticate_token(token)
     if not user_data:
         return None
 
@@ -105,7 +240,8 @@ def create_access_token(data: Dict[str, Any]) -> str:
 def verify_token(token: str) -> Optional[str]:
     """
     Verify token synchronously and return user_id if valid.
-    This is a synchronous wrapper for backward compatibility.
+    This is a synchronous wrapper for backward compatibility; it spins up a
+    thread and event loop per call. Routes use get_current_user_id instead.
     """
     import asyncio
     try:
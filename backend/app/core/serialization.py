@@ -0,0 +1,50 @@
+"""Serialization - Fast JSON responses for trusted data
+
+By default FastAPI takes a handler's return value, dumps it, validates
+it again against the response_model, converts it with jsonable_encoder
+and only then encodes it. Models the handler already built from rows of
+our own database need none of that: a route opts out by returning
+model_response() or json_response(), which encode straight to bytes
+(pydantic-core for models, orjson for plain data). The route keeps its
+response_model, so the OpenAPI schema is unchanged.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Fallback for types orjson does not encode natively"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def dumps(content: Any) -> bytes:
+    """JSON-encode plain data (dicts, lists, datetimes, models) with orjson"""
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+@lru_cache(maxsize=None)
+def _adapter(model_type: Any) -> TypeAdapter:
+    return TypeAdapter(model_type)
+
+
+def encode_model(value: Any, model_type: Any) -> bytes:
+    """JSON-encode `value` as `model_type` (e.g. List[BillResponse]) without validating it"""
+    return _adapter(model_type).dump_json(value)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """A JSON response for plain data, skipping response-model revalidation"""
+    return Response(content=dumps(content), status_code=status_code, headers=headers, media_type="application/json")
+
+
+def model_response(value: Any, model_type: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """A JSON response for models of `model_type`, skipping response-model revalidation"""
+    return Response(content=encode_model(value, model_type), headers=headers, media_type="application/json")
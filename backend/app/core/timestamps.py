@@ -0,0 +1,144 @@
+"""Timestamps - Decode stored timestamps once, into aware UTC datetimes
+
+Supabase returns timestamps as ISO strings ("2024-01-31",
+"2024-01-31T10:00:00.123+00:00"), and the mock store used to hold naive
+datetime.now().isoformat() strings. Rows are now decoded as they enter
+the data layer - run_query() for Supabase responses, the write paths for
+the mock store - so everything downstream compares and serializes
+datetimes without parsing strings or mixing naive and aware values.
+DATE columns become datetime.date: a due date is a calendar day, not an
+instant, and must not move when a client converts it to local time.
+
+The same strings come back again and again (re-reads after a cache
+expiry, pages of a listing, bills sharing a due date), so parsing is
+memoized.
+"""
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+# TIMESTAMPTZ and DATE columns decoded when a row is read, per table
+# (supabase/schema.sql); tables not listed get every known column checked
+TABLE_TIMESTAMP_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "users": ("created_at", "updated_at", "last_login"),
+    "bills": ("created_at", "updated_at", "paid_at"),
+    "grievances": ("created_at", "updated_at", "resolved_at", "enriched_at"),
+    "transactions": ("created_at", "verified_at"),
+    "city_alerts": ("created_at", "expires_at"),
+    "meter_readings": ("created_at", "verified_at"),
+}
+TABLE_DATE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "bills": ("due_date", "billing_period_start", "billing_period_end"),
+    "meter_readings": ("reading_date",),
+}
+TIMESTAMP_COLUMNS: Tuple[str, ...] = tuple(sorted({
+    column for columns in TABLE_TIMESTAMP_COLUMNS.values() for column in columns
+}))
+DATE_COLUMNS: Tuple[str, ...] = tuple(sorted({
+    column for columns in TABLE_DATE_COLUMNS.values() for column in columns
+}))
+
+
+def utc_now() -> datetime:
+    """The current time as an aware UTC datetime (the stored form)"""
+    return datetime.now(timezone.utc)
+
+
+@lru_cache(maxsize=settings.TIMESTAMP_PARSE_CACHE_SIZE)
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parse an ISO date or datetime string into an aware UTC datetime.
+    Dates and naive datetimes are taken to be UTC.
+
+    Raises:
+        ValueError: If the string is not ISO 8601
+    """
+    parsed = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+    if parsed.tzinfo is timezone.utc:
+        return parsed
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+@lru_cache(maxsize=settings.TIMESTAMP_PARSE_CACHE_SIZE)
+def parse_date(value: str) -> date:
+    """
+    Parse an ISO date string (or the date part of a datetime string).
+
+    Raises:
+        ValueError: If the string does not start with an ISO date
+    """
+    return date.fromisoformat(value[:10])
+
+
+def to_date(value: Any) -> Optional[date]:
+    """A stored date in any form (string, date, datetime, None) as a datetime.date"""
+    if value is None or value.__class__ is date:
+        return value
+    if isinstance(value, str):
+        return parse_date(value)
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return date(value.year, value.month, value.day)
+    raise ValueError(f"Not a date: {value!r}")
+
+
+def to_datetime(value: Any) -> Optional[datetime]:
+    """A stored timestamp in any form (string, date, datetime, None) as an aware UTC datetime"""
+    if value is None or type(value) is datetime and value.tzinfo is timezone.utc:
+        return value
+    if isinstance(value, str):
+        return parse_timestamp(value)
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+    raise ValueError(f"Not a timestamp: {value!r}")
+
+
+def decode_row(
+    row: Dict[str, Any],
+    columns: Sequence[str] = TIMESTAMP_COLUMNS,
+    date_columns: Sequence[str] = DATE_COLUMNS
+) -> Dict[str, Any]:
+    """Decode a row's timestamp and date columns in place; returns the row"""
+    for column in columns:
+        value = row.get(column)
+        if value.__class__ is str:
+            row[column] = parse_timestamp(value)
+        elif value is not None and not (value.__class__ is datetime and value.tzinfo is timezone.utc):
+            row[column] = to_datetime(value)
+    for column in date_columns:
+        value = row.get(column)
+        if value.__class__ is str:
+            row[column] = parse_date(value)
+        elif value is not None and value.__class__ is not date:
+            row[column] = to_date(value)
+    return row
+
+
+def decode_rows(rows: Any, table: Optional[str] = None) -> Any:
+    """Decode every row of a query result on `table` (a list of rows, or one row)"""
+    if table in TABLE_TIMESTAMP_COLUMNS:
+        columns, date_columns = TABLE_TIMESTAMP_COLUMNS[table], TABLE_DATE_COLUMNS.get(table, ())
+    else:
+        columns, date_columns = TIMESTAMP_COLUMNS, DATE_COLUMNS
+    if isinstance(rows, list):
+        for row in rows:
+            if isinstance(row, dict):
+                decode_row(row, columns, date_columns)
+    elif isinstance(rows, dict):
+        decode_row(rows, columns, date_columns)
+    return rows
+
+
+def encode_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """A copy of a row with datetimes as ISO strings, for sending to Supabase"""
+    return {
+        column: value.isoformat() if isinstance(value, (datetime, date)) else value
+        for column, value in row.items()
+    }
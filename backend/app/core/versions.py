@@ -0,0 +1,165 @@
+"""Versions - Per-user change counters for conditional GETs
+
+Every (resource, user) pair has a version, and listings derive their
+ETag from the versions of what they show, so a client re-polling an
+unchanged listing gets a 304 before anything is read from the database.
+
+With Supabase the versions live in the data_versions table
+(supabase/migrations/008_data_versions.sql), bumped by triggers on the
+tables they describe, so every worker computes the same ETag for the
+same data. A worker reuses versions it read for `ttl` seconds, which
+bounds how long a write made elsewhere goes unseen; its own writes drop
+its copy at once. In mock mode the data lives in this process and so do
+the versions: counters prefixed with a random per-process token, so
+none is ever reused across restarts.
+"""
+import hashlib
+import itertools
+import math
+import secrets
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import get_supabase_pool, run_query
+from app.core.response_cache import etag_matches
+
+VersionKey = Tuple[str, Optional[str]]  # (resource, user_id); None for shared resources
+
+_SHARED_SCOPE = "*"  # data_versions.scope of resources without an owner
+
+
+class VersionRegistry:
+    """
+    Current version of each (resource, user_id), bumped on writes.
+
+    Usage:
+        etag = await user_versions.etag(("bills", user_id))
+        not_modified = user_versions.not_modified(request, etag)
+        if not_modified:
+            return not_modified
+        ...
+        return model_response(bills, List[BillResponse], user_versions.headers(etag))
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._versions = TTLCache(maxsize=maxsize, ttl=ttl)  # read from data_versions
+        self._local = TTLCache(maxsize=maxsize, ttl=math.inf)  # mock mode
+        self._epoch = secrets.token_hex(4)
+        self._counter = itertools.count(1)
+        self.bumps = 0
+        self.fetches = 0
+        self.fetch_errors = 0
+        self.not_modified_count = 0
+
+    @staticmethod
+    def _shared() -> bool:
+        return not settings.MOCK_MODE and get_supabase_pool(admin=True) is not None
+
+    def _new_local_version(self, key: VersionKey) -> str:
+        version = f"{self._epoch}.{next(self._counter)}"
+        self._local.set(key, version)
+        return version
+
+    def bump(self, resource: str, user_id: Optional[str] = None) -> None:
+        """Mark a resource as changed by a write made in this process"""
+        self.bumps += 1
+        key = (resource, user_id)
+        if self._shared():
+            # The table's trigger has bumped the stored version; read it again
+            self._versions.pop(key)
+        else:
+            self._new_local_version(key)
+
+    async def _load(self, keys: List[VersionKey]) -> Dict[VersionKey, str]:
+        resources = sorted({resource for resource, _ in keys})
+        scopes = sorted({user_id or _SHARED_SCOPE for _, user_id in keys})
+        response = await run_query(
+            "data_versions",
+            lambda q: q.select("resource,scope,version").in_("resource", resources).in_("scope", scopes),
+            admin=True
+        )
+        stored = {(row["resource"], row["scope"]): row["version"] for row in response.data or []}
+        # Never written since the versions table was created: version 0
+        return {
+            (resource, user_id): str(stored.get((resource, user_id or _SHARED_SCOPE), 0))
+            for resource, user_id in keys
+        }
+
+    async def get(self, *keys: VersionKey) -> Optional[List[str]]:
+        """Current versions of `keys`, or None if they could not be read"""
+        if not self._shared():
+            return [self._local.get(key) or self._new_local_version(key) for key in keys]
+
+        versions = {key: self._versions.get(key) for key in keys}
+        missing = [key for key, version in versions.items() if version is None]
+        if missing:
+            bumps = self.bumps
+            self.fetches += 1
+            try:
+                loaded = await self._load(missing)
+            except Exception as e:
+                self.fetch_errors += 1
+                print(f"Error loading data versions: {str(e)}")
+                return None
+            versions.update(loaded)
+            # A write in between may have bumped what was just read; don't keep it
+            if self.bumps == bumps:
+                for key, version in loaded.items():
+                    self._versions.set(key, version)
+        return [versions[key] for key in keys]
+
+    async def etag(self, *keys: VersionKey) -> Optional[str]:
+        """
+        Weak ETag over the current versions of `keys`, or None when the
+        versions cannot be read (the response then carries no ETag).
+
+        Weak, because the same version is sent compressed or not: the
+        compression middleware would otherwise weaken it on compressed
+        200s only, and a 304 would not repeat the validator of its 200.
+        The keys are part of it, so two users' listings never share one.
+
+        Take it before loading the data it describes: a write landing in
+        between then yields a newer ETag on the next request, never an
+        old ETag on new data.
+        """
+        versions = await self.get(*keys)
+        if versions is None:
+            return None
+        tagged = "|".join(
+            f"{resource}:{user_id or _SHARED_SCOPE}:{version}"
+            for (resource, user_id), version in zip(keys, versions)
+        )
+        return 'W/"' + hashlib.blake2b(tagged.encode(), digest_size=12).hexdigest() + '"'
+
+    def headers(self, etag: Optional[str]) -> Dict[str, str]:
+        """Validator headers for a per-user response tagged with `etag`"""
+        if etag is None:
+            return {"Cache-Control": "private, no-cache"}
+        return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    def not_modified(self, request: Request, etag: Optional[str]) -> Optional[Response]:
+        """A 304 response if the client's If-None-Match already has `etag`, else None"""
+        if etag is None or not etag_matches(request.headers.get("if-none-match"), etag):
+            return None
+        self.not_modified_count += 1
+        return Response(status_code=304, headers=self.headers(etag))
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "shared": self._shared(),
+            "size": len(self._versions) + len(self._local),
+            "bumps": self.bumps,
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+            "not_modified": self.not_modified_count
+        }
+
+
+user_versions = VersionRegistry(
+    maxsize=settings.USER_VERSION_MAX_ENTRIES,
+    ttl=settings.USER_VERSION_TTL_SECONDS
+)
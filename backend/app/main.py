@@ -2,19 +2,76 @@
 
 Main entry point for the FastAPI application
 """
-from fastapi import FastAPI
+import hmac
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.broadcaster import broadcaster
+from app.core.compression import CompressionMiddleware, response_compressor
 from app.core.config import settings
-from app.routers import auth, billing, grievance, city_data, payments
+from app.core.database import (
+    init_supabase_pools,
+    close_supabase_pools,
+    get_supabase_pool_stats,
+    shutdown_db_executor
+)
+from app.core.idempotency import payment_idempotency
+from app.core.jwks import jwks_cache, token_verifier
+from app.core.security import get_token_cache_stats
+from app.core.versions import user_versions
+from app.services.supabase_db import (
+    get_user_data_cache_stats,
+    get_billing_aggregate_stats,
+    get_grievance_search_stats,
+    rebuild_grievance_search
+)
+from app.services.ai_processor import keywords_watcher
+from app.services.alert_feed import alert_feed
+from app.services.enrichment import enrichment_queue
+from app.services.incident_clusters import incident_index
+from app.services.triage import triage_pool
+from app.routers import auth, billing, grievance, city_data, payments, events
 from app.routers import dashboard as dashboard_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services on startup and stop them on shutdown"""
+    init_supabase_pools()
+    if settings.GRIEVANCE_SEARCH_REBUILD_ON_STARTUP:
+        await rebuild_grievance_search(settings.GRIEVANCE_SEARCH_REBUILD_BATCH_SIZE)
+    if settings.JWT_LOCAL_VERIFICATION:
+        if token_verifier.unavailable_reason is not None:
+            print(f"Local JWT verification disabled, {token_verifier.unavailable_reason}; verifying tokens with Supabase")
+        elif jwks_cache.url:
+            jwks_cache.start()
+    enrichment_queue.start()
+    alert_feed.start()
+    keywords_watcher.start()
+
+    yield
+
+    broadcaster.close()
+    await keywords_watcher.stop()
+    await alert_feed.stop()
+    await enrichment_queue.stop()
+    await jwks_cache.stop()
+    triage_pool.shutdown()
+    shutdown_db_executor()
+    close_supabase_pools()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Unified Access for Power, Water, and Municipal Services",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -26,6 +83,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses (added last, so it wraps everything else)
+app.add_middleware(CompressionMiddleware, compressor=response_compressor)
+
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(billing.router, prefix="/api")
@@ -33,6 +93,7 @@ app.include_router(grievance.router, prefix="/api")
 app.include_router(city_data.router, prefix="/api")
 app.include_router(payments.router, prefix="/api")
 app.include_router(dashboard_router.router, prefix="/api")
+app.include_router(events.router, prefix="/api")
 
 
 @app.get("/")
@@ -56,11 +117,35 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics(authorization: Optional[str] = Header(None)):
+    """Internal counters - connection pools, caches and queues (needs METRICS_TOKEN)"""
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not settings.METRICS_TOKEN or not hmac.compare_digest((authorization or "").encode(), expected.encode()):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return {
+        "supabase_pools": get_supabase_pool_stats(),
+        "auth_token_cache": get_token_cache_stats(),
+        "user_data_cache": get_user_data_cache_stats(),
+        "user_versions": user_versions.stats,
+        "billing_aggregates": get_billing_aggregate_stats(),
+        "payment_idempotency": payment_idempotency.stats,
+        "grievance_enrichment": enrichment_queue.stats,
+        "incident_clusters": incident_index.stats,
+        "grievance_search": get_grievance_search_stats(),
+        "city_data_cache": city_data.city_data_cache.stats,
+        "compression": response_compressor.stats,
+        "events": broadcaster.stats
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        # Event streams stay open; don't wait on them indefinitely at shutdown
+        timeout_graceful_shutdown=10
     )
@@ -198,6 +198,10 @@ class GrievanceResponse(BaseModel):
     status: GrievanceStatus
     priority: GrievancePriority
     estimated_resolution: Optional[str] = None
+    consumer_id: Optional[str] = None
+    location: Optional[str] = None
+    phone: Optional[str] = None
+    incident_id: Optional[str] = None
     created_at: datetime
     resolved_at: Optional[datetime] = None
 
@@ -205,6 +209,50 @@ class GrievanceResponse(BaseModel):
         from_attributes = True
 
 
+class GrievanceSearchResult(GrievanceResponse):
+    """Grievance matching a search, with its BM25 relevance score"""
+    score: float
+
+
+class IncidentResponse(BaseModel):
+    """Active incident: a cluster of near-duplicate grievances"""
+    incident_id: str
+    category: GrievanceCategory
+    location: Optional[str] = None
+    size: int
+    first_seen: datetime
+    last_seen: datetime
+    ticket_ids: List[str] = []  # the caller's own grievances in the incident
+
+
+class TriageItem(BaseModel):
+    """One grievance description to triage"""
+    description: str
+    category: GrievanceCategory = GrievanceCategory.OTHER
+
+
+class TriageRequest(BaseModel):
+    """Batch Triage Request"""
+    items: List[TriageItem]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"description": "Sparks from the meter box in Sector 4", "category": "METER_PROBLEM"},
+                    {"description": "Bill is higher than usual", "category": "BILLING_ISSUE"}
+                ]
+            }
+        }
+
+
+class TriageResult(BaseModel):
+    """Triage outcome for one description"""
+    priority: GrievancePriority
+    estimated_resolution: str
+    entities: dict
+
+
 # ==========================================
 # Payment Models
 # ==========================================
@@ -7,11 +7,9 @@ This router handles:
 Note: Registration and login are handled client-side using Supabase JS client.
 See: frontend/landing/src/lib/supabase.ts
 """
-from datetime import datetime
-from typing import Optional
-from fastapi import APIRouter, HTTPException, Header, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.models import UserResponse, ApiResponse
-from app.core.security import get_user_id_from_token
+from app.core.security import get_current_user_id
 from app.services.supabase_db import get_user_by_id
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -19,7 +17,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
-    authorization: Optional[str] = Header(None)
+    user_id: str = Depends(get_current_user_id)
 ):
     """
     Get current user from Supabase JWT token.
@@ -27,30 +25,10 @@ async def get_current_user(
     The token is passed in the Authorization header as: Bearer <token>
 
     This endpoint:
-    1. Verifies the Supabase JWT token using Supabase's auth.get_user()
+    1. Verifies the Supabase JWT token (locally, through the token cache)
     2. Extracts the user ID from the token
     3. Fetches the user profile from public.users table
     """
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
-
-    # Extract token
-    if authorization.startswith("Bearer "):
-        token = authorization.split(" ")[1]
-    else:
-        token = authorization
-
-    # Verify Supabase JWT token and get user_id
-    user_id = await get_user_id_from_token(token)
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
     # Get user from database (public.users table)
     user = await get_user_by_id(user_id)
     if not user:
@@ -68,7 +46,7 @@ async def get_current_user(
         email=user.get("email"),
         city_zone=user.get("city_zone"),
         user_type=user.get("user_type", "consumer"),
-        created_at=datetime.fromisoformat(user["created_at"])
+        created_at=user["created_at"]
     )
 
 
@@ -1,39 +1,30 @@
 """Billing Router - Electricity, Water, Gas bills with Supabase"""
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Header, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from app.models import (
     BillResponse,
     BillSummary,
 )
-from app.core.security import verify_token
+from app.core.config import settings
+from app.core.pagination import stream_json_array
+from app.core.security import get_current_user_id
+from app.core.serialization import model_response
+from app.core.timestamps import utc_now
+from app.core.versions import user_versions
 from app.services.supabase_db import (
     get_user_bills,
-    get_user_pending_bills,
+    get_bill_by_id,
+    get_user_billing_aggregate,
+    get_user_rows_page,
+    iter_user_rows,
     update_bill_status
 )
 
 router = APIRouter(prefix="/billing", tags=["Billing"])
 
 
-async def _get_user_from_token(authorization: Optional[str]) -> str:
-    """Extract user ID from authorization header"""
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
-
-    token = authorization.split(" ")[1] if authorization.startswith("Bearer ") else authorization
-    user_id = verify_token(token)
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    return user_id
-
-
 def _bill_to_response(bill: dict) -> BillResponse:
     """Convert database bill to response model"""
     return BillResponse(
@@ -42,78 +33,91 @@ def _bill_to_response(bill: dict) -> BillResponse:
         service_type=bill["service_type"],
         bill_number=bill.get("bill_number"),
         amount_due=float(bill["amount_due"]),
-        due_date=datetime.fromisoformat(bill["due_date"].replace("Z", "+00:00")) if isinstance(bill["due_date"], str) else bill["due_date"],
+        # A calendar day: sent as naive midnight, so clients never shift it into another day
+        due_date=datetime.combine(bill["due_date"], time.min),
         units_consumed=float(bill["units_consumed"]) if bill.get("units_consumed") else None,
         status=bill["status"],
-        created_at=datetime.fromisoformat(bill["created_at"].replace("Z", "+00:00")) if isinstance(bill["created_at"], str) else bill["created_at"]
+        created_at=bill["created_at"]
     )
 
 
 @router.get("/bills", response_model=List[BillResponse])
-async def get_bills(authorization: Optional[str] = Header(None)):
+async def get_bills(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    user_id: str = Depends(get_current_user_id)
+):
     """
     Get all bills for the authenticated user
+
+    - limit/cursor: one page, newest first; X-Next-Cursor holds the next cursor
+    - stream: the full history, encoded as rows are fetched
+
+    Responses carry an ETag from the user's bills version; a matching
+    If-None-Match is answered with 304 without loading the data.
     """
-    user_id = await _get_user_from_token(authorization)
+    etag = await user_versions.etag(("bills", user_id))
+    not_modified = user_versions.not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    if stream:
+        rows = iter_user_rows("bills", user_id, settings.LIST_STREAM_BATCH_SIZE)
+        return StreamingResponse(
+            stream_json_array(rows, lambda bill: _bill_to_response(bill).model_dump_json()),
+            media_type="application/json",
+            headers=user_versions.headers(etag)
+        )
+
+    if limit or cursor:
+        try:
+            bills, next_cursor = await get_user_rows_page("bills", user_id, limit or settings.LIST_PAGE_MAX_LIMIT, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        headers = user_versions.headers(etag)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return model_response([_bill_to_response(bill) for bill in bills], List[BillResponse], headers)
 
     # Get bills from database
     bills = await get_user_bills(user_id)
 
-    return [_bill_to_response(bill) for bill in bills]
+    return model_response([_bill_to_response(bill) for bill in bills], List[BillResponse], user_versions.headers(etag))
 
 
 @router.get("/summary", response_model=BillSummary)
-async def get_billing_summary(authorization: Optional[str] = Header(None)):
+async def get_billing_summary(user_id: str = Depends(get_current_user_id)):
     """
     Get aggregated billing summary
     - Total due amount
     - Pending bills count
     - Service-wise breakdown
-    - Bills due soon (within 7 days)
+    - Bills due soon (within BILLING_DUE_SOON_DAYS)
     """
-    user_id = await _get_user_from_token(authorization)
-
-    # Get user's pending bills
-    pending_bills = await get_user_pending_bills(user_id)
-
-    # Calculate total due
-    total_due = sum(float(bill["amount_due"]) for bill in pending_bills)
-
-    # Service breakdown
-    service_breakdown = {}
-    for bill in pending_bills:
-        service = bill["service_type"]
-        if service not in service_breakdown:
-            service_breakdown[service] = {"count": 0, "amount": 0}
-        service_breakdown[service]["count"] += 1
-        service_breakdown[service]["amount"] += float(bill["amount_due"])
-
-    # Find bills due soon (within 7 days)
-    seven_days_from_now = datetime.now() + timedelta(days=7)
-    due_soon = []
-    for bill in pending_bills:
-        due_date = datetime.fromisoformat(bill["due_date"].replace("Z", "+00:00")) if isinstance(bill["due_date"], str) else bill["due_date"]
-        if due_date <= seven_days_from_now:
-            due_soon.append(_bill_to_response(bill))
-
-    return BillSummary(
-        total_due=total_due,
-        pending_bills=len(pending_bills),
-        service_breakdown=service_breakdown,
+    # Pending-bill aggregate, maintained incrementally by the bill writes
+    due_soon_until = (utc_now() + timedelta(days=settings.BILLING_DUE_SOON_DAYS)).date()
+    aggregate = await get_user_billing_aggregate(user_id, due_soon_until)
+
+    # Bills due soon, already ordered by due date
+    due_soon = [_bill_to_response(bill) for bill in aggregate.due_before(due_soon_until)]
+
+    summary = BillSummary.model_construct(
+        total_due=aggregate.total_due,
+        pending_bills=aggregate.pending_count,
+        service_breakdown=aggregate.service_breakdown(),
         due_soon=due_soon
     )
+    return model_response(summary, BillSummary)
 
 
 @router.get("/bills/{bill_id}", response_model=BillResponse)
-async def get_bill(bill_id: str, authorization: Optional[str] = Header(None)):
+async def get_bill(bill_id: str, user_id: str = Depends(get_current_user_id)):
     """
     Get details of a specific bill
     """
-    user_id = await _get_user_from_token(authorization)
-
-    # Get all user bills and find the specific one
-    bills = await get_user_bills(user_id)
-    bill = next((b for b in bills if b["id"] == bill_id), None)
+    bill = await get_bill_by_id(bill_id, user_id)
 
     if not bill:
         raise HTTPException(
@@ -121,4 +125,4 @@ async def get_bill(bill_id: str, authorization: Optional[str] = Header(None)):
             detail="Bill not found"
         )
 
-    return _bill_to_response(bill)
+    return model_response(_bill_to_response(bill), BillResponse)
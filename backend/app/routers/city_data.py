@@ -1,11 +1,26 @@
-"""City Data Router - Weather, alerts, news ticker"""
+"""City Data Router - Weather, alerts, news ticker
+
+The same content is served to every kiosk, so responses are encoded once
+into a shared ResponseCache and revalidated with ETags.
+"""
 from datetime import datetime, timedelta
 from typing import List
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from pydantic import TypeAdapter
+from app.core.config import settings
+from app.core.response_cache import ResponseCache
 from app.models import WeatherData, NewsItem, CityDataResponse
 
 router = APIRouter(prefix="/city-data", tags=["City Data"])
 
+city_data_cache = ResponseCache(
+    ttl=settings.CITY_DATA_CACHE_TTL_SECONDS,
+    stale_ttl=settings.CITY_DATA_STALE_SECONDS
+)
+
+_alerts_adapter = TypeAdapter(List[NewsItem])
+_news_ticker_adapter = TypeAdapter(List[str])
+
 
 # Mock weather data
 def _get_mock_weather() -> WeatherData:
@@ -61,37 +76,53 @@ def _get_mock_news_ticker() -> List[str]:
     ]
 
 
+async def _build_weather() -> bytes:
+    return _get_mock_weather().model_dump_json().encode()
+
+
+async def _build_alerts() -> bytes:
+    return _alerts_adapter.dump_json(_get_mock_alerts())
+
+
+async def _build_news_ticker() -> bytes:
+    return _news_ticker_adapter.dump_json(_get_mock_news_ticker())
+
+
+async def _build_city_data() -> bytes:
+    return CityDataResponse(
+        weather=_get_mock_weather(),
+        alerts=_get_mock_alerts(),
+        news_ticker=_get_mock_news_ticker()
+    ).model_dump_json().encode()
+
+
 @router.get("/weather", response_model=WeatherData)
-async def get_weather():
+async def get_weather(request: Request):
     """
     Get current weather data for the city
     """
-    return _get_mock_weather()
+    return city_data_cache.respond(request, await city_data_cache.get("weather", _build_weather))
 
 
 @router.get("/alerts", response_model=List[NewsItem])
-async def get_alerts():
+async def get_alerts(request: Request):
     """
     Get active city alerts and announcements
     """
-    return _get_mock_alerts()
+    return city_data_cache.respond(request, await city_data_cache.get("alerts", _build_alerts))
 
 
 @router.get("/news-ticker", response_model=List[str])
-async def get_news_ticker():
+async def get_news_ticker(request: Request):
     """
     Get news ticker headlines
     """
-    return _get_mock_news_ticker()
+    return city_data_cache.respond(request, await city_data_cache.get("news-ticker", _build_news_ticker))
 
 
 @router.get("", response_model=CityDataResponse)
-async def get_city_data():
+async def get_city_data(request: Request):
     """
     Get all city data (weather, alerts, news ticker) in one call
     """
-    return CityDataResponse(
-        weather=_get_mock_weather(),
-        alerts=_get_mock_alerts(),
-        news_ticker=_get_mock_news_ticker()
-    )
+    return city_data_cache.respond(request, await city_data_cache.get("all", _build_city_data))
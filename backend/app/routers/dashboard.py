@@ -1,8 +1,14 @@
 """Dashboard Router - Summary endpoint for dashboard page"""
-from fastapi import APIRouter, HTTPException, Header, status
-from typing import Optional, Dict, Any
-from app.core.security import get_user_id_from_token
+import asyncio
+from fastapi import APIRouter, Depends, Request, Response
+from typing import Any, Awaitable, Dict, List, Tuple
+from app.core.config import settings
+from app.core.security import get_current_user_id
+from app.core.serialization import json_response
+from app.core.versions import VersionKey, user_versions
+from app.services.billing_aggregates import BillingAggregate
 from app.services.supabase_db import (
+    get_user_billing_aggregate,
     get_user_pending_bills,
     get_active_alerts,
     get_user_grievances
@@ -11,26 +17,56 @@ from app.services.supabase_db import (
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 
-async def _get_user_from_token(authorization: Optional[str]) -> str:
-    """Extract user ID from authorization header"""
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
+async def _load_section(name: str, loader: Awaitable[Any], timeout: float) -> Any:
+    """Await one dashboard section, bounded by its own timeout"""
+    try:
+        return await asyncio.wait_for(loader, timeout=timeout)
+    except asyncio.TimeoutError:
+        print(f"Dashboard section '{name}' timed out after {timeout}s")
+        raise
 
-    token = authorization.split(" ")[1] if authorization.startswith("Bearer ") else authorization
-    user_id = await get_user_id_from_token(token)
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    return user_id
+
+async def _load_sections(loaders: Dict[str, Awaitable[Any]], timeout: float) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Load independent sections concurrently.
+
+    Returns:
+        (results by section name, names of sections that failed or timed out)
+    """
+    names = list(loaders)
+    outcomes = await asyncio.gather(
+        *(_load_section(name, loaders[name], timeout) for name in names),
+        return_exceptions=True
+    )
+
+    results: Dict[str, Any] = {}
+    unavailable: List[str] = []
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, asyncio.TimeoutError):
+                print(f"Dashboard section '{name}' failed: {str(outcome)}")
+            unavailable.append(name)
+        else:
+            results[name] = outcome
+    return results, unavailable
+
+
+async def _load_bills_section(user_id: str) -> Tuple[BillingAggregate, List[Dict[str, Any]]]:
+    """Totals from the billing aggregate, plus the pending bills the page lists and pays"""
+    aggregate, pending_bills = await asyncio.gather(
+        get_user_billing_aggregate(user_id),
+        get_user_pending_bills(user_id)
+    )
+    return aggregate, pending_bills
+
+
+def _summary_versions(user_id: str) -> List[VersionKey]:
+    """The versions the dashboard summary is derived from"""
+    return [("bills", user_id), ("grievances", user_id), ("alerts", None)]
 
 
 @router.get("/summary")
-async def get_dashboard_summary(authorization: Optional[str] = Header(None)):
+async def get_dashboard_summary(request: Request, user_id: str = Depends(get_current_user_id)):
     """
     Get dashboard summary - Aggregates all data for the dashboard
     - Total outstanding dues
@@ -38,14 +74,32 @@ async def get_dashboard_summary(authorization: Optional[str] = Header(None)):
     - Pending bills
     - Active alerts
     - Recent grievances
+
+    Bills, alerts and grievances are fetched concurrently, each with its own
+    timeout. A section that fails or times out is returned empty and listed
+    in "unavailable" instead of failing the whole response.
+
+    A complete summary carries an ETag from the user's bill and grievance
+    versions and the alerts version; a matching If-None-Match is answered
+    with 304 without loading the data.
     """
-    user_id = await _get_user_from_token(authorization)
+    etag = await user_versions.etag(*_summary_versions(user_id))
+    not_modified = user_versions.not_modified(request, etag)
+    if not_modified:
+        return not_modified
 
-    # Get pending bills
-    pending_bills = await get_user_pending_bills(user_id)
+    sections, unavailable = await _load_sections(
+        {
+            "bills": _load_bills_section(user_id),
+            "alerts": get_active_alerts(),
+            "grievances": get_user_grievances(user_id),
+        },
+        timeout=settings.DASHBOARD_SECTION_TIMEOUT_SECONDS
+    )
 
-    # Calculate totals
-    total_due = sum(float(bill["amount_due"]) for bill in pending_bills)
+    aggregate, pending_bills = sections.get("bills") or (BillingAggregate(), [])
+    alerts = sections.get("alerts", [])
+    grievances = sections.get("grievances", [])
 
     # Service breakdown
     service_breakdown: Dict[str, Any] = {
@@ -54,29 +108,48 @@ async def get_dashboard_summary(authorization: Optional[str] = Header(None)):
         "gas": {"amount": 0, "count": 0, "status": "inactive"}
     }
 
-    for bill in pending_bills:
-        service = bill["service_type"]
+    for service, totals in aggregate.service_breakdown().items():
         if service in service_breakdown:
-            service_breakdown[service]["amount"] += float(bill["amount_due"])
-            service_breakdown[service]["count"] += 1
-
-    # Get active alerts
-    alerts = await get_active_alerts()
+            service_breakdown[service].update(totals)
 
-    # Get user grievances
-    grievances = await get_user_grievances(user_id)
     open_grievances = [g for g in grievances if g["status"] in ["OPEN", "IN_PROGRESS"]]
 
-    return {
+    return json_response({
         "user_id": user_id,
-        "total_due": total_due,
+        "total_due": aggregate.total_due,
         "service_breakdown": service_breakdown,
-        "pending_bills_count": len(pending_bills),
+        "pending_bills_count": aggregate.pending_count,
         "bills": pending_bills,
         "alerts": alerts,
         "grievances": open_grievances,
-        "grievances_count": len(open_grievances)
+        "grievances_count": len(open_grievances),
+        "unavailable": unavailable
+    }, headers=None if unavailable else user_versions.headers(etag))
+
+
+@router.api_route("/versions", methods=["GET", "HEAD"])
+async def get_versions(request: Request, user_id: str = Depends(get_current_user_id)):
+    """
+    Current ETags of the user's listings, from their versions alone
+
+    Kiosks compare these with the ETags they hold to find out which
+    listings changed, or send HEAD with If-None-Match (the ETag of this
+    response) to learn with a bodiless 304 that nothing did.
+    """
+    # Reads every version at once; the per-listing ETags below reuse them
+    etag = await user_versions.etag(("bills", user_id), ("grievances", user_id), ("transactions", user_id), ("alerts", None))
+    etags = {
+        "bills": await user_versions.etag(("bills", user_id)),
+        "grievances": await user_versions.etag(("grievances", user_id)),
+        "transactions": await user_versions.etag(("transactions", user_id)),
+        "dashboard": await user_versions.etag(*_summary_versions(user_id))
     }
+    not_modified = user_versions.not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    if request.method == "HEAD":
+        return Response(headers=user_versions.headers(etag))
+    return json_response(etags, headers=user_versions.headers(etag))
 
 
 @router.get("/status")
@@ -0,0 +1,68 @@
+"""Events Router - Server-sent event stream of alerts and account changes"""
+import time
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from app.core.broadcaster import Subscription, SubscriptionClosed, broadcaster, user_topic, zone_topics
+from app.core.config import settings
+from app.core.security import get_user_id_from_token
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+async def _event_stream(subscription: Subscription) -> AsyncIterator[bytes]:
+    """
+    Encoded events as they arrive, with a comment line as keepalive.
+    The stream ends after EVENTS_MAX_STREAM_SECONDS (clients reconnect),
+    so open streams never hold up a server shutdown for long.
+    """
+    deadline = time.monotonic() + settings.EVENTS_MAX_STREAM_SECONDS
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MILLISECONDS}\n\n".encode()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = await subscription.next(timeout=min(settings.EVENTS_KEEPALIVE_SECONDS, remaining))
+            except SubscriptionClosed:
+                return
+            yield event if event is not None else b": keepalive\n\n"
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_events(
+    zone: Optional[str] = Query(None, max_length=100),
+    token: Optional[str] = Query(None, description="Access token, for clients that cannot set headers (EventSource)"),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Server-sent events
+
+    - "alert": a city alert became active (only alerts for `zone`, if given)
+    - "user_data": the authenticated user's bills, grievances or
+      transactions changed ({"resource": ...}); refetch that resource
+
+    Authentication is optional: without a token only alerts are sent.
+    """
+    topics = zone_topics(zone)
+
+    if authorization and authorization.startswith("Bearer "):
+        token = authorization[len("Bearer "):]
+    if token:
+        user_id = await get_user_id_from_token(token)
+        if not user_id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token"
+            )
+        topics.append(user_topic(user_id))
+
+    subscription = broadcaster.subscribe(topics)
+    return StreamingResponse(
+        _event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,43 +1,43 @@
 """Grievance Router - Complaint submission and tracking with Supabase"""
-from datetime import datetime
-from fastapi import APIRouter, HTTPException, Header, Body, status
+import json
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from app.models import (
     GrievanceCreate,
     GrievanceResponse,
     GrievanceStatus,
+    GrievancePriority,
+    GrievanceCategory,
+    GrievanceSearchResult,
+    IncidentResponse,
+    TriageRequest,
+    TriageResult,
     ApiResponse
 )
-from app.core.security import verify_token
+from app.core.config import settings
+from app.core.pagination import stream_json_array
+from app.core.security import get_current_user_id
+from app.core.serialization import model_response
+from app.core.versions import user_versions
 from app.services.supabase_db import (
     create_grievance,
     get_user_grievances,
+    get_user_rows_page,
+    iter_user_rows,
     get_grievance_by_ticket,
+    search_grievances,
     update_grievance as update_grievance_db
 )
 from app.services.ai_processor import ai_processor
+from app.services.enrichment import enrichment_queue
+from app.services.incident_clusters import incident_index
+from app.services.triage import parse_ndjson_items, triage_pool
 
 router = APIRouter(prefix="/grievance", tags=["Grievance"])
 
 
-async def _get_user_from_token(authorization: Optional[str]) -> str:
-    """Extract user ID from authorization header"""
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
-
-    token = authorization.split(" ")[1] if authorization.startswith("Bearer ") else authorization
-    user_id = verify_token(token)
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    return user_id
-
-
 def _grievance_to_response(grievance: dict) -> GrievanceResponse:
     """Convert database grievance to response model"""
     return GrievanceResponse(
@@ -48,30 +48,31 @@ def _grievance_to_response(grievance: dict) -> GrievanceResponse:
         status=grievance["status"],
         priority=grievance["priority"],
         estimated_resolution=grievance.get("estimated_resolution"),
-        created_at=datetime.fromisoformat(grievance["created_at"].replace("Z", "+00:00")) if isinstance(grievance["created_at"], str) else grievance["created_at"],
-        resolved_at=datetime.fromisoformat(grievance["resolved_at"].replace("Z", "+00:00")) if grievance.get("resolved_at") and isinstance(grievance["resolved_at"], str) else grievance.get("resolved_at")
+        consumer_id=grievance.get("consumer_id"),
+        location=grievance.get("location"),
+        phone=grievance.get("phone"),
+        incident_id=grievance.get("incident_id"),
+        created_at=grievance["created_at"],
+        resolved_at=grievance.get("resolved_at")
     )
 
 
 @router.post("/submit", response_model=GrievanceResponse)
 async def submit_grievance(
     grievance: GrievanceCreate,
-    authorization: Optional[str] = Header(None)
+    user_id: str = Depends(get_current_user_id)
 ):
     """
     Submit a new grievance/complaint
-    - Analyzes priority using AI processor
-    - Estimates resolution time
-    - Returns ticket ID
+    - Stores the grievance with its priority and estimated resolution and
+      returns its ticket ID right away
+    - The consumer ID, location and phone found in the description and the
+      incident it belongs to are filled in in the background
     """
-    user_id = await _get_user_from_token(authorization)
-
-    # Analyze priority and estimate resolution time
-    priority = ai_processor.analyze_priority(grievance.description, grievance.category)
-    estimated_resolution = ai_processor.estimate_resolution_time(priority)
     ticket_id = ai_processor.generate_ticket_id()
+    priority = ai_processor.analyze_priority(grievance.description, grievance.category)
 
-    # Create grievance record
+    # Create the grievance record; enrichment adds entities and the incident
     grievance_data = {
         "ticket_id": ticket_id,
         "user_id": user_id,
@@ -81,36 +82,175 @@ async def submit_grievance(
         "attachment_url": grievance.attachment_url,
         "status": "OPEN",
         "priority": priority.value,
-        "estimated_resolution": estimated_resolution
+        "estimated_resolution": ai_processor.estimate_resolution_time(priority)
     }
 
     created_grievance = await create_grievance(grievance_data)
+    await enrichment_queue.submit(ticket_id, user_id, grievance.description, grievance.category)
 
-    return _grievance_to_response(created_grievance)
+    return model_response(_grievance_to_response(created_grievance), GrievanceResponse)
 
 
 @router.get("/list", response_model=List[GrievanceResponse])
-async def get_grievances(authorization: Optional[str] = Header(None)):
+async def get_grievances(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    user_id: str = Depends(get_current_user_id)
+):
     """
     Get all grievances for the authenticated user
+
+    - limit/cursor: one page, newest first; X-Next-Cursor holds the next cursor
+    - stream: the full history, encoded as rows are fetched
+
+    Responses carry an ETag from the user's grievances version; a matching
+    If-None-Match is answered with 304 without loading the data.
     """
-    user_id = await _get_user_from_token(authorization)
+    etag = await user_versions.etag(("grievances", user_id))
+    not_modified = user_versions.not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    if stream:
+        rows = iter_user_rows("grievances", user_id, settings.LIST_STREAM_BATCH_SIZE)
+        return StreamingResponse(
+            stream_json_array(rows, lambda g: _grievance_to_response(g).model_dump_json()),
+            media_type="application/json",
+            headers=user_versions.headers(etag)
+        )
+
+    if limit or cursor:
+        try:
+            grievances, next_cursor = await get_user_rows_page("grievances", user_id, limit or settings.LIST_PAGE_MAX_LIMIT, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        headers = user_versions.headers(etag)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return model_response([_grievance_to_response(g) for g in grievances], List[GrievanceResponse], headers)
 
     grievances = await get_user_grievances(user_id)
 
-    return [_grievance_to_response(g) for g in grievances]
+    return model_response([_grievance_to_response(g) for g in grievances], List[GrievanceResponse], user_versions.headers(etag))
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator is still reading the request.
+    The stock class listens on receive() for a disconnect, which would
+    swallow request body chunks; here the iterator owns receive() and a
+    disconnect surfaces as ClientDisconnect from request.stream().
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@router.post("/triage", response_model=List[TriageResult])
+async def triage_grievances(
+    batch: TriageRequest,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Triage a batch of descriptions without creating grievances
+    Returns priority, estimated resolution and entities per item, in input order
+    """
+    if len(batch.items) > settings.TRIAGE_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.TRIAGE_MAX_BATCH} items per batch; use /grievance/triage/stream"
+        )
+
+    return await triage_pool.triage([(item.description, item.category.value) for item in batch.items])
+
+
+@router.post("/triage/stream")
+async def triage_grievances_stream(
+    request: Request,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Triage an NDJSON stream of {"description", "category"} objects
+    Responds with one NDJSON result line per input line, in input order,
+    while the input is still being read. Invalid lines yield {"error": ...}.
+    """
+    async def results():
+        async for chunk in triage_pool.triage_stream(parse_ndjson_items(request.stream())):
+            yield "".join(json.dumps(result) + "\n" for result in chunk).encode()
+
+    return _DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.get("/search", response_model=List[GrievanceSearchResult])
+async def search_user_grievances(
+    q: str = Query(..., min_length=1, max_length=500),
+    category: Optional[GrievanceCategory] = None,
+    status_filter: Optional[GrievanceStatus] = Query(None, alias="status"),
+    priority: Optional[GrievancePriority] = None,
+    limit: int = Query(20, ge=1, le=settings.LIST_PAGE_MAX_LIMIT),
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Search the authenticated user's grievances by description text
+
+    Results are ranked by relevance (BM25), best first.
+    """
+    results = await search_grievances(
+        q,
+        user_id,
+        category.value if category else None,
+        status_filter.value if status_filter else None,
+        priority.value if priority else None,
+        limit
+    )
+    return model_response(
+        [
+            GrievanceSearchResult(**_grievance_to_response(grievance).model_dump(), score=round(score, 4))
+            for grievance, score in results
+        ],
+        List[GrievanceSearchResult]
+    )
+
+
+@router.get("/incidents", response_model=List[IncidentResponse])
+async def get_incidents(
+    category: Optional[GrievanceCategory] = None,
+    min_size: int = Query(2, ge=1),
+    limit: int = Query(50, ge=1, le=settings.LIST_PAGE_MAX_LIMIT),
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Active incidents (clusters of near-duplicate grievances), largest first
+
+    Only the caller's own ticket IDs are listed for each incident.
+    """
+    incidents = incident_index.active(category.value if category else None, min_size)
+    return [
+        IncidentResponse(
+            incident_id=incident.incident_id,
+            category=incident.category,
+            location=incident.location,
+            size=incident.size,
+            first_seen=datetime.fromtimestamp(incident.first_seen, timezone.utc),
+            last_seen=datetime.fromtimestamp(incident.last_seen, timezone.utc),
+            ticket_ids=[ticket_id for ticket_id, owner in incident.tickets.items() if owner == user_id]
+        )
+        for incident in incidents[:limit]
+    ]
 
 
 @router.get("/{ticket_id}", response_model=GrievanceResponse)
 async def get_grievance(
     ticket_id: str,
-    authorization: Optional[str] = Header(None)
+    user_id: str = Depends(get_current_user_id)
 ):
     """
     Get details of a specific grievance
     """
-    user_id = await _get_user_from_token(authorization)
-
     grievance = await get_grievance_by_ticket(ticket_id, user_id)
 
     if not grievance:
@@ -119,20 +259,18 @@ async def get_grievance(
             detail="Grievance not found"
         )
 
-    return _grievance_to_response(grievance)
+    return model_response(_grievance_to_response(grievance), GrievanceResponse)
 
 
 @router.put("/{ticket_id}", response_model=ApiResponse)
 async def update_grievance(
     ticket_id: str,
     description: Optional[str] = Body(None, embed=True),
-    authorization: Optional[str] = Header(None)
+    user_id: str = Depends(get_current_user_id)
 ):
     """
     Update grievance description
     """
-    user_id = await _get_user_from_token(authorization)
-
     update_data = {}
     if description:
         update_data["description"] = description
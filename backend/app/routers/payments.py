@@ -1,6 +1,6 @@
 """Payments Router - Payment processing with Supabase"""
-from datetime import datetime
-from fastapi import APIRouter, HTTPException, Header, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from app.models import (
     CreatePaymentRequest,
@@ -8,45 +8,59 @@ from app.models import (
     ApiResponse,
     PaymentStatus
 )
-from app.core.security import verify_token
+from app.core.config import settings
+from app.core.idempotency import IdempotencyKeyConflict, payment_idempotency, request_fingerprint
+from app.core.pagination import stream_json_array
+from app.core.security import get_current_user_id
+from app.core.serialization import dumps, json_response
+from app.core.versions import user_versions
 from app.services.supabase_db import (
     create_transaction,
     get_user_transactions,
-    update_transaction_status
+    get_user_rows_page,
+    iter_user_rows,
+    get_transaction_by_order_id,
+    settle_order
 )
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
 
-async def _get_user_from_token(authorization: Optional[str]) -> str:
-    """Extract user ID from authorization header"""
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Not authenticated"
-        )
-
-    token = authorization.split(" ")[1] if authorization.startswith("Bearer ") else authorization
-    user_id = verify_token(token)
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-    return user_id
-
-
 @router.post("/create-order", response_model=PaymentResponse)
 async def create_payment_order(
     request: CreatePaymentRequest,
-    authorization: Optional[str] = Header(None)
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    user_id: str = Depends(get_current_user_id)
 ):
     """
     Create a new payment order
     Returns order ID for payment gateway
+
+    With an Idempotency-Key header, retries of the same request return the
+    original order (marked Idempotent-Replayed) instead of creating another.
     """
-    user_id = await _get_user_from_token(authorization)
+    if not idempotency_key:
+        return await _create_payment_order(request, user_id)
+
+    try:
+        order, replayed = await payment_idempotency.run(
+            (user_id, idempotency_key),
+            request_fingerprint(request.model_dump(mode="json")),
+            lambda: _create_payment_order(request, user_id)
+        )
+    except IdempotencyKeyConflict:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request"
+        )
+
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return order
 
+
+async def _create_payment_order(request: CreatePaymentRequest, user_id: str) -> PaymentResponse:
     # Generate order and transaction IDs
     from app.services.payment_engine import PaymentEngine
     order_id = PaymentEngine.generate_order_id()
@@ -63,14 +77,14 @@ async def create_payment_order(
         "status": "PENDING"
     }
 
-    await create_transaction(transaction_data)
+    transaction = await create_transaction(transaction_data)
 
     return PaymentResponse(
         transaction_id=transaction_id,
         order_id=order_id,
         amount=request.amount,
         status=PaymentStatus.PENDING,
-        created_at=datetime.now()
+        created_at=transaction["created_at"]
     )
 
 
@@ -78,17 +92,21 @@ async def create_payment_order(
 async def verify_payment(
     order_id: str,
     payment_id: str,
-    authorization: Optional[str] = Header(None)
+    user_id: str = Depends(get_current_user_id)
 ):
     """
     Verify payment completion from payment gateway
+    Marks the order's bills as paid and the transaction as successful
     """
-    await _get_user_from_token(authorization)
-
-    # Update transaction status
-    success = await update_transaction_status(order_id, "SUCCESS", payment_id)
+    try:
+        transaction = await settle_order(order_id, user_id, payment_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Payment could not be settled, please retry"
+        )
 
-    if not success:
+    if not transaction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
@@ -106,15 +124,64 @@ async def verify_payment(
 
 
 @router.get("/transactions", response_model=List[dict])
-async def get_transactions(authorization: Optional[str] = Header(None)):
+async def get_transactions(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    user_id: str = Depends(get_current_user_id)
+):
     """
     Get all transactions for the authenticated user
+
+    - limit/cursor: one page, newest first; X-Next-Cursor holds the next cursor
+    - stream: the full history, encoded as rows are fetched
+
+    Responses carry an ETag from the user's transactions version; a matching
+    If-None-Match is answered with 304 without loading the data.
     """
-    user_id = await _get_user_from_token(authorization)
+    etag = await user_versions.etag(("transactions", user_id))
+    not_modified = user_versions.not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    if stream:
+        rows = iter_user_rows("transactions", user_id, settings.LIST_STREAM_BATCH_SIZE)
+        return StreamingResponse(
+            stream_json_array(rows, lambda t: dumps(t).decode()),
+            media_type="application/json",
+            headers=user_versions.headers(etag)
+        )
+
+    if limit or cursor:
+        try:
+            transactions, next_cursor = await get_user_rows_page("transactions", user_id, limit or settings.LIST_PAGE_MAX_LIMIT, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        headers = user_versions.headers(etag)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return json_response(transactions, headers=headers)
 
     transactions = await get_user_transactions(user_id)
 
-    return transactions
+    return json_response(transactions, headers=user_versions.headers(etag))
+
+
+@router.get("/transactions/{order_id}", response_model=dict)
+async def get_transaction(order_id: str, user_id: str = Depends(get_current_user_id)):
+    """
+    Get a single transaction by its order ID
+    """
+    transaction = await get_transaction_by_order_id(order_id, user_id)
+
+    if not transaction:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found"
+        )
+
+    return json_response(transaction)
 
 
 @router.get("/methods", response_model=List[str])
@@ -1,24 +1,87 @@
-"""AI Processor Service - Analyzes grievance priority and categorization"""
+"""AI Processor Service - Analyzes grievance priority and categorization
+
+The priority keyword table can be edited in PRIORITY_KEYWORDS_FILE while
+the server runs: keywords_watcher checks the file's mtime every
+PRIORITY_KEYWORDS_RELOAD_SECONDS and reloads it when it changed.
+"""
+import asyncio
+import json
+import os
 import re
-from typing import Optional
+from typing import Dict, Optional
+from app.core.config import settings
 from app.models import GrievanceCategory, GrievancePriority
+from app.services.keyword_matcher import KeywordMatcher
 
 
 class AIProcessor:
     """Simple AI-based grievance analysis using keyword matching"""
 
-    # High priority keywords
-    HIGH_PRIORITY_KEYWORDS = [
-        "fire", "spark", "shock", "electrocution", "burning",
-        "emergency", "urgent", "critical", "danger", "hazard",
-        "explosion", "leak", "gas", "no water", "flood"
-    ]
+    # Priority keywords: tier -> {keyword: weight}. A keyword counts toward
+    # its own tier and every tier below it; the highest tier whose matched
+    # weight reaches PRIORITY_SCORE_THRESHOLD wins.
+    PRIORITY_KEYWORDS: Dict[GrievancePriority, Dict[str, float]] = {
+        GrievancePriority.CRITICAL: {
+            "fire": 1.0, "shock": 1.0, "electrocution": 1.0, "explosion": 1.0
+        },
+        GrievancePriority.HIGH: {
+            "spark": 1.0, "sparks": 1.0, "sparking": 1.0, "burning": 1.0,
+            "emergency": 1.0, "urgent": 1.0, "critical": 1.0, "danger": 1.0, "hazard": 1.0,
+            "leak": 1.0, "leaking": 1.0, "leakage": 1.0, "gas": 1.0,
+            "no water": 1.0, "flood": 1.0, "flooding": 1.0
+        },
+        GrievancePriority.MEDIUM: {
+            "power outage": 1.0, "no electricity": 1.0, "bill issue": 1.0, "overcharge": 1.0,
+            "meter problem": 1.0, "connection": 1.0, "disconnection": 1.0, "delay": 1.0
+        }
+    }
+    PRIORITY_SCORE_THRESHOLD = 1.0
+
+    # Tiers from most to least severe
+    _PRIORITY_ORDER = [GrievancePriority.CRITICAL, GrievancePriority.HIGH, GrievancePriority.MEDIUM]
 
-    # Medium priority keywords
-    MEDIUM_PRIORITY_KEYWORDS = [
-        "power outage", "no electricity", "bill issue", "overcharge",
-        "meter problem", "connection", "disconnection", "delay"
-    ]
+    _priority_matcher: KeywordMatcher = KeywordMatcher({})
+    # Table behind the matcher and a counter bumped on every reload,
+    # so process-pool workers can be rebuilt with the same table
+    keywords_table: Dict[GrievancePriority, Dict[str, float]] = {}
+    keywords_version = 0
+    _keywords_mtime: Optional[float] = None  # of PRIORITY_KEYWORDS_FILE when last read
+
+    @classmethod
+    def reload_keywords(cls, table: Optional[Dict[GrievancePriority, Dict[str, float]]] = None) -> None:
+        """
+        Rebuild the priority matcher without a restart.
+        Uses `table` if given, else PRIORITY_KEYWORDS_FILE if configured, else the defaults.
+
+        PRIORITY_KEYWORDS_FILE is JSON: {"CRITICAL": {"fire": 1.0}, "HIGH": {...}, ...}
+        """
+        if table is None and settings.PRIORITY_KEYWORDS_FILE:
+            # Recorded before parsing, so a broken file is not retried until it changes again
+            cls._keywords_mtime = os.stat(settings.PRIORITY_KEYWORDS_FILE).st_mtime
+            with open(settings.PRIORITY_KEYWORDS_FILE) as f:
+                table = {GrievancePriority(tier): keywords for tier, keywords in json.load(f).items()}
+        if table is None:
+            table = cls.PRIORITY_KEYWORDS
+
+        keywords = {
+            keyword: (tier, float(weight))
+            for tier in reversed(cls._PRIORITY_ORDER)
+            for keyword, weight in table.get(tier, {}).items()
+        }
+        # Swapped in one assignment, so concurrent requests see the old or the new table
+        cls._priority_matcher = KeywordMatcher(keywords)
+        cls.keywords_table = table
+        cls.keywords_version += 1
+
+    @classmethod
+    def reload_keywords_if_changed(cls) -> bool:
+        """Reload PRIORITY_KEYWORDS_FILE if it changed since it was last read; returns whether it was"""
+        if not settings.PRIORITY_KEYWORDS_FILE:
+            return False
+        if os.stat(settings.PRIORITY_KEYWORDS_FILE).st_mtime == cls._keywords_mtime:
+            return False
+        cls.reload_keywords()
+        return True
 
     @staticmethod
     def analyze_priority(description: str, category: GrievanceCategory) -> GrievancePriority:
@@ -26,19 +89,17 @@ class AIProcessor:
         Analyze grievance description to determine priority
         Uses keyword matching for quick classification
         """
-        description_lower = description.lower()
-
-        # Check for high priority keywords
-        for keyword in AIProcessor.HIGH_PRIORITY_KEYWORDS:
-            if keyword in description_lower:
-                return GrievancePriority.CRITICAL if any(
-                    kw in description_lower for kw in ["fire", "shock", "electrocution", "explosion"]
-                ) else GrievancePriority.HIGH
+        matches = AIProcessor._priority_matcher.find(description)
+        if matches:
+            scores = dict.fromkeys(AIProcessor._PRIORITY_ORDER, 0.0)
+            for tier, weight in matches.values():
+                scores[tier] += weight
 
-        # Check for medium priority keywords
-        for keyword in AIProcessor.MEDIUM_PRIORITY_KEYWORDS:
-            if keyword in description_lower:
-                return GrievancePriority.MEDIUM
+            score = 0.0
+            for tier in AIProcessor._PRIORITY_ORDER:
+                score += scores[tier]
+                if score >= AIProcessor.PRIORITY_SCORE_THRESHOLD:
+                    return tier
 
         # Category-based defaults
         if category == GrievanceCategory.POWER_OUTAGE:
@@ -63,11 +124,29 @@ class AIProcessor:
         }
         return estimates.get(priority, "48 Hours")
 
+    # Consumer ID (KC-001, CON12345; must contain a digit, so "connection"
+    # is not one), location (Sector 4, Block A, Zone North, Ward Gandhi -
+    # any word after the kind) and Indian mobile number
+    # (+91 98765 43210, 09876543210), matched in one scan of the lowercased
+    # text. The leading lookahead lets the engine skip straight to
+    # positions that can start a match.
+    _ENTITY_PATTERN = re.compile(
+        r"""
+        (?=[kcszbw+0-9])
+        (?:
+            (?P<consumer_id>\b(?:kc|con|cid)[-\u2013]?(?=[0-9a-z]*[0-9])[0-9a-z]+\b)
+          | (?P<location>\b(?P<location_kind>sector|block|zone|ward)\s+(?P<location_id>[0-9a-z]+)\b)
+          | (?P<phone>(?<![0-9+])(?:\+?91[\s-]?|0)?(?P<phone_number>[6-9][0-9]{4}[\s-]?[0-9]{5})(?![0-9]))
+        )
+        """,
+        re.VERBOSE
+    )
+
     @staticmethod
     def extract_entities(description: str) -> dict:
         """
-        Extract entities like location, consumer ID from description
-        Simple pattern matching
+        Extract entities like location, consumer ID and phone from description
+        The first occurrence of each is kept, in normalized form
         """
         entities = {
             "location": None,
@@ -75,17 +154,28 @@ class AIProcessor:
             "phone": None
         }
 
-        # Extract consumer ID patterns (e.g., KC-001, CON-12345)
-        consumer_pattern = r"\\b(?:KC|CON|CID)[-–]?[0-9A-Z]+\\b"
-        matches = re.findall(consumer_pattern, description, re.IGNORECASE)
-        if matches:
-            entities["consumer_id"] = matches[0].upper()
-
-        # Extract location patterns (e.g., Sector 4, Block A)
-        location_pattern = r"\\b(?:Sector|Block|Zone|Ward)\\s+[A-Z0-9]+\\b"
-        matches = re.findall(location_pattern, description, re.IGNORECASE)
-        if matches:
-            entities["location"] = matches[0]
+        remaining = len(entities)
+        for match in AIProcessor._ENTITY_PATTERN.finditer(description.lower()):
+            kind = match.lastgroup  # the outermost group of the alternative that matched
+            if entities[kind] is not None:
+                continue
+
+            if kind == "consumer_id":
+                entities[kind] = match["consumer_id"].upper().replace("\u2013", "-")
+            elif kind == "location":
+                location_id = match["location_id"]
+                # Names read as names (Zone North), codes as codes (Sector 4B, Block A)
+                if location_id.isalpha() and len(location_id) > 2:
+                    location_id = location_id.title()
+                else:
+                    location_id = location_id.upper()
+                entities[kind] = f"{match['location_kind'].title()} {location_id}"
+            else:
+                entities[kind] = "".join(filter(str.isdigit, match["phone_number"]))
+
+            remaining -= 1
+            if not remaining:
+                break
 
         return entities
 
@@ -96,4 +186,54 @@ class AIProcessor:
         return f"GRV-{uuid.uuid4().hex[:8].upper()}"
 
 
+class KeywordsWatcher:
+    """
+    Background task reloading the priority keywords when their file changes.
+
+    Usage:
+        keywords_watcher.start()     # app startup
+        await keywords_watcher.stop()
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+
+    def check(self) -> bool:
+        """Reload the keywords if their file changed; a broken file keeps the current table"""
+        try:
+            reloaded = AIProcessor.reload_keywords_if_changed()
+        except Exception as e:
+            print(f"Priority keywords reload error: {str(e)}")
+            return False
+        if reloaded:
+            self.reloads += 1
+            print(f"Priority keywords reloaded from {settings.PRIORITY_KEYWORDS_FILE}")
+        return reloaded
+
+    async def _watch_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self.check()
+
+    def start(self) -> None:
+        """Start watching (idempotent; does nothing without a keywords file)"""
+        if not settings.PRIORITY_KEYWORDS_FILE or self.interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+AIProcessor.reload_keywords()
 ai_processor = AIProcessor()
+keywords_watcher = KeywordsWatcher(interval=settings.PRIORITY_KEYWORDS_RELOAD_SECONDS)
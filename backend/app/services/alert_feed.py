@@ -0,0 +1,81 @@
+"""Alert Feed - Push newly activated city alerts to event subscribers
+
+City alerts are written straight to the city_alerts table, so the feed
+polls get_active_alerts() and publishes each alert it has not seen
+before to the zones it targets. Polling only runs while someone is
+subscribed. A change in the set of active alerts also bumps the shared
+"alerts" version that dashboard ETags include (with Supabase the
+city_alerts trigger has stored the new version; the bump makes this
+worker read it).
+"""
+import asyncio
+from typing import Optional, Set
+
+from app.core.broadcaster import Broadcaster, alert_topics, broadcaster
+from app.core.config import settings
+from app.core.versions import user_versions
+from app.services.supabase_db import get_active_alerts
+
+
+class AlertFeed:
+    """
+    Background poller publishing new alerts as "alert" events.
+
+    Usage:
+        alert_feed.start()     # app startup
+        await alert_feed.stop()
+    """
+
+    def __init__(self, broadcaster: Broadcaster, interval: float):
+        self.broadcaster = broadcaster
+        self.interval = interval
+        self._seen: Optional[Set[str]] = None  # None until the first poll
+        self._task: Optional[asyncio.Task] = None
+
+    async def poll(self) -> int:
+        """Publish alerts that became active since the last poll; returns how many"""
+        alerts = await get_active_alerts()
+        active = {str(alert["id"]) for alert in alerts}
+        if self._seen is None:
+            # Alerts active at startup are already visible through /city-data
+            self._seen = active
+            return 0
+        if active != self._seen:
+            user_versions.bump("alerts")
+
+        published = 0
+        for alert in alerts:
+            if str(alert["id"]) not in self._seen:
+                self.broadcaster.publish(alert_topics(alert.get("target_zones")), "alert", alert)
+                published += 1
+        self._seen = active
+        return published
+
+    async def _poll_loop(self) -> None:
+        while True:
+            if self.broadcaster.subscriber_count:
+                try:
+                    await self.poll()
+                except Exception as e:
+                    print(f"Alert feed poll error: {str(e)}")
+            else:
+                # Nobody to tell; the next subscriber starts from a fresh snapshot
+                self._seen = None
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background poll task (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+alert_feed = AlertFeed(broadcaster, interval=settings.EVENTS_ALERT_POLL_SECONDS)
@@ -0,0 +1,220 @@
+"""Billing Aggregates - Incrementally maintained pending-bill totals per user
+
+The billing and dashboard summaries need the total due, a per-service
+breakdown and the bills due soon. Each user gets a BillingAggregate that
+is seeded once from server-side totals plus the pending bills due up to a
+horizon, and is then updated by the bill write paths (create_bill,
+update_bill_status, payment settlement) instead of being recomputed from
+every pending row on each request.
+"""
+import bisect
+import math
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+def _to_paise(amount: Any) -> int:
+    """Amounts are kept in integer paise so add/remove never drifts"""
+    return round(float(amount) * 100)
+
+
+class BillingAggregate:
+    """
+    Pending-bill aggregate for one user: total due, count and amount per
+    service, and pending bills ordered by due date.
+
+    Totals cover every pending bill. Individual bills are tracked only for
+    those due up to `complete_until` at seeding time, plus any written
+    since; `untracked` counts the pending bills known only through the
+    totals. With no untracked bills the aggregate is complete.
+    """
+
+    def __init__(self, complete_until: Optional[date] = None) -> None:
+        self.total_paise = 0
+        self.services: Dict[str, List[int]] = {}  # service -> [count, paise]
+        self.complete_until = complete_until
+        self.untracked = 0
+        # bill id -> (due date, paise, service) as counted, plus the bill row
+        self._bills: Dict[str, Tuple[date, int, str, Dict[str, Any]]] = {}
+        self._due_index: List[Tuple[date, str]] = []
+
+    @classmethod
+    def seed(
+        cls,
+        totals: Dict[str, Tuple[int, Any]],
+        due_bills: List[Dict[str, Any]],
+        complete_until: date
+    ) -> "BillingAggregate":
+        """
+        Build from per-service (count, amount) totals of all pending bills
+        and the pending bills due on or before `complete_until`.
+        """
+        aggregate = cls(complete_until)
+        for service, (count, amount) in totals.items():
+            if count:
+                aggregate.services[service] = [count, _to_paise(amount)]
+                aggregate.total_paise += _to_paise(amount)
+        for bill in due_bills:
+            aggregate._track(bill)
+        aggregate.untracked = max(0, aggregate.pending_count - len(aggregate._bills))
+        return aggregate
+
+    def _track(self, bill: Dict[str, Any]) -> Tuple[int, str]:
+        due_date = bill["due_date"]  # decoded to a datetime.date by the data layer
+        paise = _to_paise(bill["amount_due"])
+        service = bill["service_type"]
+        self._bills[bill["id"]] = (due_date, paise, service, bill)
+        bisect.insort(self._due_index, (due_date, bill["id"]))
+        return paise, service
+
+    def tracks(self, bill_id: str) -> bool:
+        return bill_id in self._bills
+
+    def covers(self, threshold: date) -> bool:
+        """Whether due_before(threshold) is known to be complete"""
+        return not self.untracked or (self.complete_until is not None and threshold <= self.complete_until)
+
+    def apply(self, bill: Dict[str, Any]) -> None:
+        """
+        Upsert a bill: PENDING bills are (re)counted, any other status removes it.
+        Only valid for bills that are tracked or were not counted before.
+        """
+        self.remove(bill["id"])
+        if bill.get("status", "PENDING") != "PENDING":
+            return
+
+        paise, service = self._track(bill)
+        self.total_paise += paise
+        counts = self.services.setdefault(service, [0, 0])
+        counts[0] += 1
+        counts[1] += paise
+
+    def remove(self, bill_id: str) -> None:
+        entry = self._bills.pop(bill_id, None)
+        if entry is None:
+            return
+
+        due_date, paise, service, _ = entry
+        index = bisect.bisect_left(self._due_index, (due_date, bill_id))
+        del self._due_index[index]
+
+        self.total_paise -= paise
+        counts = self.services[service]
+        counts[0] -= 1
+        counts[1] -= paise
+        if counts[0] == 0:
+            del self.services[service]
+
+    @property
+    def total_due(self) -> float:
+        return self.total_paise / 100
+
+    @property
+    def pending_count(self) -> int:
+        return sum(count for count, _ in self.services.values())
+
+    def service_breakdown(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            service: {"count": count, "amount": paise / 100}
+            for service, (count, paise) in self.services.items()
+        }
+
+    def due_before(self, threshold: date) -> List[Dict[str, Any]]:
+        """Pending bills due on or before `threshold`, earliest first (see covers())"""
+        end = bisect.bisect_right(self._due_index, (threshold, "\uffff"))
+        return [self._bills[bill_id][3] for _, bill_id in self._due_index[:end]]
+
+
+class BillingAggregateStore:
+    """
+    Bounded LRU+TTL store of per-user aggregates, built on first use.
+
+    Aggregates are seeded with a due-date horizon the aggregate's TTL
+    (rounded up to whole days) past the requested threshold, so a
+    threshold that moves forward with the calendar stays covered for the
+    aggregate's lifetime.
+
+    A bill written while the owner's aggregate is being built may or may
+    not be in the loaded rows, so such a build is returned but not stored.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._horizon = timedelta(days=math.ceil(ttl / 86400))
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._building: Dict[str, int] = {}  # user_id -> builds in flight
+        self._dirty: Set[str] = set()  # users written to during a build
+
+    async def get(
+        self,
+        user_id: str,
+        threshold: date,
+        load: Callable[[str, date], Awaitable[Optional[BillingAggregate]]]
+    ) -> BillingAggregate:
+        """
+        Get a user's aggregate covering due dates up to `threshold`, seeding it
+        with `load(user_id, horizon)` when missing or not covering.
+        The loader returns None when the backend failed; that result is not stored.
+        """
+        aggregate = self._cache.get(user_id)
+        if aggregate is not None and aggregate.covers(threshold):
+            return aggregate
+
+        if user_id not in self._building:
+            self._dirty.discard(user_id)
+        self._building[user_id] = self._building.get(user_id, 0) + 1
+        try:
+            aggregate = await load(user_id, threshold + self._horizon)
+        finally:
+            self._building[user_id] -= 1
+            if not self._building[user_id]:
+                del self._building[user_id]
+
+        if aggregate is None:
+            return BillingAggregate()
+        if user_id not in self._dirty:
+            self._cache.set(user_id, aggregate)
+        return aggregate
+
+    def peek(self, user_id: str) -> Optional[BillingAggregate]:
+        """The user's aggregate if it is materialized, without building it"""
+        return self._cache.get(user_id)
+
+    def _written(self, user_id: Optional[str]) -> Optional[BillingAggregate]:
+        if user_id in self._building:
+            self._dirty.add(user_id)
+        return self.peek(user_id)
+
+    def bill_created(self, bill: Dict[str, Any]) -> None:
+        """Fold a newly created bill row into its owner's aggregate, if materialized"""
+        aggregate = self._written(bill.get("user_id"))
+        if aggregate is not None:
+            aggregate.apply(bill)
+
+    def bill_updated(self, bill: Dict[str, Any]) -> None:
+        """
+        Fold an updated bill row into its owner's aggregate, if materialized.
+        An untracked bill's previous status is unknown, so that drops the aggregate.
+        """
+        aggregate = self._written(bill.get("user_id"))
+        if aggregate is None:
+            return
+        if aggregate.tracks(bill["id"]) or not aggregate.untracked:
+            aggregate.apply(bill)
+        else:
+            self.invalidate(bill["user_id"])
+
+    def invalidate(self, user_id: str) -> None:
+        self._cache.pop(user_id)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats
+
+
+billing_aggregates = BillingAggregateStore(
+    maxsize=settings.BILLING_AGGREGATE_MAX_USERS,
+    ttl=settings.BILLING_AGGREGATE_TTL_SECONDS
+)
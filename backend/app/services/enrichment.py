@@ -0,0 +1,236 @@
+"""Grievance Enrichment - Background analysis of submitted grievances
+
+/grievance/submit stores the grievance with its priority and estimated
+resolution (keyword scoring, cheap enough to do inline) and returns the
+ticket ID; the extracted entities and incident cluster are filled in
+afterwards by a small pool of worker tasks fed from a bounded queue.
+Enrichment sets `enriched_at`, so unenriched grievances can be found.
+
+When the queue is full, submit waits briefly for room (backpressure); if
+there is still none, or the workers are not running, the grievance is
+enriched inline. A failed enrichment is retried with exponential backoff,
+and on startup the grievances a previous run left unenriched (still
+queued at shutdown, out of retries, or lost in a crash) are queued again.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+from app.core.config import settings
+from app.core.timestamps import utc_now
+from app.models import GrievanceCategory
+from app.services.ai_processor import AIProcessor
+from app.services.incident_clusters import incident_index
+from app.services.supabase_db import get_unenriched_grievances, update_grievance
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentJob(NamedTuple):
+    ticket_id: str
+    user_id: str
+    description: str
+    category: GrievanceCategory
+    enqueued_at: float
+    attempt: int = 1
+    changes: Optional[Dict[str, Any]] = None  # analysis result, kept so retries only redo the write
+
+
+class EnrichmentQueue:
+    """
+    Bounded queue of grievances awaiting enrichment, drained by `workers` tasks.
+
+    Usage:
+        enrichment_queue.start()                      # app startup
+        await enrichment_queue.submit(ticket_id, user_id, description, category)
+        await enrichment_queue.stop()                 # app shutdown
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        workers: int,
+        enqueue_timeout: float,
+        drain_timeout: float,
+        max_attempts: int,
+        retry_delay: float,
+        sweep_limit: int
+    ):
+        self.maxsize = maxsize
+        self.workers = workers
+        self.enqueue_timeout = enqueue_timeout
+        self.drain_timeout = drain_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.sweep_limit = sweep_limit
+        self._queue: Optional["asyncio.Queue[EnrichmentJob]"] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retries: Set[asyncio.Task] = set()
+        self._in_progress = 0
+        self.enqueued = 0
+        self.swept = 0
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+        self.inline = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._total_lag = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Start the worker tasks and the sweep for unenriched grievances (idempotent)"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep(utc_now())))
+
+    async def stop(self) -> None:
+        """Finish queued jobs (up to drain_timeout), then stop the workers"""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Enrichment queue stopped with %d grievances not enriched; the next startup sweeps them",
+                self._queue.qsize()
+            )
+        for task in [*self._tasks, *self._retries]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._retries, return_exceptions=True)
+        self._tasks = []
+        self._retries.clear()
+        self._queue = None
+
+    async def submit(
+        self,
+        ticket_id: str,
+        user_id: str,
+        description: str,
+        category: GrievanceCategory
+    ) -> bool:
+        """
+        Queue a grievance for enrichment.
+
+        Returns:
+            True if queued, False if it was enriched inline instead
+        """
+        job = EnrichmentJob(ticket_id, user_id, description, category, time.monotonic())
+        if self.running:
+            try:
+                await asyncio.wait_for(self._queue.put(job), timeout=self.enqueue_timeout)
+                self.enqueued += 1
+                return True
+            except asyncio.TimeoutError:
+                pass
+
+        self.inline += 1
+        await self._process(job)
+        return False
+
+    async def _sweep(self, started_at) -> None:
+        """Queue the grievances created before `started_at` that were never enriched"""
+        rows = await get_unenriched_grievances(started_at, self.sweep_limit)
+        for row in rows:
+            try:
+                category = GrievanceCategory(row["category"])
+            except ValueError:
+                logger.warning("Not enriching %s: unknown category %r", row["ticket_id"], row["category"])
+                continue
+            await self._queue.put(EnrichmentJob(
+                row["ticket_id"], row["user_id"], row["description"], category, time.monotonic()
+            ))
+            self.swept += 1
+        if rows:
+            logger.info("Queued %d grievances left unenriched by a previous run", len(rows))
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            self._in_progress += 1
+            try:
+                await self._process(job)
+            finally:
+                self._in_progress -= 1
+                self._queue.task_done()
+
+    async def _process(self, job: EnrichmentJob) -> None:
+        lag = time.monotonic() - job.enqueued_at
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self._total_lag += lag
+
+        changes = job.changes
+        try:
+            if changes is None:
+                entities = AIProcessor.extract_entities(job.description)
+                incident_id = incident_index.add(
+                    job.ticket_id, job.user_id, job.description,
+                    job.category.value, entities["location"]
+                )
+                changes = {**entities, "incident_id": incident_id}
+            updated = await update_grievance(job.ticket_id, job.user_id, {**changes, "enriched_at": utc_now()})
+            if not updated:
+                raise LookupError("grievance not found")
+        except Exception as e:
+            self._retry_later(job._replace(changes=changes), e)
+            return
+        self.processed += 1
+
+    def _retry_later(self, job: EnrichmentJob, error: Exception) -> None:
+        if job.attempt >= self.max_attempts or not self.running:
+            self.failed += 1
+            logger.error("Enrichment of %s failed (attempt %d), giving up until the next startup: %s",
+                         job.ticket_id, job.attempt, error)
+            return
+
+        delay = self.retry_delay * 2 ** (job.attempt - 1)
+        logger.warning("Enrichment of %s failed (attempt %d), retrying in %.1fs: %s",
+                       job.ticket_id, job.attempt, delay, error)
+        self.retried += 1
+        task = asyncio.create_task(self._requeue(job._replace(attempt=job.attempt + 1), delay))
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _requeue(self, job: EnrichmentJob, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._queue.put(job._replace(enqueued_at=time.monotonic()))
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        finished = self.processed + self.retried + self.failed
+        return {
+            "depth": self._queue.qsize() if self._queue is not None else 0,
+            "capacity": self.maxsize,
+            "workers": self.workers if self.running else 0,
+            "in_progress": self._in_progress,
+            "enqueued": self.enqueued,
+            "swept": self.swept,
+            "inline": self.inline,
+            "processed": self.processed,
+            "retrying": len(self._retries),
+            "retried": self.retried,
+            "failed": self.failed,
+            "lag_seconds": {
+                "last": round(self.last_lag, 4),
+                "max": round(self.max_lag, 4),
+                "avg": round(self._total_lag / finished, 4) if finished else 0.0
+            }
+        }
+
+
+enrichment_queue = EnrichmentQueue(
+    maxsize=settings.ENRICHMENT_QUEUE_SIZE,
+    workers=settings.ENRICHMENT_WORKERS,
+    enqueue_timeout=settings.ENRICHMENT_ENQUEUE_TIMEOUT_SECONDS,
+    drain_timeout=settings.ENRICHMENT_DRAIN_TIMEOUT_SECONDS,
+    max_attempts=settings.ENRICHMENT_MAX_ATTEMPTS,
+    retry_delay=settings.ENRICHMENT_RETRY_DELAY_SECONDS,
+    sweep_limit=settings.ENRICHMENT_SWEEP_LIMIT
+)
@@ -0,0 +1,282 @@
+"""Grievance Search - In-process inverted index over grievance descriptions
+
+Descriptions are tokenized into lowercase words; each term maps to a
+posting list of (document, term frequency) held in compact arrays.
+Queries are ranked with BM25 and can be filtered by user, category,
+status and priority, which are kept per document as small integer codes.
+
+The index is kept current by create_grievance and update_grievance and
+can be rebuilt in bulk (at startup) from the grievances table. Updated
+descriptions are re-indexed as a new document; the old one is marked
+deleted and dropped at the next rebuild.
+"""
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models import GrievanceCategory, GrievancePriority, GrievanceStatus
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in is it my of on or our please since "
+    "so the there this to was we with".split()
+)
+_MAX_TF = 255  # term frequencies are stored in one byte
+
+_CATEGORY_CODES = {category.value: code for code, category in enumerate(GrievanceCategory)}
+_STATUS_CODES = {status.value: code for code, status in enumerate(GrievanceStatus)}
+_PRIORITY_CODES = {priority.value: code for code, priority in enumerate(GrievancePriority)}
+_FILTER_FIELDS = (("category", _CATEGORY_CODES), ("status", _STATUS_CODES), ("priority", _PRIORITY_CODES))
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of `text`, without stopwords"""
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+
+class GrievanceSearchIndex:
+    """
+    BM25-ranked inverted index of grievance descriptions.
+
+    Usage:
+        grievance_search.add(grievance_row)
+        grievance_search.update(ticket_id, {"status": "RESOLVED"})
+        grievance_search.search("no power sector 4", user_id=user_id, status="OPEN")
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.clear()
+
+    def clear(self) -> None:
+        self._ticket_ids: List[str] = []  # document number -> ticket ID
+        self._docs: Dict[str, int] = {}  # ticket ID -> live document number
+        self._users: List[str] = []  # user code -> user ID
+        self._user_codes: Dict[str, int] = {}
+        self._user_docs: List[array] = []  # user code -> document numbers
+        self._doc_users = array("I")
+        self._lengths = array("H")
+        self._categories = array("B")
+        self._statuses = array("B")
+        self._priorities = array("B")
+        self._live = bytearray()
+        self._postings: Dict[str, Tuple[array, array]] = {}  # term -> (documents, frequencies)
+        self._doc_terms: List[Tuple[str, ...]] = []  # document number -> its terms, while live
+        self._df: Dict[str, int] = {}  # term -> number of live documents containing it
+        self._total_length = 0
+        self._posting_count = 0
+
+    def _user_code(self, user_id: str) -> int:
+        code = self._user_codes.get(user_id)
+        if code is None:
+            code = self._user_codes[user_id] = len(self._users)
+            self._users.append(user_id)
+            self._user_docs.append(array("I"))
+        return code
+
+    def _append(self, ticket_id: str, user_id: str, description: str, codes: Dict[str, int]) -> None:
+        terms = Counter(tokenize(description))
+        length = min(sum(terms.values()), 0xFFFF)
+        doc = len(self._ticket_ids)
+
+        self._ticket_ids.append(ticket_id)
+        self._docs[ticket_id] = doc
+        user_code = self._user_code(user_id)
+        self._doc_users.append(user_code)
+        self._user_docs[user_code].append(doc)
+        self._lengths.append(length)
+        self._categories.append(codes["category"])
+        self._statuses.append(codes["status"])
+        self._priorities.append(codes["priority"])
+        self._live.append(1)
+        self._doc_terms.append(tuple(terms))
+        self._total_length += length
+
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("I"), array("B"))
+            postings[0].append(doc)
+            postings[1].append(min(frequency, _MAX_TF))
+            self._df[term] = self._df.get(term, 0) + 1
+        self._posting_count += len(terms)
+
+    @staticmethod
+    def _codes(row: Dict[str, Any]) -> Dict[str, int]:
+        return {
+            "category": _CATEGORY_CODES.get(row.get("category"), _CATEGORY_CODES[GrievanceCategory.OTHER.value]),
+            "status": _STATUS_CODES.get(row.get("status"), _STATUS_CODES[GrievanceStatus.OPEN.value]),
+            "priority": _PRIORITY_CODES.get(row.get("priority"), _PRIORITY_CODES[GrievancePriority.LOW.value])
+        }
+
+    def _delete(self, doc: int) -> None:
+        self._live[doc] = 0
+        self._total_length -= self._lengths[doc]
+        del self._docs[self._ticket_ids[doc]]
+        # Deleted documents stay in the posting lists until the next
+        # rebuild, but no longer count toward document frequencies
+        for term in self._doc_terms[doc]:
+            self._df[term] -= 1
+        self._doc_terms[doc] = ()
+
+    def add(self, grievance: Dict[str, Any]) -> None:
+        """Index a grievance row (replacing an earlier version of the same ticket)"""
+        ticket_id = grievance["ticket_id"]
+        doc = self._docs.get(ticket_id)
+        if doc is not None:
+            self._delete(doc)
+        self._append(ticket_id, grievance["user_id"], grievance.get("description") or "", self._codes(grievance))
+
+    def update(self, ticket_id: str, changes: Dict[str, Any]) -> None:
+        """Apply an update to an indexed grievance; unknown tickets are ignored"""
+        doc = self._docs.get(ticket_id)
+        if doc is None:
+            return
+
+        columns = {"category": self._categories, "status": self._statuses, "priority": self._priorities}
+        for field, codes in _FILTER_FIELDS:
+            if changes.get(field) in codes:
+                columns[field][doc] = codes[changes[field]]
+
+        if "description" in changes:
+            user_id = self._users[self._doc_users[doc]]
+            codes = {
+                "category": self._categories[doc],
+                "status": self._statuses[doc],
+                "priority": self._priorities[doc]
+            }
+            self._delete(doc)
+            self._append(ticket_id, user_id, changes["description"] or "", codes)
+
+    def remove(self, ticket_id: str) -> None:
+        doc = self._docs.get(ticket_id)
+        if doc is not None:
+            self._delete(doc)
+
+    def rebuild(self, grievances: Iterable[Dict[str, Any]]) -> int:
+        """Replace the index with `grievances`; returns the number indexed"""
+        self.clear()
+        for grievance in grievances:
+            self.add(grievance)
+        return len(self._docs)
+
+    def search(
+        self,
+        query: str,
+        user_id: Optional[str] = None,
+        category: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Tuple[str, float]]:
+        """
+        Best-matching grievances for `query`.
+
+        Returns:
+            Up to `limit` (ticket_id, score) pairs, highest score first
+        """
+        count = len(self._docs)
+        if not count:
+            return []
+        # Rarest (highest idf) terms first
+        terms = []
+        for term in set(tokenize(query)):
+            # df from live documents only, the same population as count
+            df = self._df.get(term)
+            if df:
+                postings = self._postings[term]
+                terms.append((math.log(1.0 + (count - df + 0.5) / (df + 0.5)), postings))
+        if not terms:
+            return []
+        terms.sort(key=lambda term: term[0], reverse=True)
+
+        filters = [
+            (values, codes[value])
+            for values, value, codes in (
+                (self._categories, category, _CATEGORY_CODES),
+                (self._statuses, status, _STATUS_CODES),
+                (self._priorities, priority, _PRIORITY_CODES)
+            )
+            if value is not None
+        ]
+        live = self._live
+
+        def accepted(doc: int) -> bool:
+            return live[doc] and not (filters and any(values[doc] != code for values, code in filters))
+
+        if user_id is not None:
+            user_code = self._user_codes.get(user_id)
+            if user_code is None:
+                return []
+            # A user has few grievances: score just those
+            candidates = [doc for doc in self._user_docs[user_code] if accepted(doc)]
+            scores = dict.fromkeys(candidates, 0.0)
+            self._score_candidates(scores, terms, count)
+        else:
+            scores = self._score_all(terms, count, accepted, limit)
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(self._ticket_ids[doc], score) for doc, score in best if score > 0.0]
+
+    def _length_norm(self, count: int) -> Tuple[float, float]:
+        """
+        BM25 scores a term tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length));
+        returns (k1 * (1 - b), k1 * b / average_length) so the denominator is tf + base + scale * length
+        """
+        average_length = self._total_length / count or 1.0
+        return self.k1 * (1.0 - self.b), self.k1 * self.b / average_length
+
+    def _score_candidates(self, scores: Dict[int, float], terms: List[Tuple[float, Tuple[array, array]]], count: int) -> None:
+        """Add the given terms' scores to the documents already in `scores`"""
+        base, scale = self._length_norm(count)
+        k1_plus_1, lengths = self.k1 + 1.0, self._lengths
+        for doc in scores:
+            norm = base + scale * lengths[doc]
+            for idf, (docs, frequencies) in terms:
+                # Posting lists are in document order
+                position = bisect_left(docs, doc)
+                if position < len(docs) and docs[position] == doc:
+                    frequency = frequencies[position]
+                    scores[doc] += idf * frequency * k1_plus_1 / (frequency + norm)
+
+    def _score_all(self, terms: List[Tuple[float, Tuple[array, array]]], count: int, accepted, limit: int) -> Dict[int, float]:
+        """
+        Score every accepted document, MaxScore-style: once the terms left
+        cannot lift an unseen document into the top `limit`, they only
+        update documents already scored.
+        """
+        base, scale = self._length_norm(count)
+        k1_plus_1, lengths = self.k1 + 1.0, self._lengths
+        # A term adds at most idf * (k1 + 1)
+        remaining = [0.0] * (len(terms) + 1)
+        for position in range(len(terms) - 1, -1, -1):
+            remaining[position] = remaining[position + 1] + terms[position][0] * k1_plus_1
+
+        scores: Dict[int, float] = {}
+        for position, (idf, (docs, frequencies)) in enumerate(terms):
+            if len(scores) >= limit and remaining[position] <= heapq.nlargest(limit, scores.values())[-1]:
+                self._score_candidates(scores, terms[position:], count)
+                break
+            for doc, frequency in zip(docs, frequencies):
+                if accepted(doc):
+                    scores[doc] = scores.get(doc, 0.0) + idf * frequency * k1_plus_1 / (
+                        frequency + base + scale * lengths[doc]
+                    )
+        return scores
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "documents": len(self._docs),
+            "deleted": len(self._ticket_ids) - len(self._docs),
+            "terms": len(self._postings),
+            "postings": self._posting_count
+        }
+
+
+grievance_search = GrievanceSearchIndex()
@@ -0,0 +1,227 @@
+"""Incident Clusters - Group near-duplicate grievances into incidents
+
+During an outage many users file nearly the same complaint ("no power
+since 2 hours in Sector 4"). Each grievance description is reduced to a
+MinHash signature of its word shingles; signatures are banded into an
+LSH table partitioned by (category, location), so a new grievance is
+compared only with the few incidents that share a band with it, not
+with every open grievance.
+
+Incidents that receive no new grievance for INCIDENT_WINDOW_SECONDS are
+dropped, and at most INCIDENT_MAX_CLUSTERS are kept (least recently
+active first out).
+"""
+import random
+import re
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+
+_WORD = re.compile(r"[a-z]+")
+_STOPWORDS = frozenset(
+    "a an and are at be by for from has have i in is it my of on or our please since "
+    "the there this to was we with".split()
+)
+_MERSENNE_PRIME = (1 << 31) - 1  # keeps the products within machine-word-sized ints
+
+Partition = Tuple[str, Optional[str]]  # (category, location)
+
+
+def shingles(text: str) -> Set[int]:
+    """Hashed word unigrams and bigrams, ignoring numbers and stopwords"""
+    words = [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+    grams = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+    return {zlib.crc32(gram.encode()) for gram in grams}
+
+
+@dataclass
+class Incident:
+    incident_id: str
+    category: str
+    location: Optional[str]
+    signature: Tuple[int, ...]  # of the first grievance
+    bucket_keys: List[Tuple]
+    first_seen: float
+    last_seen: float
+    tickets: Dict[str, str] = field(default_factory=dict)  # ticket_id -> user_id
+
+    @property
+    def size(self) -> int:
+        return len(self.tickets)
+
+
+class IncidentIndex:
+    """
+    Incremental MinHash/LSH index of active incidents.
+
+    A signature of `bands * rows` hash values is split into `bands` bands;
+    two descriptions share at least one band with high probability when
+    their Jaccard similarity is above about (1 / bands) ** (1 / rows).
+    A candidate incident is joined if the estimated similarity to its
+    first grievance reaches `threshold`.
+
+    Usage:
+        incident_id = incident_index.add(ticket_id, user_id, description, category, location)
+    """
+
+    def __init__(
+        self,
+        bands: int,
+        rows: int,
+        threshold: float,
+        window: float,
+        max_clusters: int,
+        seed: int = 1
+    ):
+        self.bands = bands
+        self.rows = rows
+        self.threshold = threshold
+        self.window = window
+        self.max_clusters = max_clusters
+        rng = random.Random(seed)
+        self._hashes = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(_MERSENNE_PRIME))
+            for _ in range(bands * rows)
+        ]
+        # incident_id -> Incident, least recently active first
+        self._incidents: "OrderedDict[str, Incident]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[str]] = {}
+        self.created = 0
+        self.attached = 0
+        self.expired = 0
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        """MinHash signature of `text`, or None if it has no usable words"""
+        values = shingles(text)
+        if not values:
+            return None
+        # All hashes of one shingle per row, then the column-wise minimum
+        rows = [[(a * value + b) % _MERSENNE_PRIME for a, b in self._hashes] for value in values]
+        return tuple(map(min, *rows)) if len(rows) > 1 else tuple(rows[0])
+
+    def _bucket_keys(self, partition: Partition, signature: Tuple[int, ...]) -> List[Tuple]:
+        rows = self.rows
+        return [
+            (partition, band, signature[band * rows:(band + 1) * rows])
+            for band in range(self.bands)
+        ]
+
+    def _similarity(self, first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        return sum(a == b for a, b in zip(first, second)) / len(first)
+
+    def add(
+        self,
+        ticket_id: str,
+        user_id: str,
+        description: str,
+        category: str,
+        location: Optional[str] = None,
+        now: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Attach a grievance to the most similar active incident in its
+        (category, location) partition, or start a new incident.
+
+        Returns:
+            The incident ID, or None if the description has no usable words
+        """
+        now = time.time() if now is None else now
+        self._expire(now)
+
+        signature = self.signature(description)
+        if signature is None:
+            return None
+        partition = (category, location)
+        bucket_keys = self._bucket_keys(partition, signature)
+
+        candidates: Set[str] = set()
+        for key in bucket_keys:
+            candidates.update(self._buckets.get(key, ()))
+
+        best, best_similarity = None, self.threshold
+        for incident_id in candidates:
+            incident = self._incidents[incident_id]
+            similarity = self._similarity(signature, incident.signature)
+            if similarity >= best_similarity:
+                best, best_similarity = incident, similarity
+
+        if best is not None:
+            best.tickets[ticket_id] = user_id
+            best.last_seen = now
+            self._incidents.move_to_end(best.incident_id)
+            self.attached += 1
+            return best.incident_id
+
+        incident = Incident(
+            incident_id=f"INC-{uuid.uuid4().hex[:8].upper()}",
+            category=category,
+            location=location,
+            signature=signature,
+            bucket_keys=bucket_keys,
+            first_seen=now,
+            last_seen=now,
+            tickets={ticket_id: user_id}
+        )
+        self._incidents[incident.incident_id] = incident
+        for key in bucket_keys:
+            self._buckets.setdefault(key, set()).add(incident.incident_id)
+        self.created += 1
+        self._expire(now)
+        return incident.incident_id
+
+    def _remove(self, incident: Incident) -> None:
+        del self._incidents[incident.incident_id]
+        for key in incident.bucket_keys:
+            bucket = self._buckets[key]
+            bucket.discard(incident.incident_id)
+            if not bucket:
+                del self._buckets[key]
+
+    def _expire(self, now: float) -> None:
+        """Drop incidents idle past the window, and the least active beyond max_clusters"""
+        while self._incidents:
+            incident = next(iter(self._incidents.values()))
+            if now - incident.last_seen < self.window and len(self._incidents) <= self.max_clusters:
+                break
+            self._remove(incident)
+            self.expired += 1
+
+    def active(
+        self,
+        category: Optional[str] = None,
+        min_size: int = 1,
+        now: Optional[float] = None
+    ) -> List[Incident]:
+        """Active incidents, largest first"""
+        now = time.time() if now is None else now
+        self._expire(now)
+        incidents = [
+            incident for incident in self._incidents.values()
+            if incident.size >= min_size and (category is None or incident.category == category)
+        ]
+        incidents.sort(key=lambda incident: (incident.size, incident.last_seen), reverse=True)
+        return incidents
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "incidents": len(self._incidents),
+            "buckets": len(self._buckets),
+            "created": self.created,
+            "attached": self.attached,
+            "expired": self.expired
+        }
+
+
+incident_index = IncidentIndex(
+    bands=settings.INCIDENT_LSH_BANDS,
+    rows=settings.INCIDENT_LSH_ROWS,
+    threshold=settings.INCIDENT_SIMILARITY_THRESHOLD,
+    window=settings.INCIDENT_WINDOW_SECONDS,
+    max_clusters=settings.INCIDENT_MAX_CLUSTERS
+)
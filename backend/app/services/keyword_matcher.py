@@ -0,0 +1,62 @@
+"""Keyword Matcher - Single-pass, word-bounded matching of a keyword table
+
+All keywords are folded into one regular expression shaped like a trie
+(shared prefixes are matched once), so the text is scanned once by the
+C regex engine however many keywords there are, instead of one substring
+search per keyword.
+"""
+import re
+from typing import Any, Dict, Iterable
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    """Regex alternation equivalent to a trie of `keywords`; longer keywords win"""
+    trie: Dict[str, Any] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end of a keyword
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds which keywords of a table occur in a text as whole words.
+    Keywords are expected to start and end with a word character.
+
+    Matching is case-insensitive, a space in a keyword matches any run of
+    whitespace, and matches are leftmost-longest and non-overlapping.
+
+    Usage:
+        matcher = KeywordMatcher({"fire": 1.0, "no water": 0.5})
+        matcher.find("Fire in the building")  # {"fire": 1.0}
+    """
+
+    def __init__(self, keywords: Dict[str, Any]):
+        self.keywords = {" ".join(keyword.lower().split()): value for keyword, value in keywords.items()}
+        # Matched against lowercased text: cheaper than re.IGNORECASE
+        self._pattern = re.compile(
+            r"\b(?:" + _trie_pattern(self.keywords) + r")\b"
+        ) if self.keywords else None
+
+    def find(self, text: str) -> Dict[str, Any]:
+        """Distinct keywords found in `text`, with their table values"""
+        if self._pattern is None:
+            return {}
+        found = {}
+        for match in self._pattern.findall(text.lower()):
+            keyword = match if match in self.keywords else " ".join(match.split())
+            found[keyword] = self.keywords[keyword]
+        return found
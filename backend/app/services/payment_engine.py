@@ -1,8 +1,10 @@
 """Payment Engine Service - Handles payment processing"""
 import uuid
 from datetime import datetime
-from typing import Optional, List
+from typing import List
 from app.core.database import mock_db
+from app.core.timestamps import utc_now
+from app.services.supabase_db import invalidate_user_data
 from app.models import (
     PaymentStatus,
     PaymentMethod,
@@ -39,6 +41,7 @@ class PaymentEngine:
 
         # Create transaction record
         transaction = {
+            "id": str(uuid.uuid4()),
             "transaction_id": transaction_id,
             "order_id": order_id,
             "user_id": user_id,
@@ -46,69 +49,29 @@ class PaymentEngine:
             "bill_ids": request.bill_ids,
             "payment_method": request.payment_method.value,
             "status": PaymentStatus.PENDING.value,
-            "created_at": datetime.now().isoformat()
+            "created_at": utc_now()
         }
 
-        mock_db["transactions"].append(transaction)
+        mock_db["transactions"].insert(transaction)
+        invalidate_user_data(user_id, "transactions")
 
         return PaymentResponse(
             transaction_id=transaction_id,
             order_id=order_id,
             amount=request.amount,
             status=PaymentStatus.PENDING,
-            created_at=datetime.now()
-        )
-
-    @staticmethod
-    async def verify_payment(
-        order_id: str,
-        payment_id: str
-    ) -> Optional[PaymentResponse]:
-        """
-        Verify payment completion
-        In mock mode, auto-successes for demo
-        """
-        # Find transaction
-        transaction = None
-        for txn in mock_db["transactions"]:
-            if txn["order_id"] == order_id:
-                transaction = txn
-                break
-
-        if not transaction:
-            return None
-
-        # Update transaction status (mock: always success)
-        transaction["status"] = PaymentStatus.SUCCESS.value
-        transaction["payment_id"] = payment_id
-        transaction["verified_at"] = datetime.now().isoformat()
-
-        # Mark bills as paid
-        for bill in mock_db["bills"]:
-            if bill["id"] in transaction["bill_ids"]:
-                bill["status"] = "PAID"
-
-        return PaymentResponse(
-            transaction_id=transaction["transaction_id"],
-            order_id=transaction["order_id"],
-            amount=transaction["amount"],
-            status=PaymentStatus.SUCCESS,
-            created_at=datetime.fromisoformat(transaction["created_at"])
+            created_at=transaction["created_at"]
         )
 
     @staticmethod
     def _get_current_time() -> datetime:
         """Get current time"""
-        return datetime.now()
+        return utc_now()
 
     @staticmethod
     async def get_user_transactions(user_id: str) -> List[dict]:
         """Get all transactions for a user"""
-        user_transactions = [
-            txn for txn in mock_db["transactions"]
-            if txn.get("user_id") == user_id
-        ]
-        return user_transactions
+        return mock_db["transactions"].find("user_id", user_id)
 
 
 payment_engine = PaymentEngine()
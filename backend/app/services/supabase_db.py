@@ -2,16 +2,158 @@
 
 This module provides functions to interact with Supabase database.
 When MOCK_MODE is enabled or Supabase is unavailable, it falls back to in-memory mock data.
+
+supabase-py is synchronous, so every query goes through run_query(), which
+executes it on the bounded database executor instead of the event loop.
 """
-from typing import Optional, List, Dict, Any
-from datetime import datetime
+import asyncio
+from typing import Optional, List, Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
+from datetime import date, datetime, timedelta
+from app.core.broadcaster import broadcaster, user_topic
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.database import get_supabase, get_supabase_admin, mock_db
+from app.core.database import get_supabase_pool, run_query, run_with_client, mock_db
+from app.core.pagination import Cursor, cursor_key, decode_cursor, encode_cursor
+from app.core.timestamps import decode_row, decode_rows, encode_row, utc_now
+from app.core.versions import user_versions
+from app.services.billing_aggregates import BillingAggregate, billing_aggregates
+from app.services.grievance_search import grievance_search
 
 
 def _should_use_mock() -> bool:
     """Check if we should use mock mode"""
-    return settings.MOCK_MODE or not get_supabase()
+    return settings.MOCK_MODE or get_supabase_pool() is None
+
+
+# ==========================================
+# PER-USER READ-THROUGH CACHE
+# ==========================================
+# Per-user list reads, keyed by (resource, user_id). The write functions
+# below invalidate exactly the resources they touch and bump the user's
+# version of the table, which listing ETags are derived from; the TTL
+# bounds staleness from writes made by other workers.
+USER_RESOURCES_BY_TABLE = {
+    "bills": ("bills", "pending_bills"),
+    "grievances": ("grievances",),
+    "transactions": ("transactions",),
+}
+
+_user_data_cache = TTLCache(
+    maxsize=settings.USER_DATA_CACHE_MAX_ENTRIES,
+    ttl=settings.USER_DATA_CACHE_TTL_SECONDS
+)
+
+
+async def _read_through(
+    resource: str,
+    user_id: str,
+    loader: Callable[[str], Awaitable[Optional[List[Dict]]]]
+) -> List[Dict]:
+    """Serve a per-user list from the cache, loading it on a miss.
+    A loader returns None when the backend failed; that result is not cached."""
+    key = (resource, user_id)
+    rows = _user_data_cache.get(key)
+    if rows is None:
+        rows = await loader(user_id)
+        if rows is None:
+            return []
+        _user_data_cache.set(key, rows)
+    return list(rows)
+
+
+def invalidate_user_data(user_id: Optional[str], table: str) -> None:
+    """Drop a user's cached lists derived from `table` after a write, bump
+    its version and tell the user's event subscribers that it changed"""
+    if not user_id:
+        return
+    for resource in USER_RESOURCES_BY_TABLE.get(table, ()):
+        _user_data_cache.pop((resource, user_id))
+    user_versions.bump(table, user_id)
+    broadcaster.publish([user_topic(user_id)], "user_data", {"resource": table})
+
+
+def get_user_data_cache_stats() -> Dict[str, int]:
+    """Hit, miss and eviction counters for the per-user cache"""
+    return _user_data_cache.stats
+
+
+# ==========================================
+# KEYSET-PAGINATED LISTINGS
+# ==========================================
+# Per-user listings newest first on (created_at, id). Pages are fetched
+# with the cursor as a range condition, so they cost the same however
+# deep into a user's history they are.
+
+
+async def _load_page(table: str, user_id: Optional[str], limit: int, after: Optional[Cursor]) -> Optional[List[Dict]]:
+    """Up to `limit` of the user's rows (every user's if user_id is None, via
+    the service key) strictly after `after` in listing order.
+    Returns None when the backend failed."""
+    # Try mock mode first
+    mock_rows = mock_db[table].find("user_id", user_id) if user_id is not None else list(mock_db[table])
+    if mock_rows:
+        mock_rows.sort(key=cursor_key, reverse=True)
+        if after is not None:
+            mock_rows = [row for row in mock_rows if cursor_key(row) < after]
+        return mock_rows[:limit]
+
+    # Try Supabase if available
+    if not _should_use_mock():
+        def build(q):
+            q = q.select("*")
+            if user_id is not None:
+                q = q.eq("user_id", user_id)
+            if after is not None:
+                created_at, row_id = after
+                q = q.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")')
+            return q.order("created_at", desc=True).order("id", desc=True).range(0, limit - 1)
+
+        try:
+            response = await run_query(table, build, admin=user_id is None)
+            return response.data
+        except Exception as e:
+            print(f"Error loading {table} page: {str(e)}")
+            return None
+
+    return []
+
+
+async def get_user_rows_page(
+    table: str,
+    user_id: str,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Get one page of a user's bills, grievances or transactions.
+
+    Returns:
+        (rows, cursor for the next page or None on the last page)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    after = decode_cursor(cursor) if cursor else None
+    # One extra row tells us whether another page follows
+    rows = await _load_page(table, user_id, limit + 1, after) or []
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
+
+
+async def iter_user_rows(table: str, user_id: Optional[str], batch_size: int) -> AsyncIterator[Dict]:
+    """Yield all of a user's rows (every user's if user_id is None) in listing
+    order, fetching `batch_size` at a time"""
+    after: Optional[Cursor] = None
+    while True:
+        rows = await _load_page(table, user_id, batch_size, after)
+        if not rows:
+            return
+        for row in rows:
+            yield row
+        if len(rows) < batch_size:
+            return
+        after = cursor_key(rows[-1])
 
 
 # ==========================================
@@ -20,20 +162,18 @@ def _should_use_mock() -> bool:
 async def get_user_by_email(email: str) -> Optional[Dict]:
     """Get user by email address"""
     # Try mock mode first
-    for user_data in mock_db["users"].values():
-        if user_data.get("email") == email or user_data.get("phone") == email:
-            return user_data
+    user_data = mock_db["users"].find_one("email", email) or mock_db["users"].find_one("phone", email)
+    if user_data:
+        return user_data
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("users").select("*").eq("email", email).execute()
-                if response.data:
-                    return response.data[0]
-            except Exception:
-                pass  # Fall back to mock
+        try:
+            response = await run_query("users", lambda q: q.select("*").eq("email", email))
+            if response.data:
+                return response.data[0]
+        except Exception:
+            pass  # Fall back to mock
 
     return None
 
@@ -50,22 +190,20 @@ async def create_user(email: str, full_name: Optional[str] = None, consumer_id:
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase_admin()
-        if supabase:
-            try:
-                user_data = {
-                    "email": email,
-                    "phone": phone,
-                    "full_name": full_name,
-                    "consumer_id": consumer_id,
-                    "user_type": "consumer",
-                    "language_preference": "en"
-                }
-                response = supabase.table("users").insert(user_data).execute()
-                if response.data:
-                    return response.data[0]
-            except Exception:
-                pass  # Fall back to mock
+        try:
+            user_data = {
+                "email": email,
+                "phone": phone,
+                "full_name": full_name,
+                "consumer_id": consumer_id,
+                "user_type": "consumer",
+                "language_preference": "en"
+            }
+            response = await run_query("users", lambda q: q.insert(encode_row(user_data)), admin=True)
+            if response.data:
+                return response.data[0]
+        except Exception:
+            pass  # Fall back to mock
 
     # Fall back to mock mode
     user_id = str(uuid.uuid4())
@@ -78,29 +216,27 @@ async def create_user(email: str, full_name: Optional[str] = None, consumer_id:
         "consumer_id": consumer_id,
         "user_type": "consumer",
         "language_preference": "en",
-        "created_at": datetime.now().isoformat()
+        "created_at": utc_now()
     }
-    mock_db["users"][email] = user
+    mock_db["users"].insert(user)
     return user
 
 
 async def get_user_by_id(user_id: str) -> Optional[Dict]:
     """Get user by ID"""
     # Try mock mode first
-    for user_data in mock_db["users"].values():
-        if user_data["id"] == user_id:
-            return user_data
+    user_data = mock_db["users"].get(user_id)
+    if user_data:
+        return user_data
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("users").select("*").eq("id", user_id).execute()
-                if response.data:
-                    return response.data[0]
-            except Exception:
-                pass
+        try:
+            response = await run_query("users", lambda q: q.select("*").eq("id", user_id))
+            if response.data:
+                return response.data[0]
+        except Exception:
+            pass
 
     return None
 
@@ -110,99 +246,228 @@ async def get_user_by_id(user_id: str) -> Optional[Dict]:
 # ==========================================
 async def get_user_bills(user_id: str) -> List[Dict]:
     """Get all bills for a user"""
+    return await _read_through("bills", user_id, _load_bills)
+
+
+async def _load_bills(user_id: str) -> Optional[List[Dict]]:
     # Try mock mode first
-    mock_bills = [bill for bill in mock_db["bills"] if bill["user_id"] == user_id]
+    mock_bills = mock_db["bills"].find("user_id", user_id)
     if mock_bills:
         return mock_bills
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("bills").select("*").eq("user_id", user_id).execute()
-                if response.data:
-                    return response.data
-            except Exception:
-                pass
+        try:
+            response = await run_query("bills", lambda q: q.select("*").eq("user_id", user_id))
+            return response.data
+        except Exception:
+            return None
 
     return mock_bills
 
 
 async def get_user_pending_bills(user_id: str) -> List[Dict]:
     """Get pending bills for a user"""
+    return await _read_through("pending_bills", user_id, _load_pending_bills)
+
+
+async def _load_pending_bills(user_id: str) -> Optional[List[Dict]]:
     # Try mock mode first
-    mock_pending = [bill for bill in mock_db["bills"]
-                    if bill["user_id"] == user_id and bill["status"] == "PENDING"]
+    mock_pending = mock_db["bills"].find(("user_id", "status"), (user_id, "PENDING"))
     if mock_pending:
         return mock_pending
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("bills").select("*").eq("user_id", user_id).eq("status", "PENDING").execute()
-                if response.data:
-                    return response.data
-            except Exception:
-                pass
+        try:
+            response = await run_query("bills", lambda q: q.select("*").eq("user_id", user_id).eq("status", "PENDING"))
+            return response.data
+        except Exception:
+            return None
 
     return mock_pending
 
 
+async def get_bill_by_id(bill_id: str, user_id: str) -> Optional[Dict]:
+    """Get a single bill by ID, scoped to its owner"""
+    # Try mock mode first
+    bill = mock_db["bills"].get(bill_id)
+    if bill and bill["user_id"] == user_id:
+        return bill
+
+    # Try Supabase if available
+    if not _should_use_mock():
+        try:
+            response = await run_query("bills", lambda q: q.select("*").eq("id", bill_id).eq("user_id", user_id).limit(1))
+            if response.data:
+                return response.data[0]
+        except Exception:
+            pass
+
+    return None
+
+
 async def update_bill_status(bill_id: str, status: str) -> bool:
     """Update bill status (e.g., mark as paid)"""
     # Try mock mode first
-    for bill in mock_db["bills"]:
-        if bill["id"] == bill_id:
-            bill["status"] = status
-            if status == "PAID":
-                bill["paid_at"] = datetime.now().isoformat()
-            return True
+    if bill_id in mock_db["bills"]:
+        changes = {"status": status}
+        if status == "PAID":
+            changes["paid_at"] = utc_now()
+        bill = mock_db["bills"].update(bill_id, changes)
+        invalidate_user_data(bill["user_id"], "bills")
+        billing_aggregates.bill_updated(bill)
+        return True
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase_admin()
-        if supabase:
-            try:
-                update_data = {"status": status}
-                if status == "PAID":
-                    update_data["paid_at"] = datetime.now().isoformat()
-                response = supabase.table("bills").update(update_data).eq("id", bill_id).execute()
-                if response.data:
-                    return True
-            except Exception:
-                pass
+        try:
+            update_data = {"status": status}
+            if status == "PAID":
+                update_data["paid_at"] = utc_now().isoformat()
+            response = await run_query("bills", lambda q: q.update(update_data).eq("id", bill_id), admin=True)
+            if response.data:
+                invalidate_user_data(response.data[0].get("user_id"), "bills")
+                billing_aggregates.bill_updated(response.data[0])
+                return True
+        except Exception:
+            pass
 
     return False
 
 
+async def settle_bills(bill_ids: List[str], user_id: str, paid_at: Optional[datetime] = None) -> List[Dict]:
+    """
+    Mark all of a user's listed bills PAID in one bulk update.
+    Bills already paid are left alone, so settling again is a no-op.
+    Returns the bills that were settled.
+    """
+    changes = {"status": "PAID", "paid_at": paid_at or utc_now()}
+
+    # Try mock mode first
+    settled = _settle_mock_bills(bill_ids, user_id, changes)
+    if not settled and bill_ids and not _should_use_mock():
+        # Try Supabase if available
+        try:
+            response = await run_query(
+                "bills",
+                lambda q: q.update(encode_row(changes)).in_("id", list(set(bill_ids))).eq("user_id", user_id).neq("status", "PAID"),
+                admin=True
+            )
+            settled = response.data or []
+        except Exception as e:
+            print(f"Error settling bills: {str(e)}")
+            raise
+
+    _bills_settled(user_id, settled)
+    return settled
+
+
+def _settle_mock_bills(bill_ids: List[str], user_id: str, changes: Dict) -> List[Dict]:
+    """Apply `changes` to the user's listed mock bills that are not PAID yet"""
+    mock_ids = []
+    for bill_id in set(bill_ids):
+        bill = mock_db["bills"].get(bill_id)
+        if bill and bill["user_id"] == user_id and bill["status"] != "PAID":
+            mock_ids.append(bill_id)
+    return mock_db["bills"].update_many(mock_ids, changes) if mock_ids else []
+
+
+def _bills_settled(user_id: str, settled: List[Dict]) -> None:
+    if settled:
+        invalidate_user_data(user_id, "bills")
+        for bill in settled:
+            billing_aggregates.bill_updated(bill)
+
+
 async def create_bill(bill_data: Dict) -> Dict:
     """Create a new bill"""
     import uuid
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase_admin()
-        if supabase:
-            try:
-                response = supabase.table("bills").insert(bill_data).execute()
-                if response.data:
-                    return response.data[0]
-            except Exception:
-                pass
+        try:
+            response = await run_query("bills", lambda q: q.insert(encode_row(bill_data)), admin=True)
+            if response.data:
+                invalidate_user_data(bill_data.get("user_id"), "bills")
+                billing_aggregates.bill_created(response.data[0])
+                return response.data[0]
+        except Exception:
+            pass
 
     # Fall back to mock mode
-    bill = {
+    bill = decode_row({
         "id": str(uuid.uuid4()),
         **bill_data,
-        "created_at": datetime.now().isoformat()
-    }
-    mock_db["bills"].append(bill)
+        "created_at": utc_now()
+    })
+    mock_db["bills"].insert(bill)
+    invalidate_user_data(bill.get("user_id"), "bills")
+    billing_aggregates.bill_created(bill)
     return bill
 
 
+async def get_user_billing_aggregate(user_id: str, due_soon_until: Optional[date] = None) -> BillingAggregate:
+    """
+    Get the user's pending-bill aggregate, seeding it on first use.
+    Its due_before() is complete up to `due_soon_until`
+    (default: BILLING_DUE_SOON_DAYS from now).
+    """
+    if due_soon_until is None:
+        due_soon_until = (utc_now() + timedelta(days=settings.BILLING_DUE_SOON_DAYS)).date()
+    return await billing_aggregates.get(user_id, due_soon_until, _load_billing_aggregate)
+
+
+async def _load_billing_aggregate(user_id: str, horizon: date) -> Optional[BillingAggregate]:
+    """Seed an aggregate from pending-bill totals and the pending bills due by `horizon`"""
+    # Try mock mode first
+    mock_pending = mock_db["bills"].find(("user_id", "status"), (user_id, "PENDING"))
+    if mock_pending:
+        totals: Dict[str, List[float]] = {}
+        for bill in mock_pending:
+            service_totals = totals.setdefault(bill["service_type"], [0, 0.0])
+            service_totals[0] += 1
+            service_totals[1] += float(bill["amount_due"])
+        due_bills = mock_db["bills"].find_range(
+            ("user_id", "status"), (user_id, "PENDING"), "due_date", upper=horizon
+        )
+        return BillingAggregate.seed(totals, due_bills, horizon)
+
+    # Try Supabase if available: totals are summed server-side, and only
+    # the bills due by the horizon are fetched, already in due-date order
+    if not _should_use_mock():
+        try:
+            totals_response, due_response = await asyncio.gather(
+                run_with_client(
+                    lambda client: client.rpc("get_pending_bill_totals", {"p_user_id": user_id}).execute(),
+                    limit_key="bills"
+                ),
+                run_query(
+                    "bills",
+                    lambda q: q.select("*")
+                    .eq("user_id", user_id)
+                    .eq("status", "PENDING")
+                    .lte("due_date", horizon.isoformat())
+                    .order("due_date")
+                )
+            )
+            totals = {
+                row["service_type"]: (int(row["bill_count"]), row["amount_due"])
+                for row in totals_response.data or []
+            }
+            return BillingAggregate.seed(totals, due_response.data or [], horizon)
+        except Exception as e:
+            print(f"Error loading billing aggregate: {str(e)}")
+            return None
+
+    return BillingAggregate.seed({}, [], horizon)
+
+
+def get_billing_aggregate_stats() -> Dict[str, int]:
+    """Hit, miss and eviction counters for the billing aggregates"""
+    return billing_aggregates.stats
+
+
 # ==========================================
 # GRIEVANCES
 # ==========================================
@@ -212,42 +477,45 @@ async def create_grievance(grievance_data: Dict) -> Dict:
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("grievances").insert(grievance_data).execute()
-                if response.data:
-                    return response.data[0]
-            except Exception:
-                pass
+        try:
+            response = await run_query("grievances", lambda q: q.insert(encode_row(grievance_data)))
+            if response.data:
+                invalidate_user_data(grievance_data.get("user_id"), "grievances")
+                grievance_search.add(response.data[0])
+                return response.data[0]
+        except Exception:
+            pass
 
     # Fall back to mock mode
-    grievance = {
+    grievance = decode_row({
         "id": str(uuid.uuid4()),
         **grievance_data,
-        "created_at": datetime.now().isoformat()
-    }
-    mock_db["grievances"].append(grievance)
+        "created_at": utc_now()
+    })
+    mock_db["grievances"].insert(grievance)
+    invalidate_user_data(grievance.get("user_id"), "grievances")
+    grievance_search.add(grievance)
     return grievance
 
 
 async def get_user_grievances(user_id: str) -> List[Dict]:
     """Get all grievances for a user"""
+    return await _read_through("grievances", user_id, _load_grievances)
+
+
+async def _load_grievances(user_id: str) -> Optional[List[Dict]]:
     # Try mock mode first
-    mock_grievances = [g for g in mock_db["grievances"] if g["user_id"] == user_id]
+    mock_grievances = mock_db["grievances"].find("user_id", user_id)
     if mock_grievances:
         return mock_grievances
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("grievances").select("*").eq("user_id", user_id).execute()
-                if response.data:
-                    return response.data
-            except Exception:
-                pass
+        try:
+            response = await run_query("grievances", lambda q: q.select("*").eq("user_id", user_id))
+            return response.data
+        except Exception:
+            return None
 
     return mock_grievances
 
@@ -255,20 +523,18 @@ async def get_user_grievances(user_id: str) -> List[Dict]:
 async def get_grievance_by_ticket(ticket_id: str, user_id: str) -> Optional[Dict]:
     """Get grievance by ticket ID"""
     # Try mock mode first
-    for g in mock_db["grievances"]:
-        if g["ticket_id"] == ticket_id and g["user_id"] == user_id:
+    for g in mock_db["grievances"].find("ticket_id", ticket_id):
+        if g["user_id"] == user_id:
             return g
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("grievances").select("*").eq("ticket_id", ticket_id).eq("user_id", user_id).execute()
-                if response.data:
-                    return response.data[0]
-            except Exception:
-                pass
+        try:
+            response = await run_query("grievances", lambda q: q.select("*").eq("ticket_id", ticket_id).eq("user_id", user_id))
+            if response.data:
+                return response.data[0]
+        except Exception:
+            pass
 
     return None
 
@@ -276,25 +542,89 @@ async def get_grievance_by_ticket(ticket_id: str, user_id: str) -> Optional[Dict
 async def update_grievance(ticket_id: str, user_id: str, update_data: Dict) -> bool:
     """Update grievance"""
     # Try mock mode first
-    for g in mock_db["grievances"]:
-        if g["ticket_id"] == ticket_id and g["user_id"] == user_id:
-            g.update(update_data)
+    for g in mock_db["grievances"].find("ticket_id", ticket_id):
+        if g["user_id"] == user_id:
+            mock_db["grievances"].update(g["id"], decode_row(dict(update_data)))
+            invalidate_user_data(user_id, "grievances")
+            grievance_search.update(ticket_id, update_data)
             return True
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("grievances").update(update_data).eq("ticket_id", ticket_id).eq("user_id", user_id).execute()
-                if response.data:
-                    return True
-            except Exception:
-                pass
+        try:
+            response = await run_query("grievances", lambda q: q.update(encode_row(update_data)).eq("ticket_id", ticket_id).eq("user_id", user_id))
+            if response.data:
+                invalidate_user_data(user_id, "grievances")
+                grievance_search.update(ticket_id, update_data)
+                return True
+        except Exception:
+            pass
 
     return False
 
 
+async def get_unenriched_grievances(before: datetime, limit: int) -> List[Dict]:
+    """Grievances created before `before` whose enrichment never completed, oldest first"""
+    # Try mock mode first
+    mock_grievances = [g for g in mock_db["grievances"] if g.get("enriched_at") is None and g["created_at"] < before]
+    if mock_grievances:
+        mock_grievances.sort(key=lambda g: g["created_at"])
+        return mock_grievances[:limit]
+
+    # Try Supabase if available
+    if not _should_use_mock():
+        try:
+            response = await run_query(
+                "grievances",
+                lambda q: q.select("ticket_id,user_id,description,category,created_at")
+                .is_("enriched_at", "null")
+                .lt("created_at", before.isoformat())
+                .order("created_at")
+                .limit(limit),
+                admin=True
+            )
+            return response.data or []
+        except Exception as e:
+            print(f"Error loading unenriched grievances: {str(e)}")
+
+    return []
+
+
+async def rebuild_grievance_search(batch_size: int = 1000) -> int:
+    """Re-index every grievance; returns the number indexed"""
+    grievance_search.clear()
+    async for row in iter_user_rows("grievances", None, batch_size):
+        grievance_search.add(row)
+    return grievance_search.stats["documents"]
+
+
+async def search_grievances(
+    query: str,
+    user_id: str,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    limit: int = 20
+) -> List[Tuple[Dict, float]]:
+    """
+    Full-text search over a user's grievance descriptions, BM25-ranked
+
+    Returns:
+        (grievance, score) pairs, best match first
+    """
+    hits = grievance_search.search(query, user_id, category, status, priority, limit)
+    if not hits:
+        return []
+
+    by_ticket = {g["ticket_id"]: g for g in await get_user_grievances(user_id)}
+    return [(by_ticket[ticket_id], score) for ticket_id, score in hits if ticket_id in by_ticket]
+
+
+def get_grievance_search_stats() -> Dict[str, int]:
+    """Size of the grievance search index"""
+    return grievance_search.stats
+
+
 # ==========================================
 # TRANSACTIONS
 # ==========================================
@@ -304,73 +634,142 @@ async def create_transaction(transaction_data: Dict) -> Dict:
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("transactions").insert(transaction_data).execute()
-                if response.data:
-                    return response.data[0]
-            except Exception:
-                pass
+        try:
+            response = await run_query("transactions", lambda q: q.insert(encode_row(transaction_data)))
+            if response.data:
+                invalidate_user_data(transaction_data.get("user_id"), "transactions")
+                return response.data[0]
+        except Exception:
+            pass
 
     # Fall back to mock mode
-    transaction = {
+    transaction = decode_row({
         "id": str(uuid.uuid4()),
         **transaction_data,
-        "created_at": datetime.now().isoformat()
-    }
-    mock_db["transactions"].append(transaction)
+        "created_at": utc_now()
+    })
+    mock_db["transactions"].insert(transaction)
+    invalidate_user_data(transaction.get("user_id"), "transactions")
     return transaction
 
 
 async def get_user_transactions(user_id: str) -> List[Dict]:
     """Get all transactions for a user"""
+    return await _read_through("transactions", user_id, _load_transactions)
+
+
+async def _load_transactions(user_id: str) -> Optional[List[Dict]]:
     # Try mock mode first
-    mock_transactions = [t for t in mock_db["transactions"] if t["user_id"] == user_id]
+    mock_transactions = mock_db["transactions"].find("user_id", user_id)
     if mock_transactions:
         return mock_transactions
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("transactions").select("*").eq("user_id", user_id).execute()
-                if response.data:
-                    return response.data
-            except Exception:
-                pass
+        try:
+            response = await run_query("transactions", lambda q: q.select("*").eq("user_id", user_id))
+            return response.data
+        except Exception:
+            return None
 
     return mock_transactions
 
 
+async def get_transaction_by_order_id(order_id: str, user_id: str) -> Optional[Dict]:
+    """Get a single transaction by order ID, scoped to its owner"""
+    # Try mock mode first
+    t = mock_db["transactions"].find_one("order_id", order_id)
+    if t and t["user_id"] == user_id:
+        return t
+
+    # Try Supabase if available
+    if not _should_use_mock():
+        try:
+            response = await run_query("transactions", lambda q: q.select("*").eq("order_id", order_id).eq("user_id", user_id).limit(1))
+            if response.data:
+                return response.data[0]
+        except Exception:
+            pass
+
+    return None
+
+
+async def settle_order(order_id: str, user_id: str, payment_id: str) -> Optional[Dict]:
+    """
+    Settle a paid order: mark every bill it covers PAID and the transaction SUCCESS.
+
+    Both writes happen together - in one database transaction through the
+    settle_order() function (supabase/migrations/006_settle_order.sql), or
+    without yielding to other requests in mock mode - so an order is never
+    left half settled. Settling again leaves paid bills alone.
+    Returns the updated transaction, or None if the order was not found.
+    """
+    # Try mock mode first
+    transaction = mock_db["transactions"].find_one("order_id", order_id)
+    if transaction and transaction["user_id"] == user_id:
+        now = utc_now()
+        settled = _settle_mock_bills(transaction.get("bill_ids") or [], user_id, {"status": "PAID", "paid_at": now})
+        transaction = mock_db["transactions"].update(
+            transaction["id"],
+            {"status": "SUCCESS", "payment_id": payment_id, "verified_at": now}
+        )
+        _bills_settled(user_id, settled)
+        invalidate_user_data(user_id, "transactions")
+        return transaction
+
+    # Try Supabase if available
+    if not _should_use_mock():
+        try:
+            response = await run_with_client(
+                lambda client: client.rpc(
+                    "settle_order",
+                    {"p_order_id": order_id, "p_user_id": user_id, "p_payment_id": payment_id}
+                ).execute(),
+                admin=True,
+                limit_key="transactions"
+            )
+        except Exception as e:
+            print(f"Error settling order: {str(e)}")
+            raise
+        if response.data:
+            _bills_settled(user_id, decode_rows(response.data["bills"], "bills"))
+            invalidate_user_data(user_id, "transactions")
+            return decode_rows(response.data["transaction"], "transactions")
+
+    return None
+
+
 async def update_transaction_status(order_id: str, status: str, payment_id: Optional[str] = None) -> bool:
     """Update transaction status after payment verification"""
     # Try mock mode first
-    for t in mock_db["transactions"]:
-        if t["order_id"] == order_id:
-            t["status"] = status
-            if payment_id:
-                t["payment_id"] = payment_id
-            t["verified_at"] = datetime.now().isoformat()
-            return True
+    t = mock_db["transactions"].find_one("order_id", order_id)
+    if t:
+        changes = {
+            "status": status,
+            "verified_at": utc_now()
+        }
+        if payment_id:
+            changes["payment_id"] = payment_id
+        mock_db["transactions"].update(t["id"], changes)
+        invalidate_user_data(t["user_id"], "transactions")
+        return True
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase_admin()
-        if supabase:
-            try:
-                update_data = {
-                    "status": status,
-                    "verified_at": datetime.now().isoformat()
-                }
-                if payment_id:
-                    update_data["payment_id"] = payment_id
-                response = supabase.table("transactions").update(update_data).eq("order_id", order_id).execute()
-                if response.data:
-                    return True
-            except Exception:
-                pass
+        try:
+            update_data = {
+                "status": status,
+                "verified_at": utc_now().isoformat()
+            }
+            if payment_id:
+                update_data["payment_id"] = payment_id
+            response = await run_query("transactions", lambda q: q.update(update_data).eq("order_id", order_id), admin=True)
+            if response.data:
+                for row in response.data:
+                    invalidate_user_data(row.get("user_id"), "transactions")
+                return True
+        except Exception:
+            pass
 
     return False
 
@@ -382,14 +781,12 @@ async def get_active_alerts() -> List[Dict]:
     """Get all active city alerts"""
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("city_alerts").select("*").eq("is_active", True).execute()
-                if response.data:
-                    return response.data
-            except Exception:
-                pass
+        try:
+            response = await run_query("city_alerts", lambda q: q.select("*").eq("is_active", True))
+            if response.data:
+                return response.data
+        except Exception:
+            pass
 
     # Fall back to mock mode (empty list)
     return []
@@ -404,46 +801,46 @@ async def create_meter_reading(reading_data: Dict) -> Dict:
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                response = supabase.table("meter_readings").insert(reading_data).execute()
-                if response.data:
-                    return response.data[0]
-            except Exception:
-                pass
+        try:
+            response = await run_query("meter_readings", lambda q: q.insert(encode_row(reading_data)))
+            if response.data:
+                return response.data[0]
+        except Exception:
+            pass
 
     # Fall back to mock mode
-    reading = {
+    reading = decode_row({
         "id": str(uuid.uuid4()),
         **reading_data,
-        "created_at": datetime.now().isoformat()
-    }
-    mock_db["meter_readings"].append(reading)
+        "created_at": utc_now()
+    })
+    mock_db["meter_readings"].insert(reading)
     return reading
 
 
 async def get_user_meter_readings(user_id: str, service_type: Optional[str] = None) -> List[Dict]:
     """Get meter readings for a user"""
     # Try mock mode first
-    readings = [r for r in mock_db.get("meter_readings", []) if r["user_id"] == user_id]
     if service_type:
-        readings = [r for r in readings if r["service_type"] == service_type]
+        readings = mock_db["meter_readings"].find(("user_id", "service_type"), (user_id, service_type))
+    else:
+        readings = mock_db["meter_readings"].find("user_id", user_id)
     if readings:
         return readings
 
     # Try Supabase if available
     if not _should_use_mock():
-        supabase = get_supabase()
-        if supabase:
-            try:
-                query = supabase.table("meter_readings").select("*").eq("user_id", user_id)
+        try:
+            def build(q):
+                q = q.select("*").eq("user_id", user_id)
                 if service_type:
-                    query = query.eq("service_type", service_type)
-                response = query.execute()
-                if response.data:
-                    return response.data
-            except Exception:
-                pass
+                    q = q.eq("service_type", service_type)
+                return q
+
+            response = await run_query("meter_readings", build)
+            if response.data:
+                return response.data
+        except Exception:
+            pass
 
     return readings
@@ -0,0 +1,166 @@
+"""Grievance Triage - Batch priority, resolution time and entity analysis
+
+Runs the AIProcessor analysis over many descriptions at once. Small
+batches are triaged in-process; larger ones are split into chunks and
+spread over a process pool (the work is pure-Python CPU, so threads would
+serialize on the GIL). Results always come back in input order.
+"""
+import asyncio
+import json
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.models import GrievanceCategory
+from app.services.ai_processor import AIProcessor
+
+# (description, category value); invalid stream input travels as its error dict
+TriageInput = Tuple[str, str]
+TriageItem = Union[TriageInput, Dict[str, Any]]
+
+
+def triage_one(description: str, category: GrievanceCategory) -> Dict[str, Any]:
+    """Priority, estimated resolution and extracted entities for one description"""
+    priority = AIProcessor.analyze_priority(description, category)
+    return {
+        "priority": priority.value,
+        "estimated_resolution": AIProcessor.estimate_resolution_time(priority),
+        "entities": AIProcessor.extract_entities(description)
+    }
+
+
+def _triage_chunk(items: List[TriageItem]) -> List[Dict[str, Any]]:
+    """Triage a chunk (module-level so it can be sent to worker processes)"""
+    return [
+        triage_one(item[0], GrievanceCategory(item[1])) if isinstance(item, tuple) else item
+        for item in items
+    ]
+
+
+def _init_worker(keywords_table: Dict[Any, Dict[str, float]]) -> None:
+    """Give a worker process the parent's current keyword table"""
+    AIProcessor.reload_keywords(keywords_table)
+
+
+class TriagePool:
+    """
+    Process pool for batch triage.
+
+    The pool is started on first use and restarted after the keyword table
+    is reloaded, so workers never classify with a stale table.
+    """
+
+    def __init__(self, workers: int, chunk_size: int, inline_max: int):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.inline_max = inline_max
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._keywords_version = -1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None or self._keywords_version != AIProcessor.keywords_version:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=False)
+            # spawn: forking a process that runs executor and background threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(AIProcessor.keywords_table,)
+            )
+            self._keywords_version = AIProcessor.keywords_version
+        return self._executor
+
+    def _submit(self, chunk: List[TriageItem]) -> "asyncio.Future[List[Dict[str, Any]]]":
+        return asyncio.get_running_loop().run_in_executor(self._get_executor(), _triage_chunk, chunk)
+
+    async def triage(self, items: List[TriageInput]) -> List[Dict[str, Any]]:
+        """Triage a batch, returning one result per item in input order"""
+        if len(items) <= self.inline_max:
+            return _triage_chunk(list(items))
+
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        results = await asyncio.gather(*(self._submit(chunk) for chunk in chunks))
+        return [result for chunk_results in results for result in chunk_results]
+
+    async def triage_stream(self, items: AsyncIterator[TriageItem]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Triage items as they arrive, yielding results chunk by chunk in input
+        order. At most two chunks per worker are in flight, so memory stays
+        flat however long the input is.
+        """
+        max_in_flight = self.workers * 2
+        in_flight: Deque["asyncio.Future[List[Dict[str, Any]]]"] = deque()
+        chunk: List[TriageItem] = []
+        try:
+            async for item in items:
+                chunk.append(item)
+                if len(chunk) >= self.chunk_size:
+                    in_flight.append(self._submit(chunk))
+                    chunk = []
+                    while len(in_flight) >= max_in_flight:
+                        yield await in_flight.popleft()
+            if chunk:
+                in_flight.append(self._submit(chunk))
+            while in_flight:
+                yield await in_flight.popleft()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+async def parse_ndjson_items(chunks: AsyncIterator[bytes]) -> AsyncIterator[TriageItem]:
+    """
+    Parse an NDJSON body of {"description": ..., "category": ...} objects.
+    A line that is not a valid item becomes an error dict in its place.
+    """
+    buffer = b""
+    line_number = 0
+
+    def parse(line: bytes) -> TriageItem:
+        try:
+            data = json.loads(line)
+            category = GrievanceCategory(data.get("category") or GrievanceCategory.OTHER.value)
+            description = data["description"]
+            if not isinstance(description, str):
+                raise ValueError("description must be a string")
+            return (description, category.value)
+        except Exception as e:
+            return {"error": f"Invalid item on line {line_number}: {str(e)}"}
+
+    skipping = False  # inside an over-long line, dropping bytes until its newline
+    async for data in chunks:
+        buffer += data
+        if skipping:
+            if b"\n" not in buffer:
+                buffer = b""
+                continue
+            buffer = buffer.split(b"\n", 1)[1]
+            skipping = False
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield parse(line)
+        if len(buffer) > settings.TRIAGE_MAX_LINE_BYTES:
+            line_number += 1
+            yield {"error": f"Line {line_number} is longer than {settings.TRIAGE_MAX_LINE_BYTES} bytes"}
+            buffer = b""
+            skipping = True
+    if buffer.strip() and not skipping:
+        line_number += 1
+        yield parse(buffer)
+
+
+triage_pool = TriagePool(
+    workers=settings.TRIAGE_WORKERS,
+    chunk_size=settings.TRIAGE_CHUNK_SIZE,
+    inline_max=settings.TRIAGE_INLINE_MAX
+)
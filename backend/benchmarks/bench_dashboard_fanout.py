@@ -0,0 +1,113 @@
+"""Benchmark - /dashboard/summary sequential vs. concurrent section loading
+
+Serves bills, pending-bill totals, city_alerts and grievances from a
+local PostgREST stand-in with injected delay and reports p50/p99 of the
+summary handler. A second run makes city_alerts slower than DASHBOARD_SECTION_TIMEOUT_SECONDS to
+show the partial response path.
+
+    python -m benchmarks.bench_dashboard_fanout [--iterations 50] [--delay-ms 30]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from functools import partial
+from typing import List
+
+from jose import jwt
+
+from benchmarks.standin import SupabaseStandIn, percentile
+
+
+async def _measure(handler, user_ids: List[str]) -> List[float]:
+    samples = []
+    for user_id in user_ids:
+        started = time.perf_counter()
+        await handler(user_id=user_id)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(name: str, samples: List[float]) -> None:
+    print(
+        f"{name:<12} n={len(samples):<5} "
+        f"p50={percentile(samples, 50):8.2f} ms  p99={percentile(samples, 99):8.2f} ms"
+    )
+
+
+async def main(iterations: int, delay_ms: float) -> None:
+    with SupabaseStandIn(delay=delay_ms / 1000) as standin:
+        # Fresh users per request so the per-user read-through cache never hits
+        user_ids = [str(uuid.uuid4()) for _ in range(iterations * 3)]
+        standin.tables["bills"] = [
+            {"id": str(uuid.uuid4()), "user_id": user_id, "service_type": "electricity",
+             "amount_due": 1850.0, "status": "PENDING", "due_date": "2024-01-31"}
+            for user_id in user_ids
+        ]
+        standin.tables["grievances"] = [
+            {"id": str(uuid.uuid4()), "ticket_id": f"GRV-{n:08X}", "user_id": user_id,
+             "category": "POWER_OUTAGE", "description": "No power", "status": "OPEN",
+             "priority": "HIGH"}
+            for n, user_id in enumerate(user_ids)
+        ]
+        standin.rpc_handlers["get_pending_bill_totals"] = lambda args: [
+            {"service_type": "electricity", "bill_count": 1, "amount_due": 1850.0}
+        ]
+        standin.tables["city_alerts"] = [
+            {"id": str(uuid.uuid4()), "title": "Scheduled Maintenance", "content": "...",
+             "priority": "MEDIUM", "is_active": True}
+        ]
+
+        # Settings are read at import time, so configure the environment first
+        os.environ["SUPABASE_URL"] = standin.url
+        os.environ["SUPABASE_KEY"] = jwt.encode({"role": "anon"}, "bench")
+        os.environ["SUPABASE_SERVICE_KEY"] = jwt.encode({"role": "service_role"}, "bench")
+        os.environ["MOCK_MODE"] = "false"
+
+        from app.core.config import settings
+        from app.core.database import shutdown_db_executor, close_supabase_pools
+        from fastapi import Request
+        from app.routers.dashboard import get_dashboard_summary
+        from app.services.supabase_db import (
+            get_user_pending_bills,
+            get_active_alerts,
+            get_user_grievances
+        )
+
+        async def sequential_summary(user_id: str):
+            """The summary's data loading as it was: one round trip after another"""
+            await get_user_pending_bills(user_id)
+            await get_active_alerts()
+            await get_user_grievances(user_id)
+
+        # A request without If-None-Match, so every call builds the summary
+        summary_handler = partial(get_dashboard_summary, Request({"type": "http", "headers": []}))
+        await summary_handler(user_id=str(uuid.uuid4()))  # warm-up
+
+        print(f"stand-in delay {delay_ms} ms per request")
+        _report("sequential", await _measure(sequential_summary, user_ids[:iterations]))
+        _report("concurrent", await _measure(summary_handler, user_ids[iterations:2 * iterations]))
+
+        timeout = settings.DASHBOARD_SECTION_TIMEOUT_SECONDS
+        standin.table_delays["city_alerts"] = timeout * 2
+        started = time.perf_counter()
+        summary = json.loads((await summary_handler(user_id=user_ids[-1])).body)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(
+            f"slow alerts  {elapsed:8.2f} ms with {timeout}s section timeout, "
+            f"unavailable={summary['unavailable']}, bills={summary['pending_bills_count']}"
+        )
+        standin.table_delays.clear()
+
+        shutdown_db_executor()
+        close_supabase_pools()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--delay-ms", type=float, default=30.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.delay_ms))
@@ -0,0 +1,85 @@
+"""Load test - supabase_db throughput vs. concurrency against a slow backend
+
+Points the data layer at a local PostgREST stand-in that sleeps on every
+request, then drives the bills query at increasing concurrency. The
+"blocking" column calls .execute() directly on the event loop, as the data
+layer did before it moved to the database executor. The "executor" column
+calls the uncached loader behind get_user_bills(), so every request
+reaches the stand-in rather than the per-user read-through cache.
+
+    python -m benchmarks.bench_db_concurrency [--requests 200] [--delay-ms 20]
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+from jose import jwt
+
+from benchmarks.standin import SupabaseStandIn
+
+CONCURRENCY_LEVELS = (1, 4, 8, 16, 32)
+
+
+async def _drive(fetch, user_ids, concurrency: int) -> float:
+    """Run one fetch per user id with at most `concurrency` in flight; returns req/s"""
+    limiter = asyncio.Semaphore(concurrency)
+
+    async def one(user_id: str) -> None:
+        async with limiter:
+            rows = await fetch(user_id)
+            assert rows, "no rows returned"
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(user_id) for user_id in user_ids))
+    return len(user_ids) / (time.perf_counter() - started)
+
+
+async def main(requests: int, delay_ms: float) -> None:
+    with SupabaseStandIn(delay=delay_ms / 1000) as standin:
+        user_ids = [str(uuid.uuid4()) for _ in range(requests)]
+        standin.tables["bills"] = [
+            {"id": str(uuid.uuid4()), "user_id": user_id, "service_type": "electricity",
+             "amount_due": 1850.0, "status": "PENDING", "due_date": "2024-01-31"}
+            for user_id in user_ids
+        ]
+
+        # Settings are read at import time, so configure the environment first
+        os.environ["SUPABASE_URL"] = standin.url
+        os.environ["SUPABASE_KEY"] = jwt.encode({"role": "anon"}, "bench")
+        os.environ["SUPABASE_SERVICE_KEY"] = jwt.encode({"role": "service_role"}, "bench")
+        os.environ["MOCK_MODE"] = "false"
+
+        from app.core.config import settings
+        from app.core.database import get_supabase, shutdown_db_executor, close_supabase_pools
+        from app.services.supabase_db import _load_bills
+
+        async def blocking_get_user_bills(user_id: str):
+            return get_supabase().table("bills").select("*").eq("user_id", user_id).execute().data
+
+        # Warm both paths (client creation, connection setup)
+        await _load_bills(user_ids[0])
+        await blocking_get_user_bills(user_ids[0])
+
+        print(
+            f"stand-in delay {delay_ms} ms, {requests} requests per level, "
+            f"DB_EXECUTOR_WORKERS={settings.DB_EXECUTOR_WORKERS}, "
+            f"DB_TABLE_CONCURRENCY={settings.DB_TABLE_CONCURRENCY}"
+        )
+        print(f"{'concurrency':>11}  {'blocking req/s':>14}  {'executor req/s':>14}")
+        for concurrency in CONCURRENCY_LEVELS:
+            blocking = await _drive(blocking_get_user_bills, user_ids, concurrency)
+            executor = await _drive(_load_bills, user_ids, concurrency)
+            print(f"{concurrency:>11}  {blocking:>14.1f}  {executor:>14.1f}")
+
+        shutdown_db_executor()
+        close_supabase_pools()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.delay_ms))
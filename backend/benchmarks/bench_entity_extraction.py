@@ -0,0 +1,72 @@
+"""Benchmark - grievance entity extraction over a synthetic corpus
+
+Compares AIProcessor.extract_entities (one precompiled pattern, one scan
+per text) with the previous approach of one re.findall per entity on a
+pattern passed as a string. The old patterns were double-escaped and
+never matched; they are timed here with the escaping corrected, so both
+sides do real work.
+
+    python -m benchmarks.bench_entity_extraction [--texts 200000] [--seed 7]
+"""
+import argparse
+import random
+import re
+import time
+from typing import List
+
+from app.services.ai_processor import ai_processor
+
+FILLER = (
+    "the in our since morning near my house street please help sir madam area "
+    "supply line transformer pole building kitchen road colony water electricity "
+    "bill payment meter reading complaint again today yesterday week month "
+    "residents issue not working kindly resolve connection"
+).split()
+
+
+def legacy_extract_entities(description: str) -> dict:
+    """The extractor as it was, with the pattern escaping fixed"""
+    entities = {"location": None, "consumer_id": None, "phone": None}
+    matches = re.findall(r"\b(?:KC|CON|CID)[-–]?[0-9A-Z]+\b", description, re.IGNORECASE)
+    if matches:
+        entities["consumer_id"] = matches[0].upper()
+    matches = re.findall(r"\b(?:Sector|Block|Zone|Ward)\s+[A-Z0-9]+\b", description, re.IGNORECASE)
+    if matches:
+        entities["location"] = matches[0]
+    return entities
+
+
+def synthetic_corpus(count: int, seed: int) -> List[str]:
+    """Grievance-like texts of 10-60 words; each entity appears in about
+    half of them"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(10, 60))
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words)), f"KC-{rng.randint(1, 99999):05d}")
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words)), f"{rng.choice(['Sector', 'Block', 'Ward'])} {rng.randint(1, 60)}")
+        if rng.random() < 0.5:
+            words.insert(rng.randrange(len(words)), f"+91 {rng.randint(60000, 99999)} {rng.randint(0, 99999):05d}")
+        texts.append(" ".join(words).capitalize() + ".")
+    return texts
+
+
+def main(count: int, seed: int) -> None:
+    texts = synthetic_corpus(count, seed)
+    print(f"{count} synthetic grievances, {sum(map(len, texts)) / count:.0f} chars on average")
+
+    for name, extract in (("findall", legacy_extract_entities), ("compiled", ai_processor.extract_entities)):
+        started = time.perf_counter()
+        found = sum(1 for text in texts for value in extract(text).values() if value)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<10} {elapsed:7.2f} s  {count / elapsed:10.0f} texts/s  {elapsed / count * 1e6:7.2f} us/text  {found} entities")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.texts, args.seed)
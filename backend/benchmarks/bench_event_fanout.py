@@ -0,0 +1,73 @@
+"""Benchmark - server-sent event fan-out to many idle subscribers
+
+Subscribes N clients spread over zones, each with a consumer task
+waiting on its queue the way an open /events/stream does, then
+publishes alerts. Reports the memory held per idle subscriber
+(tracemalloc: subscription plus waiting task, not the HTTP connection)
+and the time to fan an alert out to every subscriber and have all of
+them receive it.
+
+    python -m benchmarks.bench_event_fanout [--subscribers 50000] [--zones 20] [--events 20]
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from app.core.broadcaster import Broadcaster, SubscriptionClosed, alert_topics, zone_topics
+
+
+async def consume(subscription, received: list) -> None:
+    while True:
+        try:
+            event = await subscription.next(timeout=60.0)
+        except SubscriptionClosed:
+            return
+        if event is not None:
+            received[0] += 1
+
+
+async def run(subscribers: int, zones: int, events: int) -> None:
+    broadcaster = Broadcaster(queue_size=64)
+    received = [0]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = [
+        asyncio.create_task(consume(broadcaster.subscribe(zone_topics(f"Zone {number % zones}")), received))
+        for number in range(subscribers)
+    ]
+    await asyncio.sleep(0)  # let every consumer start waiting
+    await asyncio.sleep(0)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"{subscribers} idle subscribers: {held / 2**20:.1f} MiB, {held / subscribers:.0f} bytes each")
+
+    for name, topics, expected in (
+        ("one zone", alert_topics(["Zone 0"]), subscribers // zones),
+        ("all zones", alert_topics(None), subscribers),
+    ):
+        timings = []
+        for number in range(events):
+            received[0] = 0
+            started = time.perf_counter()
+            broadcaster.publish(topics, "alert", {"id": number, "title": "Scheduled maintenance"})
+            published = time.perf_counter()
+            while received[0] < expected:
+                await asyncio.sleep(0)
+            timings.append((published - started, time.perf_counter() - started))
+        publish = sorted(t[0] for t in timings)[len(timings) // 2] * 1000
+        deliver = sorted(t[1] for t in timings)[len(timings) // 2] * 1000
+        print(f"{name:<10} -> {expected:6d} subscribers: publish {publish:7.2f} ms, all received {deliver:7.2f} ms (median)")
+
+    broadcaster.close()
+    await asyncio.gather(*tasks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=50000)
+    parser.add_argument("--zones", type=int, default=20)
+    parser.add_argument("--events", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.zones, args.events))
@@ -0,0 +1,90 @@
+"""Benchmark - grievance full-text search at scale
+
+Builds the inverted index over a synthetic corpus (1M grievances by
+default) and reports build time, index memory (tracemalloc) and query
+latency for common and rare terms, with and without filters.
+
+    python -m benchmarks.bench_grievance_search [--documents 1000000] [--queries 200] [--seed 7]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Dict, Iterator, List
+
+from app.models import GrievanceCategory, GrievancePriority, GrievanceStatus
+from app.services.grievance_search import GrievanceSearchIndex
+
+COMMON = (
+    "power electricity water supply meter bill since morning hours area street house "
+    "transformer pole line voltage connection complaint issue problem not working again"
+).split()
+USERS = 200000
+
+
+def rare_word(rng: random.Random) -> str:
+    """Long tail of 50k names, places and codes (log-uniform: a few are common, most are rare)"""
+    return f"w{int(50000 ** rng.random())}"
+
+
+def corpus(count: int, seed: int) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    categories = [category.value for category in GrievanceCategory]
+    statuses = [status.value for status in GrievanceStatus]
+    priorities = [priority.value for priority in GrievancePriority]
+    for number in range(count):
+        words = rng.choices(COMMON, k=rng.randint(6, 25)) + [rare_word(rng) for _ in range(rng.randint(1, 5))]
+        rng.shuffle(words)
+        yield {
+            "ticket_id": f"GRV-{number:08X}",
+            "user_id": f"user-{rng.randrange(USERS)}",
+            "description": " ".join(words),
+            "category": rng.choice(categories),
+            "status": rng.choice(statuses),
+            "priority": rng.choice(priorities)
+        }
+
+
+def _latency(index: GrievanceSearchIndex, queries: List[str], **filters) -> str:
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, **filters)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    pct = lambda p: timings[min(len(timings) - 1, int(p * len(timings)))] * 1000
+    return f"p50 {pct(0.5):8.2f} ms  p99 {pct(0.99):8.2f} ms"
+
+
+def main(count: int, query_count: int, seed: int) -> None:
+    index = GrievanceSearchIndex()
+    tracemalloc.start()
+    started = time.perf_counter()
+    index.rebuild(corpus(count, seed))
+    elapsed = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    stats = index.stats
+    print(f"{stats['documents']} documents, {stats['terms']} terms, {stats['postings']} postings")
+    print(f"build        {elapsed:8.1f} s  ({count / elapsed:.0f} docs/s, under tracemalloc)")
+    print(f"memory       {memory / 2**20:8.1f} MiB  ({memory / count:.0f} bytes/doc)")
+
+    rng = random.Random(seed + 1)
+    rare = [f"{rare_word(rng)} {rare_word(rng)}" for _ in range(query_count)]
+    common = [" ".join(rng.sample(COMMON, 2)) for _ in range(query_count)]
+    mixed = [f"{rng.choice(COMMON)} {rare_word(rng)}" for _ in range(query_count)]
+    user = f"user-{rng.randrange(USERS)}"
+    print(f"rare terms   {_latency(index, rare)}")
+    print(f"mixed terms  {_latency(index, mixed)}")
+    print(f"common terms {_latency(index, common)}")
+    print(f"common+filt  {_latency(index, common, status='OPEN', category='POWER_OUTAGE')}")
+    print(f"common+user  {_latency(index, common, user_id=user)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.documents, args.queries, args.seed)
@@ -0,0 +1,107 @@
+"""Benchmark - incident clustering of near-duplicate grievances
+
+Simulates an outage: grievances are paraphrases of a handful of incident
+templates, spread over many locations, mixed with unrelated complaints.
+Reports the per-grievance latency of IncidentIndex.add and how well the
+clusters match the incidents that generated them.
+
+    python -m benchmarks.bench_incident_clusters [--grievances 100000] [--seed 7]
+        [--bands 16] [--rows 2] [--threshold 0.3]
+"""
+import argparse
+import random
+import time
+from collections import Counter, defaultdict
+from typing import List, Tuple
+
+from app.core.config import settings
+from app.services.incident_clusters import IncidentIndex
+
+TEMPLATES = [
+    "no power since {n} hours in our area",
+    "electricity gone since morning whole street is dark",
+    "transformer blast near the main road no electricity",
+    "voltage fluctuation damaging appliances in the colony",
+    "power cut again since {n} hours please restore supply",
+]
+NOISE = (
+    "kindly urgent sir madam please help again today still very bad "
+    "problem issue many houses whole lane"
+).split()
+FILLER = (
+    "bill payment meter reading wrong amount new connection request water pressure low "
+    "streetlight broken garbage not collected pipe burst road damaged"
+).split()
+
+
+def paraphrase(rng: random.Random, template: str) -> str:
+    """The template with a few noise words inserted and one word possibly dropped"""
+    words = template.format(n=rng.randint(1, 9)).split()
+    if rng.random() < 0.3:
+        del words[rng.randrange(len(words))]
+    for _ in range(rng.randint(0, 3)):
+        words.insert(rng.randrange(len(words) + 1), rng.choice(NOISE))
+    return " ".join(words)
+
+
+def workload(count: int, seed: int) -> List[Tuple[str, str, int]]:
+    """(description, location, true incident or -1 for unrelated)"""
+    rng = random.Random(seed)
+    items = []
+    for _ in range(count):
+        location = f"Sector {rng.randint(1, 200)}"
+        if rng.random() < 0.8:
+            template = rng.randrange(len(TEMPLATES))
+            items.append((paraphrase(rng, TEMPLATES[template]), location, template))
+        else:
+            items.append((" ".join(rng.choices(FILLER, k=rng.randint(5, 15))), location, -1))
+    return items
+
+
+def main(count: int, seed: int, bands: int, rows: int, threshold: float) -> None:
+    items = workload(count, seed)
+    index = IncidentIndex(
+        bands=bands,
+        rows=rows,
+        threshold=threshold,
+        window=settings.INCIDENT_WINDOW_SECONDS,
+        max_clusters=settings.INCIDENT_MAX_CLUSTERS
+    )
+
+    latencies = []
+    assigned = defaultdict(list)  # incident id -> true labels of its grievances
+    for number, (description, location, label) in enumerate(items):
+        started = time.perf_counter()
+        incident_id = index.add(f"T{number}", "user", description, "POWER_OUTAGE", location)
+        latencies.append(time.perf_counter() - started)
+        assigned[incident_id].append((location, label))
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6
+    print(f"{count} grievances -> {index.stats['incidents']} incidents")
+    print(f"add latency  p50 {pct(0.5):7.1f} us  p99 {pct(0.99):7.1f} us  max {pct(1.0):7.1f} us")
+
+    # Purity: share of grievances whose incident is mostly their own (location, template)
+    pure = sum(Counter(labels).most_common(1)[0][1] for labels in assigned.values())
+    true_incidents = {(location, label) for _, location, label in items if label >= 0}
+    # Completeness: share of templated grievances in the largest cluster of their incident
+    clusters_by_incident = defaultdict(Counter)
+    for incident_id, labels in assigned.items():
+        for location, label in labels:
+            if label >= 0:
+                clusters_by_incident[(location, label)][incident_id] += 1
+    complete = sum(counts.most_common(1)[0][1] for counts in clusters_by_incident.values())
+    templated = sum(1 for _, _, label in items if label >= 0)
+    print(f"purity       {pure / count:.1%}")
+    print(f"completeness {complete / templated:.1%}  ({len(true_incidents)} true incidents)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grievances", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--bands", type=int, default=settings.INCIDENT_LSH_BANDS)
+    parser.add_argument("--rows", type=int, default=settings.INCIDENT_LSH_ROWS)
+    parser.add_argument("--threshold", type=float, default=settings.INCIDENT_SIMILARITY_THRESHOLD)
+    args = parser.parse_args()
+    main(args.grievances, args.seed, args.bands, args.rows, args.threshold)
@@ -0,0 +1,110 @@
+"""Benchmark - local JWKS token verification vs. remote auth.get_user()
+
+Serves the Supabase auth endpoints from a local stand-in, then measures
+p50/p99 latency of verify_supabase_token() on both paths.
+
+    python -m benchmarks.bench_jwt_verification [--iterations 2000] [--delay-ms 0]
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from typing import List
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import jwk, jwt
+
+from benchmarks.standin import SupabaseStandIn, percentile
+
+KID = "bench-es256"
+
+
+def _make_signing_key():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    public_jwk = jwk.construct(public_pem, "ES256").to_dict()
+    public_jwk.update({"kid": KID, "use": "sig", "alg": "ES256"})
+    return private_pem, public_jwk
+
+
+def _mint_token(private_pem: bytes, issuer: str) -> str:
+    now = int(time.time())
+    claims = {
+        "sub": str(uuid.uuid4()),
+        "email": "demo@suvidha.com",
+        "aud": "authenticated",
+        "iss": issuer,
+        "role": "authenticated",
+        "iat": now,
+        "exp": now + 3600,
+        "user_metadata": {"full_name": "Demo User"},
+    }
+    return jwt.encode(claims, private_pem, algorithm="ES256", headers={"kid": KID})
+
+
+async def _measure(verify, token: str, iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        user = await verify(token)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert user is not None, "verification failed"
+    return samples
+
+
+def _report(name: str, samples: List[float]) -> None:
+    print(
+        f"{name:<8} n={len(samples):<6} "
+        f"p50={percentile(samples, 50):8.3f} ms  p99={percentile(samples, 99):8.3f} ms"
+    )
+
+
+async def main(iterations: int, delay_ms: float) -> None:
+    private_pem, public_jwk = _make_signing_key()
+
+    with SupabaseStandIn(jwks=[public_jwk], delay=delay_ms / 1000) as standin:
+        # Settings are read at import time, so configure the environment first
+        os.environ["SUPABASE_URL"] = standin.url
+        os.environ["SUPABASE_KEY"] = _mint_token(private_pem, "anon")
+        os.environ["SUPABASE_SERVICE_KEY"] = _mint_token(private_pem, "service")
+
+        from app.core.config import settings
+        from app.core import security
+        from app.core.jwks import jwks_cache, get_expected_issuer
+
+        token = _mint_token(private_pem, get_expected_issuer())
+
+        # Warm the JWKS cache the way the background refresher would
+        await jwks_cache.refresh()
+        settings.JWT_LOCAL_VERIFICATION = True
+        local = await _measure(security.verify_supabase_token, token, iterations)
+
+        settings.JWT_LOCAL_VERIFICATION = False
+        remote_requests = standin.request_count
+        remote = await _measure(security.verify_supabase_token, token, max(iterations // 4, 1))
+        remote_requests = standin.request_count - remote_requests
+
+        await jwks_cache.stop()
+
+    print(f"stand-in delay: {delay_ms} ms, JWKS fetches: {jwks_cache.fetch_count}")
+    _report("local", local)
+    _report("remote", remote)
+    print(f"remote path made {remote_requests} HTTP requests")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.delay_ms))
@@ -0,0 +1,119 @@
+"""Benchmark - grievance priority classification over a synthetic corpus
+
+Compares AIProcessor.analyze_priority (one pass of the compiled keyword
+matcher) with the previous approach of one substring scan per keyword,
+and reports how often the two agree. Disagreements are expected where the
+old substring scan matched inside other words ("gas" in "gasket").
+
+The run is repeated with the keyword tables padded by extra (non-matching)
+keywords: the substring scan grows with the table, the matcher does not.
+
+    python -m benchmarks.bench_priority_keywords [--texts 200000] [--seed 7]
+"""
+import argparse
+import random
+import time
+from typing import List
+
+from app.models import GrievanceCategory, GrievancePriority
+from app.services.ai_processor import AIProcessor, ai_processor
+
+TABLE_PADDING = (0, 200, 1000)
+
+LEGACY_HIGH = [
+    "fire", "spark", "shock", "electrocution", "burning",
+    "emergency", "urgent", "critical", "danger", "hazard",
+    "explosion", "leak", "gas", "no water", "flood"
+]
+LEGACY_CRITICAL = ["fire", "shock", "electrocution", "explosion"]
+LEGACY_MEDIUM = [
+    "power outage", "no electricity", "bill issue", "overcharge",
+    "meter problem", "connection", "disconnection", "delay"
+]
+_legacy_medium = list(LEGACY_MEDIUM)
+
+FILLER = (
+    "the in our since morning near my house street please help sir madam area "
+    "supply line transformer pole building kitchen road colony water electricity "
+    "bill payment meter reading complaint again today yesterday week month "
+    "residents issue not working kindly resolve"
+).split()
+# Words the old substring scan misread as keywords
+TRAPS = ["gasket", "firewall", "leaky", "sparkling", "delayed", "reconnection"]
+PHRASES = LEGACY_HIGH + LEGACY_MEDIUM
+
+
+def legacy_analyze_priority(description: str, category: GrievanceCategory) -> GrievancePriority:
+    """The classifier as it was: a substring scan per keyword"""
+    description_lower = description.lower()
+    for keyword in LEGACY_HIGH:
+        if keyword in description_lower:
+            return GrievancePriority.CRITICAL if any(
+                kw in description_lower for kw in LEGACY_CRITICAL
+            ) else GrievancePriority.HIGH
+    for keyword in _legacy_medium:
+        if keyword in description_lower:
+            return GrievancePriority.MEDIUM
+    if category == GrievanceCategory.POWER_OUTAGE:
+        return GrievancePriority.HIGH
+    elif category == GrievanceCategory.METER_PROBLEM:
+        return GrievancePriority.MEDIUM
+    return GrievancePriority.LOW
+
+
+def synthetic_corpus(count: int, seed: int) -> List[str]:
+    """Grievance-like texts of 10-60 words; about a third mention a priority
+    keyword and one in twenty contains a word that embeds one"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(10, 60))
+        if rng.random() < 0.35:
+            words.insert(rng.randrange(len(words)), rng.choice(PHRASES))
+        if rng.random() < 0.05:
+            words.insert(rng.randrange(len(words)), rng.choice(TRAPS))
+        texts.append(" ".join(words).capitalize() + ".")
+    return texts
+
+
+def _time(classify, texts: List[str]) -> float:
+    started = time.perf_counter()
+    for text in texts:
+        classify(text, GrievanceCategory.OTHER)
+    return time.perf_counter() - started
+
+
+def _pad_tables(extra: int) -> None:
+    """Add `extra` medium-priority keywords that never occur in the corpus"""
+    padding = [f"keyword{n:05d}" for n in range(extra)]
+    _legacy_medium[:] = LEGACY_MEDIUM + padding
+    table = {tier: dict(keywords) for tier, keywords in AIProcessor.PRIORITY_KEYWORDS.items()}
+    table[GrievancePriority.MEDIUM].update({keyword: 1.0 for keyword in padding})
+    AIProcessor.reload_keywords(table)
+
+
+def main(count: int, seed: int) -> None:
+    texts = synthetic_corpus(count, seed)
+    print(f"{count} synthetic grievances, {sum(map(len, texts)) / count:.0f} chars on average")
+
+    for extra in TABLE_PADDING:
+        _pad_tables(extra)
+        print(f"-- {len(LEGACY_HIGH) + len(_legacy_medium)} keywords")
+        for name, classify in (("substring", legacy_analyze_priority), ("matcher", ai_processor.analyze_priority)):
+            elapsed = _time(classify, texts)
+            print(f"{name:<10} {elapsed:7.2f} s  {count / elapsed:10.0f} texts/s  {elapsed / count * 1e6:7.2f} us/text")
+
+    _pad_tables(0)
+    agree = sum(
+        legacy_analyze_priority(text, GrievanceCategory.OTHER) == ai_processor.analyze_priority(text, GrievanceCategory.OTHER)
+        for text in texts
+    )
+    print(f"agreement  {agree / count:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.texts, args.seed)
@@ -0,0 +1,62 @@
+"""Benchmark - response compression, per encoding and with the compressed-body cache
+
+Encodes a bill listing of --rows rows as the routes do, then compresses
+it with each available encoding (gzip at the configured level, brotli
+when installed). A client re-polling an unchanged listing gets the same
+body, so the cached case shows what a repeat request costs: one digest
+of the body instead of a compression.
+
+    python -m benchmarks.bench_response_compression [--rows 1000] [--iterations 50]
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from app.core.compression import ENCODINGS, ResponseCompressor
+from app.core.config import settings
+from app.core.serialization import encode_model
+from app.core.timestamps import decode_rows
+from app.models import BillResponse
+from app.routers.billing import _bill_to_response
+from benchmarks.bench_response_encoding import synthetic_rows
+
+
+def _time(run: Callable[[], bytes], iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(count: int, iterations: int) -> None:
+    bills = decode_rows(synthetic_rows(count, seed=3)["bills"], "bills")
+    body = encode_model([_bill_to_response(bill) for bill in bills], List[BillResponse])
+    compressor = ResponseCompressor(
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        cache_max_entries=16,
+        cache_ttl=60.0,
+        cache_max_body_size=len(body)
+    )
+
+    print(f"{count} bills, {len(body) / 1024:.1f} KiB uncompressed, median of {iterations} runs")
+    for encoding in ENCODINGS:
+        compressed = compressor.compress(body, encoding)
+        fresh_ms = _time(lambda: compressor._compress(body, encoding), iterations)
+        cached_ms = _time(lambda: compressor.compress(body, encoding), iterations)
+        print(
+            f"{encoding:<5} {len(compressed) / 1024:7.1f} KiB ({len(compressed) / len(body):5.1%})   "
+            f"compress {fresh_ms:7.3f} ms   cached {cached_ms:6.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    main(args.rows, args.iterations)
@@ -0,0 +1,81 @@
+"""Benchmark - timestamp parsing per response vs. decoding once at ingestion
+
+Bill rows are fetched from Supabase a few times (each time the per-user
+cache expires) and each fetch is served many times from the cache.
+Before, every response parsed due_date and created_at with
+.replace("Z", "+00:00") and datetime.fromisoformat; now rows are decoded
+once per fetch by the memoizing parser (later fetches of the same
+strings hit its cache) and responses use the datetimes as they are.
+
+    python -m benchmarks.bench_timestamp_decoding [--rows 20000] [--fetches 3] [--serves 10]
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from app.core.timestamps import decode_rows, parse_date, parse_timestamp
+
+
+def synthetic_bills(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Bill rows as PostgREST returns them: date-only due dates, microsecond created_at"""
+    rng = random.Random(seed)
+    return [{
+        "id": f"bill-{i}",
+        "due_date": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "created_at": f"2026-{rng.randint(1, 9):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:"
+                      f"{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.{rng.randint(0, 999999):06d}+00:00"
+    } for i in range(count)]
+
+
+def legacy_read(rows: List[Dict[str, Any]]) -> List[tuple]:
+    """What each response did: parse both timestamps of every row"""
+    return [
+        (
+            datetime.fromisoformat(row["due_date"].replace("Z", "+00:00")) if isinstance(row["due_date"], str) else row["due_date"],
+            datetime.fromisoformat(row["created_at"].replace("Z", "+00:00")) if isinstance(row["created_at"], str) else row["created_at"]
+        )
+        for row in rows
+    ]
+
+
+def decoded_read(rows: List[Dict[str, Any]]) -> List[tuple]:
+    """What each response does now: use the decoded values"""
+    return [(row["due_date"], row["created_at"]) for row in rows]
+
+
+def main(count: int, fetches: int, serves: int) -> None:
+    source = synthetic_bills(count, seed=5)
+    print(f"{count} bill rows, fetched {fetches} times, each fetch served {serves} times")
+
+    started = time.perf_counter()
+    for _ in range(fetches):
+        rows = [dict(row) for row in source]
+        for _ in range(serves):
+            legacy_read(rows)
+    legacy = time.perf_counter() - started
+
+    parse_timestamp.cache_clear()
+    parse_date.cache_clear()
+    started = time.perf_counter()
+    for _ in range(fetches):
+        rows = decode_rows([dict(row) for row in source], "bills")
+        for _ in range(serves):
+            decoded_read(rows)
+    decoded = time.perf_counter() - started
+
+    print(f"parse per response   {legacy * 1000:9.1f} ms")
+    print(f"decode at ingestion  {decoded * 1000:9.1f} ms   {legacy / decoded:4.1f}x")
+    for name, parse in (("timestamp", parse_timestamp), ("date", parse_date)):
+        cache = parse.cache_info()
+        print(f"{name} parse cache: {cache.hits} hits, {cache.misses} misses, {cache.currsize} entries (max {cache.maxsize})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--fetches", type=int, default=3)
+    parser.add_argument("--serves", type=int, default=10)
+    args = parser.parse_args()
+    main(args.rows, args.fetches, args.serves)
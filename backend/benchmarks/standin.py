@@ -0,0 +1,259 @@
+"""Local Supabase Stand-in - HTTP server that mimics the Supabase endpoints
+
+Used by the benchmarks so that the "remote" side of a comparison is a real
+HTTP round trip on the loopback interface, with optional injected delay.
+"""
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Callable, Dict, Any, List, Tuple
+from urllib.parse import parse_qsl
+
+from jose import jwt
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler - dispatches to the owning SupabaseStandIn"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _begin(self) -> Tuple["SupabaseStandIn", str, List[Tuple[str, str]], Any]:
+        standin: "SupabaseStandIn" = self.server.standin  # type: ignore[attr-defined]
+        standin.request_count += 1
+
+        # Always drain the body (postgrest-py sends one even with GET)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        path, _, query = self.path.partition("?")
+        delay = standin.delay + standin.table_delays.get(path.rsplit("/", 1)[-1], 0.0)
+        if delay:
+            time.sleep(delay)
+        return standin, path, parse_qsl(query, keep_blank_values=True), body
+
+    def do_GET(self) -> None:
+        standin, path, params, _ = self._begin()
+        if path == "/auth/v1/.well-known/jwks.json":
+            self._send_json(200, {"keys": standin.jwks})
+        elif path == "/auth/v1/user":
+            self._handle_get_user()
+        elif path.startswith("/rest/v1/"):
+            table = path[len("/rest/v1/"):]
+            self._send_json(200, standin.select(table, params))
+        else:
+            self._send_json(404, {"message": "Not found"})
+
+    def do_POST(self) -> None:
+        standin, path, params, body = self._begin()
+        if path.startswith("/rest/v1/rpc/"):
+            handler = standin.rpc_handlers.get(path[len("/rest/v1/rpc/"):])
+            if handler is None:
+                self._send_json(404, {"message": "Function not found"})
+            else:
+                self._send_json(200, handler(body or {}))
+        elif path.startswith("/rest/v1/"):
+            rows = body if isinstance(body, list) else [body]
+            self._send_json(201, standin.insert(path[len("/rest/v1/"):], rows))
+        else:
+            self._send_json(404, {"message": "Not found"})
+
+    def do_PATCH(self) -> None:
+        standin, path, params, body = self._begin()
+        if path.startswith("/rest/v1/"):
+            self._send_json(200, standin.update(path[len("/rest/v1/"):], params, body or {}))
+        else:
+            self._send_json(404, {"message": "Not found"})
+
+    def _handle_get_user(self) -> None:
+        authorization = self.headers.get("Authorization", "")
+        token = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else ""
+        try:
+            claims = jwt.get_unverified_claims(token)
+        except Exception:
+            self._send_json(401, {"code": 401, "msg": "invalid JWT"})
+            return
+
+        now = datetime.now(timezone.utc).isoformat()
+        self._send_json(200, {
+            "id": claims.get("sub"),
+            "aud": claims.get("aud", "authenticated"),
+            "role": claims.get("role", "authenticated"),
+            "email": claims.get("email"),
+            "app_metadata": {"provider": "email"},
+            "user_metadata": claims.get("user_metadata", {}),
+            "created_at": now,
+            "updated_at": now,
+        })
+
+
+def _coerce(value: str) -> Any:
+    if value in ("true", "false"):
+        return value == "true"
+    if value == "null":
+        return None
+    return value
+
+
+def _split_top_level(expression: str) -> List[str]:
+    """Split "a,and(b,c),d" on the commas outside parentheses and quotes"""
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in expression:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char in "()":
+            depth += 1 if char == "(" else -1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    return parts + [current]
+
+
+def _matches_tree(row: Dict[str, Any], operator: str, expression: str) -> bool:
+    """Evaluate an or=(...)/and=(...) logic tree"""
+    results = []
+    for condition in _split_top_level(expression[1:-1]):
+        if condition.startswith(("and(", "or(")):
+            nested, _, inner = condition.partition("(")
+            results.append(_matches_tree(row, nested, "(" + inner))
+        else:
+            column, _, rest = condition.partition(".")
+            results.append(_matches(row, column, rest))
+    return any(results) if operator == "or" else all(results)
+
+
+def _matches(row: Dict[str, Any], column: str, expression: str) -> bool:
+    if column in ("or", "and"):
+        return _matches_tree(row, column, expression)
+    operator, _, operand = expression.partition(".")
+    if len(operand) > 1 and operand.startswith('"') and operand.endswith('"'):
+        operand = operand[1:-1]
+    value = row.get(column)
+    if operator == "eq":
+        return value == _coerce(operand) or str(value) == operand
+    if operator == "neq":
+        return str(value) != operand
+    if operator == "in":
+        return str(value) in {item.strip('"') for item in operand.strip("()").split(",")}
+    if operator == "is":
+        return value is _coerce(operand)
+    if value is None:
+        return False
+    if operator in ("lt", "lte", "gt", "gte"):
+        left, right = (float(value), float(operand)) if isinstance(value, (int, float)) else (str(value), operand)
+        return {
+            "lt": left < right, "lte": left <= right,
+            "gt": left > right, "gte": left >= right,
+        }[operator]
+    return True
+
+
+class SupabaseStandIn:
+    """
+    Threaded local HTTP server standing in for a Supabase project.
+
+    Serves the auth user/JWKS endpoints and a small PostgREST subset
+    (eq/neq/in/is/lt/lte/gt/gte filters, or/and logic trees, order, limit,
+    offset, insert, update and registered RPC functions) over in-memory
+    tables.
+
+    Usage:
+        with SupabaseStandIn(delay=0.01) as standin:
+            os.environ["SUPABASE_URL"] = standin.url
+    """
+
+    RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+    def __init__(self, jwks: Optional[List[Dict[str, Any]]] = None, delay: float = 0.0):
+        self.jwks = jwks or []
+        self.delay = delay
+        # Extra delay for requests to one table or RPC function, by name
+        self.table_delays: Dict[str, float] = {}
+        self.request_count = 0
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.rpc_handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _filter(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        filters = [(k, v) for k, v in params if k not in self.RESERVED_PARAMS]
+        return [
+            row for row in self.tables.get(table, [])
+            if all(_matches(row, column, expression) for column, expression in filters)
+        ]
+
+    def select(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._filter(table, params)
+
+        options = dict(params)
+        for clause in reversed(options.get("order", "").split(",") if options.get("order") else []):
+            column, _, direction = clause.partition(".")
+            rows.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=direction.startswith("desc"))
+        offset = int(options.get("offset", 0))
+        limit = int(options["limit"]) if "limit" in options else None
+        return rows[offset:offset + limit if limit is not None else None]
+
+    def insert(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        now = datetime.now(timezone.utc).isoformat()
+        created = [{"id": str(uuid.uuid4()), "created_at": now, **row} for row in rows]
+        with self._lock:
+            self.tables.setdefault(table, []).extend(created)
+        return created
+
+    def update(self, table: str, params: List[Tuple[str, str]], changes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._filter(table, params)
+            for row in rows:
+                row.update(changes)
+        return rows
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None, "Stand-in not started"
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "SupabaseStandIn":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.standin = self  # type: ignore[attr-defined]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "SupabaseStandIn":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
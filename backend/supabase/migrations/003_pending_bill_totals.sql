@@ -0,0 +1,46 @@
+-- ==========================================
+-- Pending Bill Totals and Due-Date Index
+-- ==========================================
+-- The billing and dashboard summaries need a user's total due and
+-- per-service breakdown. Instead of fetching every pending bill and
+-- summing in the API, get_pending_bill_totals() sums server-side and
+-- returns one row per service. The partial index serves both the totals
+-- and the "due soon" query (status = 'PENDING' AND due_date <= ...
+-- ORDER BY due_date) as an index range scan.
+--
+-- Run this in Supabase SQL Editor
+-- ==========================================
+
+CREATE INDEX IF NOT EXISTS idx_bills_user_pending_due
+    ON public.bills(user_id, due_date)
+    WHERE status = 'PENDING';
+
+CREATE OR REPLACE FUNCTION public.get_pending_bill_totals(p_user_id UUID)
+RETURNS TABLE (
+    service_type TEXT,
+    bill_count BIGINT,
+    amount_due NUMERIC
+)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+AS $$
+    SELECT b.service_type, COUNT(*), COALESCE(SUM(b.amount_due), 0)
+    FROM public.bills b
+    WHERE b.user_id = p_user_id
+      AND b.status = 'PENDING'
+    GROUP BY b.service_type;
+$$;
+
+-- Grant permissions
+GRANT EXECUTE ON FUNCTION public.get_pending_bill_totals(UUID) TO authenticated;
+GRANT EXECUTE ON FUNCTION public.get_pending_bill_totals(UUID) TO anon;
+GRANT EXECUTE ON FUNCTION public.get_pending_bill_totals(UUID) TO service_role;
+
+-- ==========================================
+-- Verification
+-- ==========================================
+-- SELECT * FROM public.get_pending_bill_totals('<user uuid>');
+-- EXPLAIN SELECT * FROM public.bills
+--     WHERE user_id = '<user uuid>' AND status = 'PENDING' AND due_date <= CURRENT_DATE + 7
+--     ORDER BY due_date;
@@ -0,0 +1,19 @@
+-- ==========================================
+-- Grievance Entities
+-- ==========================================
+-- Grievance submission now extracts the consumer ID, location
+-- (Sector/Block/Zone/Ward) and contact phone from the description and
+-- stores them alongside it, so they can be filtered and grouped without
+-- re-parsing free text.
+--
+-- Run this in Supabase SQL Editor
+-- ==========================================
+
+ALTER TABLE public.grievances
+    ADD COLUMN IF NOT EXISTS consumer_id TEXT,
+    ADD COLUMN IF NOT EXISTS location TEXT,
+    ADD COLUMN IF NOT EXISTS phone TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_grievances_consumer_id
+    ON public.grievances(consumer_id)
+    WHERE consumer_id IS NOT NULL;
@@ -0,0 +1,17 @@
+-- ==========================================
+-- Grievance Incidents
+-- ==========================================
+-- Near-duplicate grievances (same category and location, similar
+-- description) are grouped into incidents during enrichment. The
+-- incident ID is stored on each grievance so field teams can pull every
+-- ticket of one incident at once.
+--
+-- Run this in Supabase SQL Editor
+-- ==========================================
+
+ALTER TABLE public.grievances
+    ADD COLUMN IF NOT EXISTS incident_id TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_grievances_incident_id
+    ON public.grievances(incident_id)
+    WHERE incident_id IS NOT NULL;
@@ -0,0 +1,69 @@
+-- ==========================================
+-- Atomic Order Settlement
+-- ==========================================
+-- Verifying a payment marks every bill of the order PAID and the
+-- transaction SUCCESS. settle_order() does both in one database
+-- transaction, so a failure can no longer leave bills paid against a
+-- PENDING order (or the reverse). The order row is locked first, so two
+-- concurrent verifications of the same order settle it once.
+--
+-- Returns {"transaction": <row>, "bills": [<rows settled now>]}, or NULL
+-- when the user has no such order. Bills already PAID are left alone, so
+-- settling again only refreshes the transaction.
+--
+-- Run this in Supabase SQL Editor
+-- ==========================================
+
+CREATE OR REPLACE FUNCTION public.settle_order(
+    p_order_id TEXT,
+    p_user_id UUID,
+    p_payment_id TEXT
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+VOLATILE
+SECURITY INVOKER
+AS $$
+DECLARE
+    v_now TIMESTAMPTZ := NOW();
+    v_transaction public.transactions;
+    v_bills JSONB;
+BEGIN
+    SELECT * INTO v_transaction
+    FROM public.transactions t
+    WHERE t.order_id = p_order_id
+      AND t.user_id = p_user_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    WITH settled AS (
+        UPDATE public.bills b
+        SET status = 'PAID', paid_at = v_now
+        WHERE b.id::TEXT = ANY (COALESCE(v_transaction.bill_ids, '{}'))
+          AND b.user_id = p_user_id
+          AND b.status <> 'PAID'
+        RETURNING b.*
+    )
+    SELECT COALESCE(jsonb_agg(to_jsonb(settled)), '[]'::JSONB) INTO v_bills
+    FROM settled;
+
+    UPDATE public.transactions t
+    SET status = 'SUCCESS', payment_id = p_payment_id, verified_at = v_now
+    WHERE t.id = v_transaction.id
+    RETURNING * INTO v_transaction;
+
+    RETURN jsonb_build_object('transaction', to_jsonb(v_transaction), 'bills', v_bills);
+END;
+$$;
+
+-- Grant permissions (called by the API with the service key only)
+REVOKE EXECUTE ON FUNCTION public.settle_order(TEXT, UUID, TEXT) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.settle_order(TEXT, UUID, TEXT) TO service_role;
+
+-- ==========================================
+-- Verification
+-- ==========================================
+-- SELECT public.settle_order('<order id>', '<user uuid>', 'pay_test');
@@ -0,0 +1,30 @@
+-- ==========================================
+-- Grievance Enrichment Marker
+-- ==========================================
+-- Submitted grievances get their entities and incident from a background
+-- enrichment queue, which sets enriched_at when done. Grievances with no
+-- enriched_at (still queued when the API stopped, out of retries, or lost
+-- in a crash) are queued again when the API starts; the partial index
+-- keeps that sweep cheap.
+--
+-- Apply before deploying the API version that writes enriched_at.
+-- Run this in Supabase SQL Editor
+-- ==========================================
+
+ALTER TABLE public.grievances
+    ADD COLUMN IF NOT EXISTS enriched_at TIMESTAMPTZ;
+
+-- Existing grievances went through the earlier enrichment already
+UPDATE public.grievances
+SET enriched_at = COALESCE(updated_at, created_at)
+WHERE enriched_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_grievances_unenriched
+    ON public.grievances(created_at)
+    WHERE enriched_at IS NULL;
+
+-- ==========================================
+-- Verification
+-- ==========================================
+-- SELECT ticket_id, created_at FROM public.grievances
+--     WHERE enriched_at IS NULL ORDER BY created_at LIMIT 20;
@@ -0,0 +1,80 @@
+-- ==========================================
+-- Data Versions
+-- ==========================================
+-- Listing ETags (bills, grievances, transactions, and the dashboard,
+-- which also covers city alerts) are derived from per-user version
+-- counters. Keeping the counters here, bumped by triggers on the tables
+-- they describe, gives every API worker the same versions: a client
+-- gets the same ETag whichever worker answers, and a write made by any
+-- worker (or straight in SQL) changes it.
+--
+-- scope is the owning user's ID, or '*' for data shared by everyone.
+--
+-- Run this in Supabase SQL Editor
+-- ==========================================
+
+CREATE TABLE IF NOT EXISTS public.data_versions (
+    resource TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (resource, scope)
+);
+
+-- Read by the API with the service key only
+ALTER TABLE public.data_versions ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.bump_data_version()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_scopes TEXT[];
+BEGIN
+    -- TG_ARGV[0]: resource name; TG_ARGV[1] = 'shared' for tables without an owner
+    IF TG_NARGS > 1 AND TG_ARGV[1] = 'shared' THEN
+        v_scopes := ARRAY['*'];
+    ELSIF TG_OP = 'INSERT' THEN
+        v_scopes := ARRAY[NEW.user_id::TEXT];
+    ELSIF TG_OP = 'DELETE' THEN
+        v_scopes := ARRAY[OLD.user_id::TEXT];
+    ELSE
+        v_scopes := ARRAY[NEW.user_id::TEXT, OLD.user_id::TEXT];
+    END IF;
+
+    INSERT INTO public.data_versions (resource, scope, version)
+    SELECT DISTINCT TG_ARGV[0], s.scope, 1
+    FROM unnest(v_scopes) AS s(scope)
+    WHERE s.scope IS NOT NULL
+    ON CONFLICT (resource, scope) DO UPDATE
+        SET version = public.data_versions.version + 1;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS bills_data_version ON public.bills;
+CREATE TRIGGER bills_data_version
+    AFTER INSERT OR UPDATE OR DELETE ON public.bills
+    FOR EACH ROW EXECUTE FUNCTION public.bump_data_version('bills');
+
+DROP TRIGGER IF EXISTS grievances_data_version ON public.grievances;
+CREATE TRIGGER grievances_data_version
+    AFTER INSERT OR UPDATE OR DELETE ON public.grievances
+    FOR EACH ROW EXECUTE FUNCTION public.bump_data_version('grievances');
+
+DROP TRIGGER IF EXISTS transactions_data_version ON public.transactions;
+CREATE TRIGGER transactions_data_version
+    AFTER INSERT OR UPDATE OR DELETE ON public.transactions
+    FOR EACH ROW EXECUTE FUNCTION public.bump_data_version('transactions');
+
+DROP TRIGGER IF EXISTS city_alerts_data_version ON public.city_alerts;
+CREATE TRIGGER city_alerts_data_version
+    AFTER INSERT OR UPDATE OR DELETE ON public.city_alerts
+    FOR EACH ROW EXECUTE FUNCTION public.bump_data_version('alerts', 'shared');
+
+-- ==========================================
+-- Verification
+-- ==========================================
+-- UPDATE public.bills SET status = status WHERE id = '<bill uuid>';
+-- SELECT * FROM public.data_versions WHERE scope = '<user uuid>';
@@ -0,0 +1,157 @@
+"""Tests - BillingAggregate maintained by bill writes vs. recomputed from every bill"""
+import asyncio
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.billing_aggregates import BillingAggregate, BillingAggregateStore
+
+USER = "u1"
+SERVICES = ["electricity", "water", "gas"]
+TODAY = date(2026, 1, 1)
+DUE_SOON = TODAY + timedelta(days=7)
+
+
+def _bill(rng: random.Random, number: int) -> dict:
+    return {
+        "id": f"b{number:03d}",
+        "user_id": USER,
+        "service_type": rng.choice(SERVICES),
+        "amount_due": round(rng.uniform(10, 5000), 2),
+        "due_date": TODAY + timedelta(days=rng.randint(0, 40)),
+        "status": "PENDING"
+    }
+
+
+def _loader(bills: dict):
+    """Seeds like the mock path of supabase_db._load_billing_aggregate"""
+    async def load(user_id, horizon):
+        pending = [bill for bill in bills.values() if bill["user_id"] == user_id and bill["status"] == "PENDING"]
+        totals = {}
+        for bill in pending:
+            service_totals = totals.setdefault(bill["service_type"], [0, 0.0])
+            service_totals[0] += 1
+            service_totals[1] += float(bill["amount_due"])
+        due_bills = sorted(
+            (dict(bill) for bill in pending if bill["due_date"] <= horizon),
+            key=lambda bill: (bill["due_date"], bill["id"])
+        )
+        return BillingAggregate.seed(totals, due_bills, horizon)
+    return load
+
+
+def _assert_matches_recompute(aggregate: BillingAggregate, bills: dict) -> None:
+    pending = [bill for bill in bills.values() if bill["status"] == "PENDING"]
+    assert aggregate.total_due == pytest.approx(sum(bill["amount_due"] for bill in pending))
+    assert aggregate.pending_count == len(pending)
+
+    breakdown = {}
+    for bill in pending:
+        totals = breakdown.setdefault(bill["service_type"], {"count": 0, "amount": 0.0})
+        totals["count"] += 1
+        totals["amount"] += bill["amount_due"]
+    actual = aggregate.service_breakdown()
+    assert actual.keys() == breakdown.keys()
+    for service, totals in breakdown.items():
+        assert actual[service]["count"] == totals["count"]
+        assert actual[service]["amount"] == pytest.approx(totals["amount"])
+
+    for threshold in (TODAY, DUE_SOON, TODAY + timedelta(days=40)):
+        if not aggregate.covers(threshold):
+            continue
+        expected = sorted((bill["due_date"], bill["id"]) for bill in pending if bill["due_date"] <= threshold)
+        assert [(bill["due_date"], bill["id"]) for bill in aggregate.due_before(threshold)] == expected
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_create_update_and_settle_match_a_recompute(seed):
+    rng = random.Random(seed)
+    bills = {}
+    for number in range(rng.randint(0, 15)):
+        bill = _bill(rng, number)
+        bills[bill["id"]] = bill
+    next_number = len(bills)
+
+    store = BillingAggregateStore(maxsize=10, ttl=300.0)
+    load = _loader(bills)
+    aggregate = asyncio.run(store.get(USER, DUE_SOON, load))
+    assert aggregate.covers(DUE_SOON)
+    _assert_matches_recompute(aggregate, bills)
+
+    for _ in range(120):
+        action = rng.random()
+        if action < 0.3 or not bills:
+            bill = _bill(rng, next_number)
+            next_number += 1
+            bills[bill["id"]] = bill
+            store.bill_created(dict(bill))
+        elif action < 0.6:
+            bill = bills[rng.choice(sorted(bills))]
+            bill.update({
+                "amount_due": round(rng.uniform(10, 5000), 2),
+                "due_date": bill["due_date"] + timedelta(days=rng.randint(-3, 3)),
+                "status": rng.choice(["PENDING", "PENDING", "OVERDUE", "CANCELLED"])
+            })
+            store.bill_updated(dict(bill))
+        else:
+            # Settlement: several bills PAID at once, as settle_bills does
+            for bill_id in rng.sample(sorted(bills), min(len(bills), rng.randint(1, 3))):
+                if bills[bill_id]["status"] != "PAID":
+                    bills[bill_id]["status"] = "PAID"
+                    store.bill_updated(dict(bills[bill_id]))
+
+        # An update the aggregate cannot fold in drops it; the next read seeds again
+        aggregate = asyncio.run(store.get(USER, DUE_SOON, load))
+        _assert_matches_recompute(aggregate, bills)
+
+
+def test_untracked_bill_update_drops_the_aggregate():
+    bills = {
+        "near": {"id": "near", "user_id": USER, "service_type": "water", "amount_due": 100.0,
+                 "due_date": TODAY, "status": "PENDING"},
+        "far": {"id": "far", "user_id": USER, "service_type": "gas", "amount_due": 50.0,
+                "due_date": TODAY + timedelta(days=90), "status": "PENDING"}
+    }
+    store = BillingAggregateStore(maxsize=10, ttl=300.0)
+    aggregate = asyncio.run(store.get(USER, DUE_SOON, _loader(bills)))
+    assert aggregate.untracked == 1 and not aggregate.tracks("far")
+    assert aggregate.covers(DUE_SOON) and not aggregate.covers(TODAY + timedelta(days=90))
+
+    bills["far"]["status"] = "PAID"
+    store.bill_updated(dict(bills["far"]))
+    assert store.peek(USER) is None
+
+    _assert_matches_recompute(asyncio.run(store.get(USER, DUE_SOON, _loader(bills))), bills)
+
+
+def test_write_during_build_is_not_stored():
+    bills = {}
+    store = BillingAggregateStore(maxsize=10, ttl=300.0)
+    seed = _loader(bills)
+
+    async def load_with_concurrent_write(user_id, horizon):
+        aggregate = await seed(user_id, horizon)
+        bill = _bill(random.Random(0), 1)
+        bills[bill["id"]] = bill
+        store.bill_created(dict(bill))
+        return aggregate
+
+    asyncio.run(store.get(USER, DUE_SOON, load_with_concurrent_write))
+    assert store.peek(USER) is None
+    _assert_matches_recompute(asyncio.run(store.get(USER, DUE_SOON, seed)), bills)
+
+
+def test_seeding_horizon_covers_thresholds_for_the_ttl():
+    store = BillingAggregateStore(maxsize=10, ttl=300.0)
+    horizons = []
+
+    async def load(user_id, horizon):
+        horizons.append(horizon)
+        return BillingAggregate.seed({"water": (1, 10)}, [], horizon)
+
+    asyncio.run(store.get(USER, DUE_SOON, load))
+    assert horizons == [DUE_SOON + timedelta(days=1)]
+    # The threshold moving to the next day is still covered without reseeding
+    asyncio.run(store.get(USER, DUE_SOON + timedelta(days=1), load))
+    assert len(horizons) == 1
@@ -0,0 +1,97 @@
+"""Tests - GrievanceSearchIndex kept current incrementally vs. rebuilt from scratch"""
+import random
+
+import pytest
+
+from app.services.grievance_search import GrievanceSearchIndex
+
+WORDS = "power outage sector transformer water leak pipe meter bill overcharge street light fire gas smell".split()
+QUERIES = ["power outage", "water leak pipe", "bill", "fire gas", "street light sector", "meter overcharge power"]
+
+
+def _grievance(rng: random.Random, number: int) -> dict:
+    return {
+        "ticket_id": f"GRV-{number:04d}",
+        "user_id": f"user-{rng.randint(1, 5)}",
+        "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))),
+        "category": rng.choice(["POWER_OUTAGE", "WATER_SUPPLY", "BILLING", "OTHER"]),
+        "status": rng.choice(["OPEN", "IN_PROGRESS", "RESOLVED"]),
+        "priority": rng.choice(["LOW", "MEDIUM", "HIGH"])
+    }
+
+
+def _search_all(index: GrievanceSearchIndex, **filters) -> dict:
+    return {
+        query: dict(index.search(query, limit=1000, **filters))
+        for query in QUERIES
+    }
+
+
+def _assert_same_results(incremental: GrievanceSearchIndex, rebuilt: GrievanceSearchIndex, **filters) -> None:
+    expected = _search_all(rebuilt, **filters)
+    actual = _search_all(incremental, **filters)
+    for query in QUERIES:
+        assert actual[query].keys() == expected[query].keys(), query
+        for ticket_id, score in expected[query].items():
+            assert actual[query][ticket_id] == pytest.approx(score), (query, ticket_id)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_updates_and_removals_score_like_a_rebuild(seed):
+    rng = random.Random(seed)
+    rows = {}
+    index = GrievanceSearchIndex()
+    for number in range(60):
+        row = _grievance(rng, number)
+        rows[row["ticket_id"]] = row
+        index.add(row)
+
+    for _ in range(80):
+        ticket_id = rng.choice(sorted(rows))
+        action = rng.random()
+        if action < 0.4:
+            changes = {"description": _grievance(rng, 0)["description"]}
+        elif action < 0.7:
+            changes = {"status": rng.choice(["OPEN", "RESOLVED"]), "priority": rng.choice(["LOW", "HIGH"])}
+        elif action < 0.85:
+            index.remove(ticket_id)
+            del rows[ticket_id]
+            continue
+        else:
+            row = _grievance(rng, len(rows) + 1000)
+            rows[row["ticket_id"]] = row
+            index.add(row)
+            continue
+        rows[ticket_id] = {**rows[ticket_id], **changes}
+        index.update(ticket_id, changes)
+
+    rebuilt = GrievanceSearchIndex()
+    rebuilt.rebuild(rows.values())
+
+    _assert_same_results(index, rebuilt)
+    _assert_same_results(index, rebuilt, status="OPEN")
+    _assert_same_results(index, rebuilt, user_id="user-2")
+    assert index.stats["documents"] == rebuilt.stats["documents"] == len(rows)
+
+
+def test_deleted_documents_do_not_deflate_idf():
+    index = GrievanceSearchIndex()
+    for number in range(10):
+        index.add({"ticket_id": f"GRV-{number}", "user_id": "user-1", "description": "power outage"})
+    # The term now appears in one live document out of one, as if freshly indexed
+    for number in range(9):
+        index.remove(f"GRV-{number}")
+
+    results = index.search("power")
+    assert [ticket_id for ticket_id, _ in results] == ["GRV-9"]
+    assert results[0][1] > 0.0
+
+
+def test_reindexing_an_unchanged_ticket_keeps_scores():
+    index = GrievanceSearchIndex()
+    row = {"ticket_id": "GRV-1", "user_id": "user-1", "description": "street light not working"}
+    index.add(row)
+    index.add({"ticket_id": "GRV-2", "user_id": "user-1", "description": "water leak"})
+    before = index.search("street light")
+    index.add(row)
+    assert index.search("street light") == before
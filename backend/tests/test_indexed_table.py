@@ -0,0 +1,119 @@
+"""Tests - IndexedTable lookups after writes vs. a scan over the same rows"""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.core.indexed_table import IndexedTable
+
+USERS = ["u1", "u2", "u3"]
+STATUSES = ["PENDING", "PAID", "OVERDUE"]
+START = date(2026, 1, 1)
+
+
+def _table() -> IndexedTable:
+    return IndexedTable(
+        indexes=["user_id", ("user_id", "status")],
+        range_indexes=[(("user_id", "status"), "due_date")]
+    )
+
+
+def _bill(rng: random.Random, number: int) -> dict:
+    return {
+        "id": f"b{number:03d}",
+        "user_id": rng.choice(USERS),
+        "status": rng.choice(STATUSES),
+        "due_date": START + timedelta(days=rng.randint(0, 30)) if rng.random() < 0.9 else None
+    }
+
+
+def _assert_matches_scan(table: IndexedTable, rows: dict, rng: random.Random) -> None:
+    assert len(table) == len(rows)
+    assert {row["id"] for row in table} == set(rows)
+    for pk, row in rows.items():
+        assert table.get(pk) == row
+
+    for user_id in USERS:
+        expected = sorted(pk for pk, row in rows.items() if row["user_id"] == user_id)
+        assert sorted(row["id"] for row in table.find("user_id", user_id)) == expected
+        assert table.count("user_id", user_id) == len(expected)
+
+        for status in STATUSES:
+            matching = {pk: row for pk, row in rows.items() if (row["user_id"], row["status"]) == (user_id, status)}
+            assert sorted(row["id"] for row in table.find(("user_id", "status"), (user_id, status))) == sorted(matching)
+
+            lower = START + timedelta(days=rng.randint(0, 15))
+            upper = lower + timedelta(days=rng.randint(0, 15))
+            for bounds in ({}, {"lower": lower}, {"upper": upper}, {"lower": lower, "upper": upper}):
+                expected_range = sorted(
+                    (row["due_date"], pk) for pk, row in matching.items()
+                    if row["due_date"] is not None
+                    and ("lower" not in bounds or row["due_date"] >= bounds["lower"])
+                    and ("upper" not in bounds or row["due_date"] <= bounds["upper"])
+                )
+                found = table.find_range(("user_id", "status"), (user_id, status), "due_date", **bounds)
+                assert [(row["due_date"], row["id"]) for row in found] == expected_range, bounds
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_writes_keep_every_index_consistent(seed):
+    rng = random.Random(seed)
+    table = _table()
+    rows = {}
+    next_number = 0
+
+    for step in range(300):
+        action = rng.random()
+        if action < 0.3 or not rows:
+            row = _bill(rng, next_number)
+            next_number += 1
+            table.insert(dict(row))
+            rows[row["id"]] = row
+        elif action < 0.65:
+            pk = rng.choice(sorted(rows))
+            changes = {
+                column: value for column, value in _bill(rng, 0).items()
+                if column != "id" and rng.random() < 0.5
+            }
+            table.update(pk, changes)
+            rows[pk].update(changes)
+        elif action < 0.8:
+            pks = rng.sample(sorted(rows), min(len(rows), rng.randint(1, 5)))
+            changes = {"status": "PAID"}
+            updated = table.update_many(pks + pks[:1] + ["missing"], changes)
+            assert sorted(row["id"] for row in updated) == sorted(pks)
+            for pk in pks:
+                rows[pk].update(changes)
+        else:
+            pk = rng.choice(sorted(rows))
+            assert table.delete(pk)["id"] == pk
+            del rows[pk]
+
+        if step % 20 == 0:
+            _assert_matches_scan(table, rows, rng)
+
+    _assert_matches_scan(table, rows, rng)
+
+
+def test_find_keeps_insertion_order():
+    table = _table()
+    for number in (3, 1, 2):
+        table.insert({"id": f"b{number}", "user_id": "u1", "status": "PENDING", "due_date": START})
+    assert [row["id"] for row in table.find("user_id", "u1")] == ["b3", "b1", "b2"]
+    assert table.find_one("user_id", "u1")["id"] == "b3"
+    # Ties on the range column are ordered by primary key
+    assert [row["id"] for row in table.find_range(("user_id", "status"), ("u1", "PENDING"), "due_date")] == ["b1", "b2", "b3"]
+
+
+def test_invalid_writes_are_rejected():
+    table = _table()
+    table.insert({"id": "b1", "user_id": "u1", "status": "PENDING", "due_date": START})
+    with pytest.raises(ValueError):
+        table.insert({"id": "b1", "user_id": "u2"})
+    with pytest.raises(ValueError):
+        table.insert({"user_id": "u2"})
+    with pytest.raises(ValueError):
+        table.update("b1", {"id": "b2"})
+    assert table.update("missing", {"status": "PAID"}) is None
+    assert table.delete("missing") is None
+    assert table.count(("user_id", "status"), ("u1", "PENDING")) == 1
@@ -35,6 +35,8 @@ export interface DashboardSummary {
     priority: string;
   }>;
   grievances_count: number;
+  // Sections that failed or timed out and were returned empty
+  unavailable?: Array<'bills' | 'alerts' | 'grievances'>;
 }
 
 export interface SystemStatus {
@@ -169,14 +171,16 @@ class ApiClient {
   }
 
   // Payment endpoints
+  // Reuse the same idempotencyKey when retrying, so a retry returns the original order
   async createPaymentOrder(data: {
     amount: number;
     bill_ids: string[];
     payment_method: string;
-  }) {
+  }, idempotencyKey?: string) {
     return this.request('/api/payments/create-order', {
       method: 'POST',
       body: JSON.stringify(data),
+      headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : undefined,
     });
   }
 